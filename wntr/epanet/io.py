@@ -5,6 +5,7 @@ from __future__ import absolute_import
 
 import datetime
 import difflib
+import gc
 import io
 import logging
 import os
@@ -235,8 +236,10 @@ class InpFile(object):
         self.flow_units = None
         self.top_comments = []
         self.curves = OrderedDict()
+        # Formatted text of INP sections, reused on later writes, see _cached_text
+        self._section_cache = dict()
 
-    def read(self, inp_files, wn=None):
+    def read(self, inp_files, wn=None, fast=False):
         """
         Read an EPANET INP file and load data into a water network model object.
         Both EPANET 2.0 and EPANET 2.2 INP file options are recognized and handled.
@@ -247,6 +250,16 @@ class InpFile(object):
             An EPANET INP input file or list of INP files to be combined
         wn : WaterNetworkModel, optional
             An optional network model to append onto; by default a new model is created.
+        fast : bool, optional
+            If True, the JUNCTIONS and PIPES sections are tokenized into column 
+            arrays, converted to SI units in one operation per column, and 
+            added to the model in bulk (see 
+            :meth:`~wntr.network.model.WaterNetworkModel.add_junctions` and 
+            :meth:`~wntr.network.model.WaterNetworkModel.add_pipes`). The 
+            resulting model is the same as the one created by the default 
+            line-by-line reader, which is used instead if a section cannot be 
+            read in bulk (for example, to report the line of an invalid entry). 
+            Default = False.
 
         Returns
         -------
@@ -278,8 +291,7 @@ class InpFile(object):
                 lnum += 1
                 edata['lnum'] = lnum
                 line = line.strip()
-                nwords = len(line.split())
-                if len(line) == 0 or nwords == 0:
+                if len(line) == 0:
                     # Blank line
                     continue
                 elif line.startswith('['):
@@ -316,6 +328,11 @@ class InpFile(object):
 
         # Parse each of the sections
         # The order of operations is important as certain things require prior knowledge
+        # The fast reader pauses garbage collection, which would otherwise 
+        # repeatedly scan the many new element objects
+        gc_enabled = fast and gc.isenabled()
+        if gc_enabled:
+            gc.disable()
         try:
 
             ### OPTIONS
@@ -331,7 +348,10 @@ class InpFile(object):
             self._read_patterns()
 
             ### JUNCTIONS
-            self._read_junctions()
+            if fast:
+                self._read_junctions_columnar()
+            else:
+                self._read_junctions()
 
             ### RESERVOIRS
             self._read_reservoirs()
@@ -340,7 +360,10 @@ class InpFile(object):
             self._read_tanks()
 
             ### PIPES
-            self._read_pipes()
+            if fast:
+                self._read_pipes_columnar()
+            else:
+                self._read_pipes()
 
             ### PUMPS
             self._read_pumps()
@@ -399,6 +422,9 @@ class InpFile(object):
             self._read_end()
         except EpanetException as e:
             raise EpanetException(200, filename) from e
+        finally:
+            if gc_enabled:
+                gc.enable()
 
         return self.wn
 
@@ -415,8 +441,9 @@ class InpFile(object):
 
         Parameters
         ----------
-        filename : str
-            Name of the EPANET INP file.
+        filename : str or file-like
+            Name of the EPANET INP file, or a binary file-like object (such as 
+            an :class:`io.BytesIO`) that the INP text is written to.
         units : str, int or FlowUnits
             Name of the units for the EPANET INP file to be written in.
         version : float, {2.0, **2.2**}
@@ -428,6 +455,16 @@ class InpFile(object):
             and will force the COORDINATES section to be written even if a MAP file is
             provided. False by default, but coordinates **are** written by default since
             the MAP file is `None` by default.
+
+        Notes
+        -----
+        The formatted text of the [PATTERNS] and [CURVES] entries and of the 
+        [COORDINATES] and [VERTICES] sections is kept by the InpFile object 
+        and reused on later writes while the values it was formatted from 
+        are unchanged, which speeds up repeated writes of the same model 
+        (for example, by the EpanetSimulator).  All other sections, including 
+        [OPTIONS], are formatted on each write.  The whole file is still 
+        written on each write.
 		"""
 
         if not isinstance(wn, WaterNetworkModel):
@@ -450,41 +487,48 @@ class InpFile(object):
             self.flow_units = FlowUnits.GPM
         if self.mass_units is None:
             self.mass_units = MassUnits.mg
-        with io.open(filename, 'wb') as f:
-            self._write_title(f, wn)
-            self._write_junctions(f, wn)
-            self._write_reservoirs(f, wn)
-            self._write_tanks(f, wn, version=version)
-            self._write_pipes(f, wn)
-            self._write_pumps(f, wn)
-            self._write_valves(f, wn)
-
-            self._write_tags(f, wn)
-            self._write_demands(f, wn)
-            self._write_status(f, wn)
-            self._write_patterns(f, wn)
-            self._write_curves(f, wn)
-            self._write_controls(f, wn)
-            self._write_rules(f, wn)
-            self._write_energy(f, wn)
-            self._write_emitters(f, wn)
-
-            self._write_quality(f, wn)
-            self._write_sources(f, wn)
-            self._write_reactions(f, wn)
-            self._write_mixing(f, wn)
-
-            self._write_times(f, wn)
-            self._write_report(f, wn)
-            self._write_options(f, wn, version=version)
-
-            if wn.options.graphics.map_filename is None or force_coordinates is True:
-                self._write_coordinates(f, wn)
-            self._write_vertices(f, wn)
-            self._write_labels(f, wn)
-            self._write_backdrop(f, wn)
-
-            self._write_end(f, wn)
+        if hasattr(filename, 'write'):
+            self._write_sections(filename, wn, version, force_coordinates)
+        else:
+            with io.open(filename, 'wb') as f:
+                self._write_sections(f, wn, version, force_coordinates)
+
+    def _write_sections(self, f, wn, version, force_coordinates):
+        """Write all INP sections to an open binary file object"""
+        self._write_title(f, wn)
+        self._write_junctions(f, wn)
+        self._write_reservoirs(f, wn)
+        self._write_tanks(f, wn, version=version)
+        self._write_pipes(f, wn)
+        self._write_pumps(f, wn)
+        self._write_valves(f, wn)
+
+        self._write_tags(f, wn)
+        self._write_demands(f, wn)
+        self._write_status(f, wn)
+        self._write_patterns(f, wn)
+        self._write_curves(f, wn)
+        self._write_controls(f, wn)
+        self._write_rules(f, wn)
+        self._write_energy(f, wn)
+        self._write_emitters(f, wn)
+
+        self._write_quality(f, wn)
+        self._write_sources(f, wn)
+        self._write_reactions(f, wn)
+        self._write_mixing(f, wn)
+
+        self._write_times(f, wn)
+        self._write_report(f, wn)
+        self._write_options(f, wn, version=version)
+
+        if wn.options.graphics.map_filename is None or force_coordinates is True:
+            self._write_coordinates(f, wn)
+        self._write_vertices(f, wn)
+        self._write_labels(f, wn)
+        self._write_backdrop(f, wn)
+
+        self._write_end(f, wn)
 
     ### Network Components
 
@@ -533,6 +577,37 @@ class InpFile(object):
 #            print(line)
 #            raise e
 
+    def _tokenize_section(self, sec):
+        """Split each line of a section into tokens, dropping comments and empty lines"""
+        rows = []
+        for lnum, line in self.sections[sec]:
+            current = line.split(';', 1)[0].split()
+            if current:
+                rows.append(current)
+        return rows
+
+    def _read_junctions_columnar(self):
+        rows = self._tokenize_section('[JUNCTIONS]')
+        if len(rows) == 0:
+            return
+        if self.wn.options.hydraulic.pattern:
+            default_pattern = self.wn.options.hydraulic.pattern
+        else:
+            default_pattern = self.wn.patterns.default_pattern
+        try:
+            names = [current[0] for current in rows]
+            elevation = np.array([current[1] for current in rows], dtype=float)
+            base_demand = np.array([current[2] if len(current) > 2 else 0.0 for current in rows], dtype=float)
+            patterns = [current[3] if len(current) > 3 else default_pattern for current in rows]
+            self.wn.add_junctions(dict(name=names,
+                                       base_demand=to_si(self.flow_units, base_demand, HydParam.Demand),
+                                       demand_pattern=patterns,
+                                       elevation=to_si(self.flow_units, elevation, HydParam.Elevation)))
+        except (IndexError, KeyError, ValueError, AssertionError):
+            # Nothing has been added, read line by line to report the error
+            logger.debug('Reading [JUNCTIONS] line by line')
+            self._read_junctions()
+
     def _write_junctions(self, f, wn):
         f.write('[JUNCTIONS]\n'.encode(sys_default_enc))
         f.write(_JUNC_LABEL.format(';ID', 'Elevation', 'Demand', 'Pattern').encode(sys_default_enc))
@@ -713,6 +788,35 @@ class InpFile(object):
             except ValueError as e:
                 raise ENValueError(211, str(e.args[0]), line_num=lnum) from e
 
+    def _read_pipes_columnar(self):
+        rows = self._tokenize_section('[PIPES]')
+        if len(rows) == 0:
+            return
+        darcy_weisbach = self.wn.options.hydraulic.headloss == "D-W"
+        try:
+            ntokens = set(map(len, rows))
+            if not ntokens.issubset({6, 7, 8}):
+                raise ValueError('Unexpected number of values in [PIPES]')
+            columns = [[current[j] for current in rows] for j in range(6)]
+            minor_loss = np.array([current[6] if len(current) > 6 else 0.0 for current in rows], dtype=float)
+            status = [current[7].upper() if len(current) > 7 else 'OPEN' for current in rows]
+            check_valve = [value == 'CV' for value in status]
+            status = [LinkStatus.Open if value == 'CV' else LinkStatus[value] for value in status]
+            self.wn.add_pipes(dict(name=columns[0],
+                                   start_node_name=columns[1],
+                                   end_node_name=columns[2],
+                                   length=to_si(self.flow_units, np.array(columns[3], dtype=float), HydParam.Length),
+                                   diameter=to_si(self.flow_units, np.array(columns[4], dtype=float), HydParam.PipeDiameter),
+                                   roughness=to_si(self.flow_units, np.array(columns[5], dtype=float), HydParam.RoughnessCoeff,
+                                                   darcy_weisbach=darcy_weisbach),
+                                   minor_loss=minor_loss,
+                                   initial_status=status,
+                                   check_valve=check_valve))
+        except (IndexError, KeyError, ValueError, AssertionError):
+            # Nothing has been added, read line by line to report the error
+            logger.debug('Reading [PIPES] line by line')
+            self._read_pipes()
+
     def _write_pipes(self, f, wn):
         darcy_weisbach = wn.options.hydraulic.headloss == "D-W"
         
@@ -933,6 +1037,26 @@ class InpFile(object):
             self.wn.curves[curve_name] = None
             
 
+    def _cached_text(self, section, entry, key, format_text):
+        """
+        Text of an entry of an INP section (or of the whole section if entry 
+        is None) formatted by format_text(), reused while key is unchanged.  
+        Entries that are not used in a write are removed from the cache by 
+        _end_cached_section.
+        """
+        cache = self._section_cache.setdefault(section, [dict(), dict()])
+        cached = cache[0].get(entry)
+        if cached is None or cached[0] != key:
+            cached = (key, format_text())
+        cache[1][entry] = cached
+        return cached[1]
+
+    def _end_cached_section(self, section):
+        """Keep only the cached entries used in the current write"""
+        cache = self._section_cache.get(section)
+        if cache is not None:
+            self._section_cache[section] = [cache[1], dict()]
+
     def _write_curves(self, f, wn):
         f.write('[CURVES]\n'.encode(sys_default_enc))
         f.write(_CURVE_LABEL.format(';ID', 'X-Value', 'Y-Value').encode(sys_default_enc))
@@ -940,39 +1064,48 @@ class InpFile(object):
         # curves.sort()
         for curve_name in curves:
             curve = wn.get_curve(curve_name)
-            if curve.curve_type == 'VOLUME':
-                f.write(';VOLUME: {}\n'.format(curve_name).encode(sys_default_enc))
-                for point in curve.points:
-                    x = from_si(self.flow_units, point[0], HydParam.Length)
-                    y = from_si(self.flow_units, point[1], HydParam.Volume)
-                    f.write(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';').encode(sys_default_enc))
-            elif curve.curve_type == 'HEAD':
-                f.write(';PUMP: {}\n'.format(curve_name).encode(sys_default_enc))
-                for point in curve.points:
-                    x = from_si(self.flow_units, point[0], HydParam.Flow)
-                    y = from_si(self.flow_units, point[1], HydParam.HydraulicHead)
-                    f.write(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';').encode(sys_default_enc))
-            elif curve.curve_type == 'EFFICIENCY':
-                f.write(';EFFICIENCY: {}\n'.format(curve_name).encode(sys_default_enc))
-                for point in curve.points:
-                    x = from_si(self.flow_units, point[0], HydParam.Flow)
-                    y = point[1]
-                    f.write(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';').encode(sys_default_enc))
-            elif curve.curve_type == 'HEADLOSS':
-                f.write(';HEADLOSS: {}\n'.format(curve_name).encode(sys_default_enc))
-                for point in curve.points:
-                    x = from_si(self.flow_units, point[0], HydParam.Flow)
-                    y = from_si(self.flow_units, point[1], HydParam.HydraulicHead)
-                    f.write(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';').encode(sys_default_enc))
-            else:
-                f.write(';UNKNOWN: {}\n'.format(curve_name).encode(sys_default_enc))
-                for point in curve.points:
-                    x = point[0]
-                    y = point[1]
-                    f.write(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';').encode(sys_default_enc))
+            key = (curve.curve_type, self.flow_units, 
+                   np.asarray(curve.points, dtype=np.float64).tobytes())
+            f.write(self._cached_text('[CURVES]', curve_name, key, 
+                                      lambda: self._format_curve(curve_name, curve)))
             f.write('\n'.encode(sys_default_enc))
+        self._end_cached_section('[CURVES]')
         f.write('\n'.encode(sys_default_enc))
 
+    def _format_curve(self, curve_name, curve):
+        text = []
+        if curve.curve_type == 'VOLUME':
+            text.append(';VOLUME: {}\n'.format(curve_name))
+            for point in curve.points:
+                x = from_si(self.flow_units, point[0], HydParam.Length)
+                y = from_si(self.flow_units, point[1], HydParam.Volume)
+                text.append(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';'))
+        elif curve.curve_type == 'HEAD':
+            text.append(';PUMP: {}\n'.format(curve_name))
+            for point in curve.points:
+                x = from_si(self.flow_units, point[0], HydParam.Flow)
+                y = from_si(self.flow_units, point[1], HydParam.HydraulicHead)
+                text.append(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';'))
+        elif curve.curve_type == 'EFFICIENCY':
+            text.append(';EFFICIENCY: {}\n'.format(curve_name))
+            for point in curve.points:
+                x = from_si(self.flow_units, point[0], HydParam.Flow)
+                y = point[1]
+                text.append(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';'))
+        elif curve.curve_type == 'HEADLOSS':
+            text.append(';HEADLOSS: {}\n'.format(curve_name))
+            for point in curve.points:
+                x = from_si(self.flow_units, point[0], HydParam.Flow)
+                y = from_si(self.flow_units, point[1], HydParam.HydraulicHead)
+                text.append(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';'))
+        else:
+            text.append(';UNKNOWN: {}\n'.format(curve_name))
+            for point in curve.points:
+                x = point[0]
+                y = point[1]
+                text.append(_CURVE_ENTRY.format(name=curve_name, x=x, y=y, com=';'))
+        return ''.join(text).encode(sys_default_enc)
+
     def _read_patterns(self):
         _patterns = OrderedDict()
         for lnum, line in self.sections['[PATTERNS]']:
@@ -1004,23 +1137,33 @@ class InpFile(object):
             self.wn.options.hydraulic.pattern = None
 
     def _write_patterns(self, f, wn):
-        num_columns = 6
         f.write('[PATTERNS]\n'.encode(sys_default_enc))
         f.write('{:10s} {:10s}\n'.format(';ID', 'Multipliers').encode(sys_default_enc))
         patterns = list(wn.pattern_name_list)
         # patterns.sort()
         for pattern_name in patterns:
             pattern = wn.get_pattern(pattern_name)
-            count = 0
-            for i in pattern.multipliers:
-                if count % num_columns == 0:
-                    f.write('\n{:s} {:f}'.format(pattern_name, i).encode(sys_default_enc))
-                else:
-                    f.write(' {:f}'.format(i).encode(sys_default_enc))
-                count += 1
-            f.write('\n'.encode(sys_default_enc))
+            # Formatting the multipliers dominates the cost of this section, so
+            # the text is cached and reused while the multipliers are unchanged
+            key = np.asarray(pattern.multipliers, dtype=np.float64).tobytes()
+            f.write(self._cached_text('[PATTERNS]', pattern_name, key, 
+                                      lambda: self._format_pattern(pattern_name, pattern)))
+        self._end_cached_section('[PATTERNS]')
         f.write('\n'.encode(sys_default_enc))
 
+    def _format_pattern(self, pattern_name, pattern):
+        num_columns = 6
+        text = []
+        count = 0
+        for i in pattern.multipliers:
+            if count % num_columns == 0:
+                text.append('\n{:s} {:f}'.format(pattern_name, i))
+            else:
+                text.append(' {:f}'.format(i))
+            count += 1
+        text.append('\n')
+        return ''.join(text).encode(sys_default_enc)
+
     def _read_energy(self):
         for lnum, line in self.sections['[ENERGY]']:
             line = line.split(';')[0]
@@ -1949,9 +2092,10 @@ class InpFile(object):
         entry = '{:10s} {:20.9f} {:20.9f}\n'
         label = '{:10s} {:10s} {:10s}\n'
         f.write(label.format(';Node', 'X-Coord', 'Y-Coord').encode(sys_default_enc))
-        for name, node in wn.nodes():
-            val = node.coordinates
-            f.write(entry.format(name, val[0], val[1]).encode(sys_default_enc))
+        coordinates = [(name, node.coordinates) for name, node in wn.nodes()]
+        f.write(self._cached_text('[COORDINATES]', None, coordinates, lambda: ''.join(
+            entry.format(name, val[0], val[1]) for name, val in coordinates).encode(sys_default_enc)))
+        self._end_cached_section('[COORDINATES]')
         f.write('\n'.encode(sys_default_enc))
 
     def _read_vertices(self):
@@ -1972,9 +2116,11 @@ class InpFile(object):
         entry = '{:10s} {:20.9f} {:20.9f}\n'
         label = '{:10s} {:10s} {:10s}\n'
         f.write(label.format(';Link', 'X-Coord', 'Y-Coord').encode(sys_default_enc))
-        for name, link in wn.links():
-                for vert in link._vertices:
-                    f.write(entry.format(name, vert[0], vert[1]).encode(sys_default_enc))
+        vertices = [(name, tuple(map(tuple, link._vertices))) for name, link in wn.links() if link._vertices]
+        f.write(self._cached_text('[VERTICES]', None, vertices, lambda: ''.join(
+            entry.format(name, vert[0], vert[1]) for name, link_vertices in vertices 
+            for vert in link_vertices).encode(sys_default_enc)))
+        self._end_cached_section('[VERTICES]')
         
         f.write('\n'.encode(sys_default_enc))
 
@@ -2456,6 +2602,11 @@ class _EpanetRule(object):
         return Rule(final_condition, then_acts, else_acts, priority=self.priority, name=self.ruleID)
 
 
+# Number of values read at once from the binary file when the report 
+# periods are passed to a report hook without keeping the results
+_REPORT_BLOCK_VALUES = 2**22
+
+
 class BinFile(object):
     """EPANET binary output file reader.
     
@@ -2585,8 +2736,75 @@ class BinFile(object):
         """
         pass
 
+    def _convert_results(self, df, linktype, linknames, reporttimes, darcy_weisbach, convert):
+        """Node and link results (dictionaries of DataFrames) from the report periods in df"""
+        node = {}
+        link = {}
+        if convert:
+            # Node Results
+            node['demand'] = HydParam.Demand._to_si(self.flow_units, df['demand'])
+            node['head'] = HydParam.HydraulicHead._to_si(self.flow_units, df['head'])
+            node['pressure'] = HydParam.Pressure._to_si(self.flow_units, df['pressure'])
+
+            # Water Quality Results (node and link)
+            if self.quality_type is QualType.Chem:
+                node['quality'] = QualParam.Concentration._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
+                link['quality'] = QualParam.Concentration._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
+            elif self.quality_type is QualType.Age:
+                node['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
+                link['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
+            else:
+                node['quality'] = df['quality']
+                link['quality'] = df['linkquality']
+
+            # Link Results
+            link['flowrate'] = HydParam.Flow._to_si(self.flow_units, df['flow'])
+            link['velocity'] = HydParam.Velocity._to_si(self.flow_units, df['velocity'])
+
+            headloss = np.array(df['headloss'])
+            headloss[:, linktype < 2] = to_si(self.flow_units, headloss[:, linktype < 2], HydParam.HeadLoss) # Pipe or CV
+            headloss[:, linktype >= 2] = to_si(self.flow_units, headloss[:, linktype >= 2], HydParam.Length) # Pump or Valve
+            link["headloss"] = pd.DataFrame(data=headloss, columns=linknames, index=reporttimes)
+
+            status = np.array(df['linkstatus'])
+            if self.convert_status:
+                status[status <= 2] = 0
+                status[status == 3] = 1
+                status[status >= 5] = 1
+                status[status == 4] = 2
+            link['status'] = pd.DataFrame(data=status, columns=linknames, index=reporttimes)
+
+            setting = np.array(df['linksetting'])
+            # pump setting is relative speed (unitless)
+            setting[:, linktype == EN.PIPE] = to_si(self.flow_units, setting[:, linktype == EN.PIPE], HydParam.RoughnessCoeff, 
+                                            darcy_weisbach=darcy_weisbach)
+            setting[:, linktype == EN.PRV] = to_si(self.flow_units, setting[:, linktype == EN.PRV], HydParam.Pressure)
+            setting[:, linktype == EN.PSV] = to_si(self.flow_units, setting[:, linktype == EN.PSV], HydParam.Pressure)
+            setting[:, linktype == EN.PBV] = to_si(self.flow_units, setting[:, linktype == EN.PBV], HydParam.Pressure)
+            setting[:, linktype == EN.FCV] = to_si(self.flow_units, setting[:, linktype == EN.FCV], HydParam.Flow)
+            link['setting'] = pd.DataFrame(data=setting, columns=linknames, index=reporttimes)
+
+            link['friction_factor'] = df['frictionfactor']
+            link['reaction_rate'] = QualParam.ReactionRate._to_si(self.flow_units, df['reactionrate'],self.mass_units) 
+        else:
+            node['demand'] = df['demand']
+            node['head'] = df['head']
+            node['pressure'] = df['pressure']
+            node['quality'] = df['quality']
+
+            link['flowrate'] = df['flow']
+            link['headloss'] = df['headloss']
+            link['velocity'] = df['velocity']
+            link['quality'] = df['linkquality']
+            link['status'] = df['linkstatus']
+            link['setting'] = df['linksetting']
+            link['friction_factor'] = df['frictionfactor']
+            link['reaction_rate'] = df['reactionrate']
+        return node, link
+
 #    @run_lineprofile()
-    def read(self, filename, convergence_error=False, darcy_weisbach=False, convert=True):
+    def read(self, filename, convergence_error=False, darcy_weisbach=False, convert=True, 
+             report_hook=None, keep_results=True):
         """Read a binary file and create a results object.
 
         Parameters
@@ -2598,6 +2816,15 @@ class BinFile(object):
             simulation does not converge. If convergence_error is False, partial results are returned, 
             a warning will be issued, and results.error_code will be set to 0
             if the simulation does not converge.  Default = False.
+        report_hook: callable (optional)
+            Function called as ``report_hook(time, node, link)`` for each 
+            report period, where `node` and `link` are dictionaries of pandas 
+            Series (indexed by element name) keyed by result attribute.
+        keep_results: bool (optional)
+            If False and `report_hook` is given, the report periods are read 
+            in blocks and passed to `report_hook`, and the node and link 
+            results are not kept (results.node and results.link are empty).  
+            Default = True.
 
         Returns
         -------
@@ -2758,94 +2985,68 @@ class BinFile(object):
 #                tuples = [(valuetype[i], v) for i, v in enumerate(name_list)]
             index = pd.MultiIndex.from_tuples(tuples, names=['value','name'])      
             
-            try:
-                data = np.fromfile(fin, dtype = np.dtype(ftype), count = (4*nnodes+8*nlinks)*nrptsteps)
-            except Exception as e:
-                logger.exception('Failed to process file: %s', e)
-                
-            N = int(np.floor(len(data)/(4*nnodes+8*nlinks)))
-            if N < nrptsteps:
-                t = reporttimes[N]
-                if convergence_error:
-                    logger.error('Simulation did not converge at time ' + self._get_time(t) + '.')
-                    raise RuntimeError('Simulation did not converge at time ' + self._get_time(t) + '.')
-                else:
-                    data = data[0:N*(4*nnodes+8*nlinks)]
-                    data = np.reshape(data, (N, (4*nnodes+8*nlinks)))
-                    reporttimes = reporttimes[0:N]
-                    warnings.warn('Simulation did not converge at time ' + self._get_time(t) + '.')
-                    self.results.error_code = wntr.sim.results.ResultsStatus.error
-            else:
-                data = np.reshape(data, (nrptsteps, (4*nnodes+8*nlinks)))
-                self.results.error_code = None
-
-            df = pd.DataFrame(data.transpose(), index =index, columns = reporttimes)
-            df = df.transpose()
-            
             self.results.node = {}
             self.results.link = {}
             self.results.network_name = self.inp_file
-            
-            if convert:
-                # Node Results
-                self.results.node['demand'] = HydParam.Demand._to_si(self.flow_units, df['demand'])
-                self.results.node['head'] = HydParam.HydraulicHead._to_si(self.flow_units, df['head'])
-                self.results.node['pressure'] = HydParam.Pressure._to_si(self.flow_units, df['pressure'])
-        
-                # Water Quality Results (node and link)
-                if self.quality_type is QualType.Chem:
-                    self.results.node['quality'] = QualParam.Concentration._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['quality'] = QualParam.Concentration._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
-                elif self.quality_type is QualType.Age:
-                    self.results.node['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
+
+            if report_hook is not None and not keep_results:
+                # Read the report periods in blocks and pass each report 
+                # period to the report hook without keeping the results
+                rowlen = 4*nnodes + 8*nlinks
+                block = max(1, _REPORT_BLOCK_VALUES // rowlen)
+                N = 0
+                while N < nrptsteps:
+                    count = min(block, nrptsteps - N)
+                    data = np.fromfile(fin, dtype=np.dtype(ftype), count=count*rowlen)
+                    n = len(data) // rowlen
+                    times = reporttimes[N:N+n]
+                    df = pd.DataFrame(data[0:n*rowlen].reshape(n, rowlen), index=times, columns=index)
+                    node, link = self._convert_results(df, linktype, linknames, times, darcy_weisbach, convert)
+                    for i, t in enumerate(times):
+                        report_hook(t, {key: value.iloc[i] for key, value in node.items()}, 
+                                    {key: value.iloc[i] for key, value in link.items()})
+                    N += n
+                    if n < count:
+                        break
+                if N < nrptsteps:
+                    t = reporttimes[N]
+                    if convergence_error:
+                        logger.error('Simulation did not converge at time ' + self._get_time(t) + '.')
+                        raise RuntimeError('Simulation did not converge at time ' + self._get_time(t) + '.')
+                    warnings.warn('Simulation did not converge at time ' + self._get_time(t) + '.')
+                    self.results.error_code = wntr.sim.results.ResultsStatus.error
                 else:
-                    self.results.node['quality'] = df['quality']
-                    self.results.link['quality'] = df['linkquality']
-        
-                # Link Results
-                self.results.link['flowrate'] = HydParam.Flow._to_si(self.flow_units, df['flow'])
-                self.results.link['velocity'] = HydParam.Velocity._to_si(self.flow_units, df['velocity'])
-                
-                headloss = np.array(df['headloss'])
-                headloss[:, linktype < 2] = to_si(self.flow_units, headloss[:, linktype < 2], HydParam.HeadLoss) # Pipe or CV
-                headloss[:, linktype >= 2] = to_si(self.flow_units, headloss[:, linktype >= 2], HydParam.Length) # Pump or Valve
-                self.results.link["headloss"] = pd.DataFrame(data=headloss, columns=linknames, index=reporttimes)
-        
-                status = np.array(df['linkstatus'])
-                if self.convert_status:
-                    status[status <= 2] = 0
-                    status[status == 3] = 1
-                    status[status >= 5] = 1
-                    status[status == 4] = 2
-                self.results.link['status'] = pd.DataFrame(data=status, columns=linknames, index=reporttimes)
-                
-                setting = np.array(df['linksetting'])
-                # pump setting is relative speed (unitless)
-                setting[:, linktype == EN.PIPE] = to_si(self.flow_units, setting[:, linktype == EN.PIPE], HydParam.RoughnessCoeff, 
-                                                darcy_weisbach=darcy_weisbach)
-                setting[:, linktype == EN.PRV] = to_si(self.flow_units, setting[:, linktype == EN.PRV], HydParam.Pressure)
-                setting[:, linktype == EN.PSV] = to_si(self.flow_units, setting[:, linktype == EN.PSV], HydParam.Pressure)
-                setting[:, linktype == EN.PBV] = to_si(self.flow_units, setting[:, linktype == EN.PBV], HydParam.Pressure)
-                setting[:, linktype == EN.FCV] = to_si(self.flow_units, setting[:, linktype == EN.FCV], HydParam.Flow)
-                self.results.link['setting'] = pd.DataFrame(data=setting, columns=linknames, index=reporttimes)
-                
-                self.results.link['friction_factor'] = df['frictionfactor']
-                self.results.link['reaction_rate'] = QualParam.ReactionRate._to_si(self.flow_units, df['reactionrate'],self.mass_units) 
+                    self.results.error_code = None
             else:
-                self.results.node['demand'] = df['demand']
-                self.results.node['head'] = df['head']
-                self.results.node['pressure'] = df['pressure']
-                self.results.node['quality'] = df['quality']
-                
-                self.results.link['flowrate'] = df['flow']
-                self.results.link['headloss'] = df['headloss']
-                self.results.link['velocity'] = df['velocity']
-                self.results.link['quality'] = df['linkquality']
-                self.results.link['status'] = df['linkstatus']
-                self.results.link['setting'] = df['linksetting']
-                self.results.link['friction_factor'] = df['frictionfactor']
-                self.results.link['reaction_rate'] = df['reactionrate']
+                try:
+                    data = np.fromfile(fin, dtype = np.dtype(ftype), count = (4*nnodes+8*nlinks)*nrptsteps)
+                except Exception as e:
+                    logger.exception('Failed to process file: %s', e)
+                    
+                N = int(np.floor(len(data)/(4*nnodes+8*nlinks)))
+                if N < nrptsteps:
+                    t = reporttimes[N]
+                    if convergence_error:
+                        logger.error('Simulation did not converge at time ' + self._get_time(t) + '.')
+                        raise RuntimeError('Simulation did not converge at time ' + self._get_time(t) + '.')
+                    else:
+                        data = data[0:N*(4*nnodes+8*nlinks)]
+                        data = np.reshape(data, (N, (4*nnodes+8*nlinks)))
+                        reporttimes = reporttimes[0:N]
+                        warnings.warn('Simulation did not converge at time ' + self._get_time(t) + '.')
+                        self.results.error_code = wntr.sim.results.ResultsStatus.error
+                else:
+                    data = np.reshape(data, (nrptsteps, (4*nnodes+8*nlinks)))
+                    self.results.error_code = None
+
+                df = pd.DataFrame(data.transpose(), index =index, columns = reporttimes)
+                df = df.transpose()
+                self.results.node, self.results.link = self._convert_results(
+                    df, linktype, linknames, reporttimes, darcy_weisbach, convert)
+                if report_hook is not None:
+                    for t in reporttimes:
+                        report_hook(t, {key: value.loc[t] for key, value in self.results.node.items()}, 
+                                    {key: value.loc[t] for key, value in self.results.link.items()})
             
             logger.debug('... read epilog ...')
             # Read the averages and then the number of periods for checks
@@ -847,16 +847,43 @@ class MsxFile(object):
         fout.write("\n")
 
 
-def MsxBinFile(filename, wn, res = None):
+def MsxBinFile(filename, wn, res=None, species=None, nodes=None, links=None):
+    """
+    Read an EPANET-MSX binary output file
+
+    The concentration data is memory-mapped and only the requested species, 
+    nodes, and links are copied into the results.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the MSX binary output file
+    wn : WaterNetworkModel
+        Water network model that the file was generated from
+    res : SimulationResults, optional
+        Results object to add the species results to, by default a new 
+        results object is created
+    species : list of str, optional
+        Names of the species to read, by default all species
+    nodes : list of str, optional
+        Names of the nodes to read, by default all nodes
+    links : list of str, optional
+        Names of the links to read, by default all links
+
+    Returns
+    -------
+    SimulationResults
+        Results object with one DataFrame per species in ``res.node`` and
+        ``res.link``, indexed by time and with one column per element
+    """
     duration = int(wn.options.time.duration)
     if res is None:
         from wntr.sim.results import SimulationResults
         res = SimulationResults()
         res.node = {}
         res.link = {}
+    ftype = np.dtype("=f4")
     with open(filename, "rb") as fin:
-        ftype = "=f4"
-        idlen = 32
         prolog = np.fromfile(fin, dtype=np.int32, count=6)
         magic1 = prolog[0]
         version = prolog[1]
@@ -864,61 +891,62 @@ def MsxBinFile(filename, wn, res = None):
         nlinks = prolog[3]
         nspecies = prolog[4]
         reportstep = prolog[5]
-        species_list = []
-        node_list = wn.node_name_list
-        link_list = wn.link_name_list
-        # print(magic1, version, nnodes, nlinks, nspecies, reportstep)
 
+        species_list = []
         species_mass = []
         for i in range(nspecies):
             species_len = np.fromfile(fin, dtype=np.int32, count=1)[0]
-            # print(species_len)
-            species_name = "".join(chr(f) for f in np.fromfile(fin, dtype=np.uint8, count=species_len) if f != 0)
-            # print(species_name)
-            species_list.append(species_name)
-            species_mass.append("".join(chr(f) for f in np.fromfile(fin, dtype=np.uint8, count=16) if f != 0))
-            
-        timerange = range(0, duration + 1, reportstep)
-
-        tr = len(timerange)
-
-        row1 = ["node"] * nnodes * len(species_list) + ["link"] * nlinks * len(species_list)
-        row2 = []
-        for i in [nnodes, nlinks]:
-            for j in species_list:
-                row2.append([j] * i)
-        row2 = [y for x in row2 for y in x]
-        row3 = [node_list for i in species_list] + [link_list for i in species_list]
-        row3 = [y for x in row3 for y in x]
-
-        tuples = list(zip(row1, row2, row3))
-        index = pd.MultiIndex.from_tuples(tuples, names=["type", "species", "name"])
+            species_list.append(fin.read(species_len).replace(b"\x00", b"").decode("latin-1"))
+            species_mass.append(fin.read(16).replace(b"\x00", b"").decode("latin-1"))
+        data_offset = fin.tell()
 
-        try:
-            data = np.fromfile(fin, dtype=np.dtype(ftype), count=tr * (len(species_list * (nnodes + nlinks))))
-            data = np.reshape(data, (tr, len(species_list * (nnodes + nlinks))))
-        except Exception as e:
-            print(e)
-            print("oops")
+        timerange = range(0, duration + 1, reportstep)
+        ntimes = len(timerange)
+        ncols = nspecies * (nnodes + nlinks)
 
+        fin.seek(data_offset + ntimes * ncols * ftype.itemsize)
         postlog = np.fromfile(fin, dtype=np.int32, count=4)
+
+    if len(postlog) == 4:
         offset = postlog[0]
         numreport = postlog[1]
         errorcode = postlog[2]
         magicnew = postlog[3]
         if errorcode != 0:
-            print(f"ERROR CODE: {errorcode}")
-            print(offset, numreport)
-
-        df_fin = pd.DataFrame(index=index, columns=timerange).transpose()
+            logger.warning("MSX binary file error code %d (offset %d, %d report periods)", errorcode, offset, numreport)
+        data = np.memmap(filename, dtype=ftype, mode="r", offset=data_offset, shape=(ntimes, ncols))
+    else:
+        logger.warning("Unexpected end of MSX binary file")
+        magicnew = None
+        data = None
+    if magic1 != magicnew:
+        logger.warning("MSX binary file magic numbers do not match")
+
+    node_list = wn.node_name_list
+    link_list = wn.link_name_list
+    if species is None:
+        species = species_list
+    if nodes is None:
+        nodes = node_list
+    if links is None:
+        links = link_list
+    # Column positions of the requested elements within each species block
+    node_index = pd.Index(node_list).get_indexer(nodes)
+    link_index = pd.Index(link_list).get_indexer(links)
+    if (node_index < 0).any() or (link_index < 0).any():
+        raise KeyError("Requested nodes or links are not in the water network model")
+    nodes = pd.Index(nodes, name="name")
+    links = pd.Index(links, name="name")
+
+    for name in species:
+        s = species_list.index(name)
         if magic1 == magicnew:
-            # print("Magic# Match")
-            df_fin = pd.DataFrame(data.transpose(), index=index, columns=timerange)
-            df_fin = df_fin.transpose()
-
+            node_data = data[:, s * nnodes + node_index]
+            link_data = data[:, nspecies * nnodes + s * nlinks + link_index]
         else:
-            print("Magic#s do not match!")
-    for species in species_list:
-        res.node[species] = df_fin['node'][species]
-        res.link[species] = df_fin['link'][species]
+            node_data = np.full((ntimes, len(nodes)), np.nan, dtype=ftype)
+            link_data = np.full((ntimes, len(links)), np.nan, dtype=ftype)
+        res.node[name] = pd.DataFrame(node_data, index=timerange, columns=nodes)
+        res.link[name] = pd.DataFrame(link_data, index=timerange, columns=links)
+    del data
     return res
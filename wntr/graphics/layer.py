@@ -101,7 +101,7 @@ def _plot_valve_layer_nx(wn, valve_layer, valve_attribute=None, title=None,
         ax = plt.gca()
 
     # Graph, undirected
-    G = wn.to_graph().to_undirected()
+    G = wn.graph_view().to_undirected()
 
     # Position
     pos = nx.get_node_attributes(G,'pos')
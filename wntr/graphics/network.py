@@ -308,7 +308,7 @@ def _plot_network_nx(wn, node_attribute=None, link_attribute=None, title=None,
         ax = plt.gca()
         
     # Graph
-    G = wn.to_graph()
+    G = wn.graph_view()
     if not directed:
         G = G.to_undirected()
 
@@ -767,7 +767,7 @@ def plot_interactive_network(wn, node_attribute=None, node_attribute_name = 'Val
         raise ImportError('plotly is required')
         
     # Graph
-    G = wn.to_graph()
+    G = wn.graph_view()
     
     # Node attribute
     if node_attribute is not None:
@@ -1001,7 +1001,7 @@ def plot_leaflet_network(wn, node_attribute=None, link_attribute=None,
             link_colors, link_bins  = pd.qcut(link_attribute, len(link_cmap), 
                                               labels=link_cmap, retbins =True)
         
-    G = wn.to_graph()
+    G = wn.graph_view()
     pos = nx.get_node_attributes(G,'pos')
     center = pd.DataFrame(pos).mean(axis=1)
     
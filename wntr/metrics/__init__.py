@@ -5,12 +5,16 @@ compute topographic metrics are included in the wntr.network.graph module.
 """
 from wntr.metrics.topographic import terminal_nodes, bridges, \
     central_point_dominance, spectral_gap, algebraic_connectivity, \
-    critical_ratio_defrag, valve_segments, valve_segment_attributes
+    critical_ratio_defrag, valve_segments, valve_segment_attributes, \
+    valve_failure_impact
 from wntr.metrics.hydraulic import expected_demand, average_expected_demand, \
     water_service_availability, todini_index, modified_resilience_index, \
     tank_capacity, entropy
 from wntr.metrics.water_security import mass_contaminant_consumed, \
     volume_contaminant_consumed, extent_contaminant
 from wntr.metrics.economic import annual_network_cost, annual_ghg_emissions, \
-    pump_power, pump_energy, pump_cost
+    pump_power, pump_energy, pump_cost, PumpCostModel
 from wntr.metrics.misc import query, population, population_impacted
+from wntr.metrics.accumulators import Accumulator, StatisticsAccumulator, \
+    ThresholdDurationAccumulator, WaterServiceAvailabilityAccumulator, \
+    PumpEnergyAccumulator
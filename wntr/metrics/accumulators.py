@@ -0,0 +1,347 @@
+"""
+The wntr.metrics.accumulators module contains metrics that are accumulated
+at each report step of a simulation, so that only reduced statistics (and
+not the full time series) need to be kept for each simulation.
+
+Accumulators are passed to the simulator, for example
+``sim.run_sim(accumulators=[acc])``, and the reduced statistics are
+returned by ``acc.result()`` once the simulation is complete.
+"""
+import numpy as np
+import pandas as pd
+import logging
+
+from wntr.metrics.economic import PumpCostModel
+
+logger = logging.getLogger(__name__)
+
+
+class Accumulator(object):
+    """
+    Base class for metrics accumulated at each report step of a simulation.
+
+    Subclasses define ``update``, which is called by the simulator at each
+    report step with the simulation time (in seconds) and dictionaries of
+    node and link results (pandas Series indexed by element name, keyed by
+    result attribute), and ``result``, which returns the accumulated metric.
+    Results that end before the simulation, such as MSX results stopped by
+    ``msx_stop``, are missing from the dictionaries after their last report
+    step.
+    Accumulators are callable, so they can be used as simulator report hooks.
+    """
+
+    def __call__(self, time, node, link):
+        self.update(time, node, link)
+
+    def update(self, time, node, link):
+        """
+        Update the metric with results at one report step
+
+        Parameters
+        ----------
+        time : int
+            Simulation time in seconds
+        node : dict of pandas Series
+            Node results at this time
+        link : dict of pandas Series
+            Link results at this time
+        """
+        raise NotImplementedError()
+
+    def result(self):
+        """
+        Accumulated metric
+        """
+        raise NotImplementedError()
+
+
+class _TimeWeights(object):
+    """
+    Duration of each report step, the time until the next report step.  The
+    last report step lasts as long as the previous one.
+    """
+
+    def __init__(self):
+        self.time = None
+        self.last_interval = 0
+
+    def advance(self, time):
+        """Duration of the previous report step, set once the next starts"""
+        if self.time is None:
+            interval = 0
+        else:
+            interval = time - self.time
+            self.last_interval = interval
+        self.time = time
+        return interval
+
+
+def _result_values(results, attribute, index):
+    """Values of a result attribute for a list of elements"""
+    values = results[attribute]
+    if index is not None and not values.index.equals(index):
+        values = values.reindex(index)
+    return values.to_numpy(dtype=float)
+
+
+class StatisticsAccumulator(Accumulator):
+    """
+    Minimum, maximum, mean and percentiles of a result attribute over time.
+
+    Percentiles are estimated from a histogram of the values at each element,
+    values outside of the bin edges are counted in the first or last bin.
+    Results that are NaN are ignored.
+
+    Parameters
+    ----------
+    result_type : str
+        'node' or 'link'
+    attribute : str
+        Result attribute, for example 'pressure'
+    elements : list of str, optional
+        Element names, if None, all elements are used
+    percentiles : list of float, optional
+        Percentiles (between 0 and 100)
+    bins : array-like, optional
+        Histogram bin edges, required if percentiles are given
+    """
+
+    def __init__(self, result_type, attribute, elements=None, percentiles=None, bins=None):
+        if result_type not in ['node', 'link']:
+            raise ValueError("result_type must be 'node' or 'link'")
+        if percentiles is not None and bins is None:
+            raise ValueError("bins must be given to estimate percentiles")
+        self.result_type = result_type
+        self.attribute = attribute
+        self.percentiles = percentiles
+        self.bins = None if bins is None else np.asarray(bins, dtype=float)
+        self._index = None if elements is None else pd.Index(elements)
+        self._min = None
+
+    def update(self, time, node, link):
+        results = node if self.result_type == 'node' else link
+        if self.attribute not in results:
+            # For example, MSX results after the simulation was stopped
+            return
+        values = _result_values(results, self.attribute, self._index)
+        if self._index is None:
+            self._index = results[self.attribute].index
+        if self._min is None:
+            n = len(values)
+            self._min = np.full(n, np.nan)
+            self._max = np.full(n, np.nan)
+            self._sum = np.zeros(n)
+            self._count = np.zeros(n, dtype=int)
+            if self.bins is not None:
+                self._histogram = np.zeros((n, len(self.bins) - 1), dtype=np.int32)
+
+        valid = ~np.isnan(values)
+        self._min = np.fmin(self._min, values)
+        self._max = np.fmax(self._max, values)
+        self._sum[valid] += values[valid]
+        self._count += valid
+        if self.bins is not None:
+            bin_index = np.searchsorted(self.bins, values[valid], side='right') - 1
+            bin_index = np.clip(bin_index, 0, len(self.bins) - 2)
+            self._histogram[np.flatnonzero(valid), bin_index] += 1
+
+    def result(self):
+        """
+        Statistics of the result attribute
+
+        Returns
+        -------
+        pandas DataFrame
+            Minimum, maximum, mean and percentiles (index = element names,
+            columns = 'min', 'max', 'mean', and the percentiles, for example
+            '95%')
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._sum/self._count
+        stats = pd.DataFrame({'min': self._min, 'max': self._max, 'mean': mean},
+                             index=self._index)
+        if self.percentiles is not None:
+            for percentile in self.percentiles:
+                stats['{:g}%'.format(percentile)] = self._percentile(percentile)
+        return stats
+
+    def _percentile(self, percentile):
+        """Percentile interpolated within the histogram bins"""
+        cumulative = np.cumsum(self._histogram, axis=1)
+        target = percentile/100*self._count
+        # First bin where the cumulative count reaches the target
+        bin_index = (cumulative < target[:, None]).sum(axis=1)
+        bin_index = np.minimum(bin_index, len(self.bins) - 2)
+        rows = np.arange(len(bin_index))
+        below = cumulative[rows, bin_index] - self._histogram[rows, bin_index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = (target - below)/self._histogram[rows, bin_index]
+        fraction = np.clip(np.nan_to_num(fraction), 0, 1)
+        width = self.bins[bin_index + 1] - self.bins[bin_index]
+        values = self.bins[bin_index] + fraction*width
+        values[self._count == 0] = np.nan
+        return values
+
+
+class ThresholdDurationAccumulator(Accumulator):
+    """
+    Time that a result attribute is above or below a threshold.
+
+    The results at each report step hold until the next report step, and
+    the results at the last report step hold as long as the previous step.
+    For example, for hourly report steps, the duration is the number of
+    report steps that meet the condition times 3600 s.
+
+    Parameters
+    ----------
+    result_type : str
+        'node' or 'link'
+    attribute : str
+        Result attribute, for example 'pressure'
+    threshold : float
+        Threshold value
+    operation : numpy operator, optional
+        Comparison of the results with the threshold, default is np.less
+    elements : list of str, optional
+        Element names, if None, all elements are used
+    """
+
+    def __init__(self, result_type, attribute, threshold, operation=np.less, elements=None):
+        if result_type not in ['node', 'link']:
+            raise ValueError("result_type must be 'node' or 'link'")
+        self.result_type = result_type
+        self.attribute = attribute
+        self.threshold = threshold
+        self.operation = operation
+        self._index = None if elements is None else pd.Index(elements)
+        self._weights = _TimeWeights()
+        self._duration = None
+        self._condition = None
+
+    def update(self, time, node, link):
+        results = node if self.result_type == 'node' else link
+        if self.attribute not in results:
+            return
+        values = _result_values(results, self.attribute, self._index)
+        if self._index is None:
+            self._index = results[self.attribute].index
+        if self._duration is None:
+            self._duration = np.zeros(len(values))
+        interval = self._weights.advance(time)
+        if self._condition is not None:
+            self._duration += interval*self._condition
+        self._condition = self.operation(values, self.threshold)
+
+    def result(self):
+        """
+        Duration that the condition is met
+
+        Returns
+        -------
+        pandas Series
+            Duration in seconds (index = element names)
+        """
+        duration = self._duration + self._weights.last_interval*self._condition
+        return pd.Series(duration, index=self._index)
+
+
+class WaterServiceAvailabilityAccumulator(Accumulator):
+    """
+    Water service availability at junctions, averaged over time.
+
+    Water service availability is the ratio of the total demand to the total
+    expected demand at each junction, see
+    :class:`~wntr.metrics.hydraulic.water_service_availability`.  Both
+    demands are weighted by the duration of each report step.
+
+    Parameters
+    ----------
+    expected_demand : pandas DataFrame
+        Expected demand at each report time (index = times, columns =
+        junction names), which can be computed using
+        :class:`~wntr.metrics.hydraulic.expected_demand` and used for all
+        simulations of the same network
+    """
+
+    def __init__(self, expected_demand):
+        self._index = expected_demand.columns
+        self._times = {time: i for i, time in enumerate(expected_demand.index)}
+        self._expected = expected_demand.to_numpy(dtype=float)
+        self._weights = _TimeWeights()
+        self._demand_total = np.zeros(len(self._index))
+        self._expected_total = np.zeros(len(self._index))
+        self._demand = None
+
+    def update(self, time, node, link):
+        interval = self._weights.advance(time)
+        if self._demand is not None:
+            self._demand_total += interval*self._demand
+            self._expected_total += interval*self._expected[self._row]
+        self._demand = _result_values(node, 'demand', self._index)
+        self._row = self._times[time]
+
+    def result(self):
+        """
+        Water service availability
+
+        Returns
+        -------
+        pandas Series
+            Water service availability (index = junction names)
+        """
+        interval = self._weights.last_interval
+        demand = self._demand_total + interval*self._demand
+        expected = self._expected_total + interval*self._expected[self._row]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            wsa = demand/expected
+        return pd.Series(wsa, index=self._index)
+
+
+class PumpEnergyAccumulator(Accumulator):
+    """
+    Pump energy over the simulation.
+
+    Pump power is computed from the pump flow rate and the head gain across
+    the pump, see :class:`~wntr.metrics.economic.PumpCostModel.power`, and 
+    is weighted by the duration of each report step.
+
+    Parameters
+    ----------
+    wn : wntr WaterNetworkModel
+        Water network model.  The water network model is needed to find the 
+        start and end node of each pump and to define energy efficiency.
+    """
+
+    def __init__(self, wn):
+        self._model = PumpCostModel(wn)
+        self._index = pd.Index(self._model.pumps)
+        self._head_nodes = pd.Index(self._model._start_nodes + self._model._end_nodes)
+        self._weights = _TimeWeights()
+        self._energy = np.zeros(len(self._index))
+        self._max_power = np.full(len(self._index), np.nan)
+        self._power = None
+
+    def update(self, time, node, link):
+        interval = self._weights.advance(time)
+        if self._power is not None:
+            self._energy += interval*self._power
+        flowrate = _result_values(link, 'flowrate', self._index)
+        head = _result_values(node, 'head', self._head_nodes)
+        power = self._model._power_values(flowrate[np.newaxis, np.newaxis], 
+                                          head[np.newaxis, np.newaxis], [time])
+        self._power = power[0, 0]
+        self._max_power = np.fmax(self._max_power, self._power)
+
+    def result(self):
+        """
+        Pump energy and maximum power
+
+        Returns
+        -------
+        pandas DataFrame
+            Pump energy in J and maximum power in W (index = pump names,
+            columns = 'energy', 'max_power')
+        """
+        energy = self._energy + self._weights.last_interval*self._power
+        return pd.DataFrame({'energy': energy, 'max_power': self._max_power},
+                            index=self._index)
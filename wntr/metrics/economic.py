@@ -6,6 +6,7 @@ import numpy as np
 import pandas as pd 
 import logging
 import scipy
+from wntr.metrics.hydraulic import _is_ensemble, _ensemble_chunks, _ensemble_output
 
 logger = logging.getLogger(__name__)
 
@@ -253,9 +254,8 @@ def pump_power(flowrate, head, wn):
     Compute pump power.
     
     The computation uses pump flow rate, node head (used to compute headloss at
-    each pump), and pump efficiency. Pump efficiency is defined in
-    ``wn.options.energy.global_efficiency``. Pump efficiency curves are currently 
-    not supported.
+    each pump), and pump efficiency. Pump efficiency is defined by the pump 
+    efficiency curve, if defined, or by ``wn.options.energy.global_efficiency``.
 
         wn.options.energy.global_efficiency = 75 # This means 75% or 0.75
 
@@ -277,34 +277,7 @@ def pump_power(flowrate, head, wn):
     -------
     A DataFrame that contains pump power in W (index = times, columns = pump names).
     """
-    
-    pumps = wn.pump_name_list
-    time = flowrate.index
-    
-    headloss = pd.DataFrame(data=None, index=time, columns=pumps)
-    for pump_name, pump in wn.pumps():
-        start_node = pump.start_node_name
-        end_node = pump.end_node_name
-        start_head = head.loc[:,start_node]
-        end_head = head.loc[:,end_node]
-        headloss.loc[:,pump_name] = end_head - start_head
-
-    efficiency_dict = {}
-    for pump_name, pump in wn.pumps():
-        if pump.efficiency_curve_name is None:
-            efficiency_dict[pump_name] = [wn.options.energy.global_efficiency/100.0 for i in time]
-        else:
-            raise NotImplementedError('WNTR does not support pump efficiency curves yet.')
-            # TODO: WNTR does not support pump efficiency curves yet
-            # curve = wn.get_curve(pump.efficiency)
-            # x = [point[0] for point in curve.points]
-            # y = [point[1]/100.0 for point in curve.points]
-            # interp = scipy.interpolate.interp1d(x, y, kind='linear')
-            # efficiency_dict[pump_name] = interp(np.array(flowrate.loc[:, pump_name]))
-
-    efficiency = pd.DataFrame(data=efficiency_dict, index=time, columns=pumps)
-
-    power = 1000.0 * 9.81 * headloss * flowrate / efficiency # Watts = J/s
+    power = PumpCostModel(wn).power(flowrate, head) # Watts = J/s
 
     return power
 
@@ -313,9 +286,8 @@ def pump_energy(flowrate, head, wn):
     Compute the pump energy over time.
     
     The computation uses pump flow rate, node head (used to compute headloss at
-    each pump), and pump efficiency. Pump efficiency is defined in
-    ``wn.options.energy.global_efficiency``. Pump efficiency curves are currently 
-    not supported.
+    each pump), and pump efficiency. Pump efficiency is defined by the pump 
+    efficiency curve, if defined, or by ``wn.options.energy.global_efficiency``.
 
         wn.options.energy.global_efficiency = 75 # This means 75% or 0.75
 
@@ -347,8 +319,9 @@ def pump_cost(energy, wn):
     """
     Compute the pump cost over time. 
     
-    Energy cost is defined in ``wn.options.energy.global_price``. Pump energy 
-    price and price patterns are currently not supported. 
+    Energy price is defined by the pump energy price, if defined, or by 
+    ``wn.options.energy.global_price``, and is multiplied by the pump energy 
+    pattern, if defined, or by ``wn.options.energy.global_pattern``.
 
         wn.options.energy.global_price = 3.61e-8  # $/J; equal to $0.13/kW-h
         
@@ -367,32 +340,237 @@ def pump_cost(energy, wn):
     A DataFrame that contains pump cost in $ (index = times, columns = pump names).
     
     """
-    time = energy.index
-    pumps = wn.pump_name_list
-    
-    # TODO: Need to get this unit tested and not just functionally tested
-    if wn.options.energy.demand_charge is not None and wn.options.energy.demand_charge != 0:
-        # Additional energy charge per maximum kilowatt usage
-        raise ValueError('WNTR does not support demand charge yet.')
-        
-    price_dict = {}
-    for pump_name, pump in wn.pumps():
-        if pump.energy_price is None and pump.energy_pattern is None:
-            if wn.options.energy.global_pattern is None:
-                price_dict[pump_name] = [wn.options.energy.global_price for i in time]
-            else:
-                raise NotImplementedError('WNTR does not support price patterns yet.')
-        elif pump.energy_pattern is None:
-            if wn.options.energy.global_pattern is None:
-                price_dict[pump_name] = [pump.energy_price for i in time]
-            else:
-                raise NotImplementedError('WNTR does not support price patterns yet.')
-        else:
-            raise NotImplementedError('WNTR does not support price patterns yet.')
-            
-    price = pd.DataFrame(data=price_dict, index=time, columns=pumps)
+    model = PumpCostModel(wn)
+    model._check_demand_charge()
+    price = model.price(energy.index)
     
     pump_cost = energy * price
     
     return pump_cost
-    
+
+
+class PumpCostModel(object):
+    """
+    Pump power, energy and cost computed for many pumps, times and 
+    simulations at once.
+
+    Pump efficiency curves, energy prices and price patterns are compiled 
+    into arrays when the model is created, so the same model can be used to 
+    evaluate the results of many simulations, for example to price a large 
+    number of pump schedules.  Results can be given for one simulation, as 
+    pandas DataFrames (index = times), or for several simulations, as lists 
+    or dictionaries of DataFrames (one per simulation) or DataFrames indexed 
+    by scenario and time, which are evaluated together in chunks of 
+    chunk_size scenarios.
+
+    Energy price is defined by the pump energy price, if defined, or by 
+    ``wn.options.energy.global_price``, and is multiplied by the pump energy 
+    pattern, if defined, or by ``wn.options.energy.global_pattern``.  A 
+    time-of-use tariff, given as energy prices at each tariff time step, 
+    replaces the prices and patterns defined in the model.
+
+    Parameters
+    ----------
+    wn : wntr WaterNetworkModel
+        Water network model.  The water network model is needed to find the 
+        start and end node of each pump and to define energy efficiency, 
+        prices and patterns.
+
+    tariff : array-like or dict, optional
+        Energy price in $/J at each tariff time step, repeated over time, 
+        used for all pumps, or a dictionary of prices for each pump 
+        (keys = pump names)
+
+    tariff_timestep : int, optional
+        Tariff time step in seconds, if None then value is set to 
+        wn.options.time.pattern_timestep
+
+    tariff_start : int, optional
+        Time of day, in seconds, at which the simulation starts, if None then 
+        value is set to wn.options.time.pattern_start
+    """
+
+    def __init__(self, wn, tariff=None, tariff_timestep=None, tariff_start=None):
+        self.pumps = wn.pump_name_list
+        self._start_nodes = [wn.get_link(name).start_node_name for name in self.pumps]
+        self._end_nodes = [wn.get_link(name).end_node_name for name in self.pumps]
+        self._report_timestep = wn.options.time.report_timestep
+        self._demand_charge = wn.options.energy.demand_charge
+
+        # Efficiency (fraction), curves are given as (pump index, flow, efficiency)
+        self._efficiency = np.full(len(self.pumps), wn.options.energy.global_efficiency/100.0)
+        self._efficiency_curves = []
+        for i, name in enumerate(self.pumps):
+            curve = wn.get_link(name).efficiency_curve
+            if curve is not None:
+                points = np.array(curve.points, dtype=float)
+                self._efficiency_curves.append((i, points[:, 0], points[:, 1]/100.0))
+
+        # Price patterns are given as (pump indices, multipliers)
+        if tariff_timestep is None:
+            tariff_timestep = wn.options.time.pattern_timestep
+        if tariff_start is None:
+            tariff_start = wn.options.time.pattern_start
+        self._price_timestep = tariff_timestep
+        self._price_start = tariff_start
+        self._price = np.ones(len(self.pumps))
+        patterns = {} # pattern key: (multipliers, pump indices)
+        for i, name in enumerate(self.pumps):
+            if tariff is not None:
+                key = name if isinstance(tariff, dict) else None
+                multipliers = tariff[name] if isinstance(tariff, dict) else tariff
+            else:
+                pump = wn.get_link(name)
+                if pump.energy_price is not None:
+                    self._price[i] = pump.energy_price
+                else:
+                    self._price[i] = wn.options.energy.global_price
+                key = pump.energy_pattern
+                if key is None:
+                    key = wn.options.energy.global_pattern
+                if key is None:
+                    continue
+                multipliers = wn.get_pattern(key).multipliers
+            if key not in patterns:
+                patterns[key] = (np.asarray(multipliers, dtype=float), [])
+            patterns[key][1].append(i)
+        self._price_patterns = [(np.array(pumps), multipliers) 
+                                for multipliers, pumps in patterns.values()]
+
+    def price(self, times):
+        """
+        Energy price of each pump
+
+        Parameters
+        ----------
+        times : array-like
+            Simulation times in seconds
+
+        Returns
+        -------
+        A pandas DataFrame that contains energy price in $/J 
+        (index = times, columns = pump names).
+        """
+        return pd.DataFrame(self._price_values(times), index=times, columns=self.pumps)
+
+    def power(self, flowrate, head, chunk_size=None):
+        """
+        Pump power.  Pumps with no flow, or with an efficiency of 0, use no 
+        power.
+
+        Parameters
+        ----------
+        flowrate : pandas DataFrame, list or dict
+            Pump flowrates (index = times, columns = pump names)
+        head : pandas DataFrame, list or dict
+            Node head (index = times, columns = node names)
+        chunk_size : int, optional
+            Number of scenarios computed at once.  If None, the number of 
+            scenarios is chosen to bound memory use.
+
+        Returns
+        -------
+        A DataFrame that contains pump power in W (index = times, or scenario 
+        and time, columns = pump names).
+        """
+        return self._evaluate(flowrate, head, self._power_values, chunk_size)
+
+    def energy(self, flowrate, head, chunk_size=None):
+        """
+        Pump energy, see :class:`~wntr.metrics.economic.PumpCostModel.power` 
+        for parameters
+
+        Returns
+        -------
+        A DataFrame that contains pump energy in J (index = times, or scenario 
+        and time, columns = pump names).
+        """
+        return self._evaluate(flowrate, head, self._energy_values, chunk_size)
+
+    def cost(self, flowrate, head, chunk_size=None):
+        """
+        Pump cost, see :class:`~wntr.metrics.economic.PumpCostModel.power` 
+        for parameters
+
+        Returns
+        -------
+        A DataFrame that contains pump cost in $ (index = times, or scenario 
+        and time, columns = pump names).
+        """
+        self._check_demand_charge()
+        return self._evaluate(flowrate, head, self._cost_values, chunk_size)
+
+    def total_cost(self, flowrate, head, chunk_size=None):
+        """
+        Pump cost summed over time, see 
+        :class:`~wntr.metrics.economic.PumpCostModel.power` for parameters
+
+        Returns
+        -------
+        A pandas Series that contains pump cost in $ (index = pump names), or 
+        for several scenarios, a DataFrame (index = scenarios, columns = pump 
+        names).
+        """
+        self._check_demand_charge()
+        if not _is_ensemble(flowrate):
+            return self.cost(flowrate, head).sum()
+
+        scenarios, times, names, chunks = _ensemble_chunks(
+            [(flowrate, self.pumps), (head, self._start_nodes + self._end_nodes)], 
+            chunk_size)
+        # Missing values are skipped, as in the pandas sum for one scenario
+        total_cost = [np.nansum(self._cost_values(q, h, times), axis=1) for q, h in chunks]
+        return pd.DataFrame(np.concatenate(total_cost), 
+                            index=pd.Index(scenarios, name=names[0]), 
+                            columns=self.pumps)
+
+    def _check_demand_charge(self):
+        if self._demand_charge is not None and self._demand_charge != 0:
+            # Additional energy charge per maximum kilowatt usage
+            raise ValueError('WNTR does not support demand charge yet.')
+
+    def _evaluate(self, flowrate, head, func, chunk_size):
+        """
+        Evaluate func(flowrate, head, times) on 3-D arrays (scenario, time, 
+        pump) of pump flowrate and head at the start and end nodes
+        """
+        if _is_ensemble(flowrate):
+            scenarios, times, names, chunks = _ensemble_chunks(
+                [(flowrate, self.pumps), (head, self._start_nodes + self._end_nodes)], 
+                chunk_size)
+            values = [func(q, h, times) for q, h in chunks]
+            return _ensemble_output(values, scenarios, times, names, self.pumps)
+
+        times = flowrate.index
+        q = flowrate.loc[:, self.pumps].to_numpy(dtype=float)
+        h = head.loc[times, self._start_nodes + self._end_nodes].to_numpy(dtype=float)
+        values = func(q[np.newaxis], h[np.newaxis], times)[0]
+        return pd.DataFrame(values, index=times, columns=self.pumps)
+
+    def _power_values(self, flowrate, head, times):
+        n = len(self.pumps)
+        headloss = head[:, :, n:] - head[:, :, :n]
+        efficiency = np.broadcast_to(self._efficiency, flowrate.shape).copy()
+        for i, flow, eff in self._efficiency_curves:
+            efficiency[:, :, i] = np.interp(flowrate[:, :, i], flow, eff)
+        # Pumps without flow (for example closed pumps, where the efficiency 
+        # curve can be 0) use no power
+        idle = (flowrate == 0) | (efficiency == 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            power = 1000.0 * 9.81 * headloss * flowrate / efficiency # Watts = J/s
+        return np.where(idle, 0.0, power)
+
+    def _energy_values(self, flowrate, head, times):
+        return self._power_values(flowrate, head, times) * self._report_timestep # J = Ws
+
+    def _cost_values(self, flowrate, head, times):
+        return self._energy_values(flowrate, head, times) * self._price_values(times)
+
+    def _price_values(self, times):
+        times = np.asarray(times, dtype=float)
+        price = np.tile(self._price, (len(times), 1))
+        steps = ((times + self._price_start)//self._price_timestep).astype(int)
+        for pumps, multipliers in self._price_patterns:
+            step = steps % len(multipliers)
+            price[:, pumps] *= multipliers[step][:, np.newaxis]
+        return price
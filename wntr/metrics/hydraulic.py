@@ -111,7 +111,7 @@ def _lcm(x,y):
 def _lcml(*list):
   return reduce(_lcm, *list)
 
-def water_service_availability(expected_demand, demand):
+def water_service_availability(expected_demand, demand, chunk_size=None):
     r"""
     Compute water service availability (WSA) at junctions, defined as follows:
         
@@ -147,6 +147,13 @@ def water_service_availability(expected_demand, demand):
         :math:`expected\_demand.sum(axis=1)`
 		
         :math:`demand.sum(axis=1)`
+
+    * To compute water service availability for several scenarios, demand 
+      should be a list or dictionary of pandas DataFrames (one per scenario) 
+      or a pandas DataFrame indexed by scenario and time.  expected_demand 
+      can be a pandas DataFrame (used for all scenarios) or contain one 
+      DataFrame per scenario.  All scenarios are computed together, 
+      in chunks of chunk_size scenarios.
         
     Parameters
     ----------
@@ -156,17 +163,38 @@ def water_service_availability(expected_demand, demand):
     demand : pandas DataFrame or pandas Series (see note above)
         Actual demand (generally from a PDD hydraulic simulation) at junctions
 
+    chunk_size : int, optional
+        Number of scenarios computed at once.  If None, the number of 
+        scenarios is chosen to bound memory use.
+
     Returns
     -------
     A pandas DataFrame or pandas Series that contains water service 
-    availability.
+    availability.  For several scenarios, the DataFrame is indexed by 
+    scenario and time.
     """
+    if _is_ensemble(demand):
+        columns = _ensemble_columns(demand)
+        results = [(demand, columns)]
+        if _is_ensemble(expected_demand):
+            results.append((expected_demand, columns))
+        scenarios, times, names, chunks = _ensemble_chunks(results, chunk_size)
+        if not _is_ensemble(expected_demand):
+            expected = expected_demand.reindex(index=times, columns=columns)
+            expected = expected.to_numpy(dtype=float)
+        wsa = []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for values in chunks:
+                if len(values) == 2:
+                    expected = values[1]
+                wsa.append(values[0]/expected)
+        return _ensemble_output(wsa, scenarios, times, names, columns)
 
     wsa = demand.div(expected_demand) 
     
     return wsa
 
-def todini_index(head, pressure, demand, flowrate, wn, Pstar):
+def todini_index(head, pressure, demand, flowrate, wn, Pstar, chunk_size=None):
     """
     Compute Todini index, equations from :cite:p:`todi00`.
 
@@ -175,6 +203,11 @@ def todini_index(head, pressure, demand, flowrate, wn, Pstar):
     Todini index defines resilience at a specific time as a measure of surplus
     power at each node and measures relative energy redundancy.
 
+    To compute the Todini index for several scenarios, head, pressure, demand 
+    and flowrate can be lists or dictionaries of pandas DataFrames (one per 
+    scenario) or pandas DataFrames indexed by scenario and time.  All 
+    scenarios are computed together, in chunks of chunk_size scenarios.
+
     Parameters
     ----------
     head : pandas DataFrame
@@ -200,10 +233,18 @@ def todini_index(head, pressure, demand, flowrate, wn, Pstar):
     Pstar : float
         Pressure threshold.
 
+    chunk_size : int, optional
+        Number of scenarios computed at once.  If None, the number of 
+        scenarios is chosen to bound memory use.
+
     Returns
     -------
-    A pandas Series that contains a time-series of Todini indexes
+    A pandas Series that contains a time-series of Todini indexes.  For 
+    several scenarios, the Series is indexed by scenario and time.
     """
+    if _is_ensemble(head):
+        return _todini_index_ensemble(head, pressure, demand, flowrate, wn, 
+                                      Pstar, chunk_size)
 
     Pout = demand.loc[:,wn.junction_name_list]*head.loc[:,wn.junction_name_list]
     elevation = head.loc[:,wn.junction_name_list]-pressure.loc[:,wn.junction_name_list]
@@ -226,7 +267,8 @@ def todini_index(head, pressure, demand, flowrate, wn, Pstar):
     
     return todini
 
-def modified_resilience_index(pressure, elevation, Pstar, demand=None, per_junction=True):
+def modified_resilience_index(pressure, elevation, Pstar, demand=None, per_junction=True,
+                              chunk_size=None):
     """
     Compute the modified resilience index, equations from :cite:p:`jasr08`.
 
@@ -235,6 +277,11 @@ def modified_resilience_index(pressure, elevation, Pstar, demand=None, per_junct
     demand junctions. The metric can be computed as a timeseries for each 
     junction or as a system average timeseries.
 
+    To compute the modified resilience index for several scenarios, pressure 
+    and demand can be lists or dictionaries of pandas DataFrames (one per 
+    scenario) or pandas DataFrames indexed by scenario and time.  All 
+    scenarios are computed together, in chunks of chunk_size scenarios.
+
     Parameters
     ----------
     pressure : pandas DataFrame
@@ -255,12 +302,21 @@ def modified_resilience_index(pressure, elevation, Pstar, demand=None, per_junct
     per_junction : bool (optional)
         If True, compute the modified resilience index per junction.
         If False, compute the modified resilience index over all junctions.
+
+    chunk_size : int, optional
+        Number of scenarios computed at once.  If None, the number of 
+        scenarios is chosen to bound memory use.
         
     Returns
     -------
     pandas Series or DataFrame
         Modified resilience index time-series. If per_junction=True, columns=junction names.
+        For several scenarios, the index is scenario and time.
     """
+    if _is_ensemble(pressure):
+        return _modified_resilience_index_ensemble(pressure, elevation, Pstar, 
+                                                   demand, per_junction, chunk_size)
+
     assert isinstance(pressure, pd.DataFrame), "pressure must be a pandas DataFrame"
     assert isinstance(elevation, pd.Series), "elevation must be a pandas Series"
     assert sorted(pressure.columns) == sorted(elevation.index), "The columns in pressure must be the same as the index in elevation"
@@ -282,11 +338,16 @@ def modified_resilience_index(pressure, elevation, Pstar, demand=None, per_junct
     
     return mri
 
-def tank_capacity(pressure, wn):
+def tank_capacity(pressure, wn, chunk_size=None):
     """
     Compute tank capacity, the ratio of water volume stored in tanks to the 
     maximum volume of water that can be stored.
 
+    To compute tank capacity for several scenarios, pressure can be a list or 
+    dictionary of pandas DataFrames (one per scenario) or a pandas DataFrame 
+    indexed by scenario and time.  All scenarios are computed together, in 
+    chunks of chunk_size scenarios.
+
     Parameters
     ----------
     pressure : pandas DataFrame
@@ -296,15 +357,32 @@ def tank_capacity(pressure, wn):
     wn : wntr WaterNetworkModel
         Water network model.  The water network model is needed to 
         get the tank object to compute current and max volume.
+
+    chunk_size : int, optional
+        Number of scenarios computed at once.  If None, the number of 
+        scenarios is chosen to bound memory use.
         
     Returns
     -------
     pandas DataFrame
-        Tank capacity (index = times, columns = tank names)
+        Tank capacity (index = times, columns = tank names).  For several 
+        scenarios, the index is scenario and time.
     """
-    
-    assert isinstance(pressure, pd.DataFrame), "pressure must be a pandas DataFrame"
     assert isinstance(wn, wntr.network.WaterNetworkModel), "wn must be a wntr WaterNetworkModel"
+    if _is_ensemble(pressure):
+        tanks = [wn.get_node(name) for name in wn.tank_name_list]
+        scenarios, times, names, chunks = _ensemble_chunks(
+            [(pressure, wn.tank_name_list)], chunk_size)
+        tank_capacity = []
+        for level, in chunks:
+            capacity = np.empty_like(level)
+            for i, tank in enumerate(tanks):
+                capacity[:, :, i] = tank.get_volume(level[:, :, i])/tank.get_volume(tank.max_level)
+            tank_capacity.append(capacity)
+        return _ensemble_output(tank_capacity, scenarios, times, names, 
+                                wn.tank_name_list)
+
+    assert isinstance(pressure, pd.DataFrame), "pressure must be a pandas DataFrame"
 
     tank_capacity = pd.DataFrame(index=pressure.index, columns=pressure.columns)
     
@@ -316,6 +394,168 @@ def tank_capacity(pressure, wn):
     
     return tank_capacity
     
+def _todini_index_ensemble(head, pressure, demand, flowrate, wn, Pstar, chunk_size):
+    """
+    Todini index for several scenarios
+    """
+    junctions = wn.junction_name_list
+    reservoirs = wn.reservoir_name_list
+    pumps = wn.pump_name_list
+    start_nodes = [wn.get_link(name).start_node_name for name in pumps]
+    end_nodes = [wn.get_link(name).end_node_name for name in pumps]
+    nj, nr, npump = len(junctions), len(reservoirs), len(pumps)
+
+    scenarios, times, names, chunks = _ensemble_chunks(
+        [(head, junctions + reservoirs + start_nodes + end_nodes),
+         (pressure, junctions), (demand, junctions + reservoirs),
+         (flowrate, pumps)], chunk_size)
+    todini = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for h, p, d, q in chunks:
+            hj = h[:, :, :nj]
+            hr = h[:, :, nj:nj+nr]
+            headloss = h[:, :, nj+nr+npump:] - h[:, :, nj+nr:nj+nr+npump]
+            Pout = np.nansum(d[:, :, :nj]*hj, axis=2)
+            Pexp = np.nansum(d[:, :, :nj]*(Pstar + hj - p), axis=2)
+            Pin_res = -np.nansum(d[:, :, nj:]*hr, axis=2)
+            Pin_pump = np.nansum(q*np.abs(headloss), axis=2)
+            todini.append((Pout - Pexp)/(Pin_res + Pin_pump - Pexp))
+
+    return _ensemble_output(todini, scenarios, times, names)
+
+def _modified_resilience_index_ensemble(pressure, elevation, Pstar, demand, 
+                                        per_junction, chunk_size):
+    """
+    Modified resilience index for several scenarios
+    """
+    assert isinstance(elevation, pd.Series), "elevation must be a pandas Series"
+    assert isinstance(Pstar, (float, int)), "Pstar must be a float"
+    assert isinstance(per_junction, bool), "per_junction must be a Boolean"
+    if per_junction == False:
+        assert _is_ensemble(demand), "demand must contain results for each scenario when per_junction=False"
+
+    junctions = list(elevation.index)
+    elevation = elevation.to_numpy(dtype=float)
+    results = [(pressure, junctions)]
+    if not per_junction:
+        results.append((demand, junctions))
+    scenarios, times, names, chunks = _ensemble_chunks(results, chunk_size)
+    mri = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for values in chunks:
+            Pout = values[0] + elevation
+            Pexp = Pstar + elevation
+            if per_junction:
+                mri.append((Pout - Pexp)/Pexp)
+            else:
+                Pout = np.nansum(values[1]*Pout, axis=2)
+                Pexp = np.nansum(values[1]*Pexp, axis=2)
+                mri.append((Pout - Pexp)/Pexp)
+
+    return _ensemble_output(mri, scenarios, times, names, 
+                            junctions if per_junction else None)
+
+# Number of values loaded at once when computing metrics for several scenarios
+_ENSEMBLE_CHUNK_VALUES = 2**24
+
+def _is_ensemble(data):
+    """
+    True if data contains results for several scenarios, as a list or 
+    dictionary of DataFrames or a DataFrame indexed by scenario and time
+    """
+    if isinstance(data, (list, tuple, dict)):
+        return True
+    return isinstance(data, pd.DataFrame) and data.index.nlevels == 2
+
+def _ensemble_frames(data):
+    """
+    Scenario names and a function returning the DataFrame of each scenario 
+    from a list or dictionary of DataFrames
+    """
+    if isinstance(data, dict):
+        return pd.Index(list(data.keys())), data.__getitem__
+    return pd.RangeIndex(len(data)), data.__getitem__
+
+def _ensemble_columns(data):
+    """
+    Element names of results for several scenarios
+    """
+    if isinstance(data, pd.DataFrame):
+        return list(data.columns)
+    scenarios, frame = _ensemble_frames(data)
+    return list(frame(scenarios[0]).columns)
+
+def _ensemble_chunks(results, chunk_size=None):
+    """
+    Split results for several scenarios into chunks of scenarios
+
+    results is a list of (data, columns) pairs.  Returns the scenarios, times 
+    and index level names of the first data, and a generator that yields a 
+    list with a 3-D array (scenario, time, column) for each data.
+    """
+    data = results[0][0]
+    if isinstance(data, pd.DataFrame):
+        scenarios = data.index.unique(level=0)
+        times = data.index.unique(level=1)
+        names = list(data.index.names)
+    else:
+        scenarios, frame = _ensemble_frames(data)
+        times = frame(scenarios[0]).index
+        names = ['scenario', times.name]
+
+    for data, columns in results:
+        missing = pd.Index(columns).difference(_ensemble_columns(data))
+        if len(missing) > 0:
+            raise KeyError('Missing columns: ' + ', '.join(str(name) for name in missing))
+
+    if chunk_size is None:
+        n_values = len(times)*sum(len(columns) for data, columns in results)
+        chunk_size = max(1, _ENSEMBLE_CHUNK_VALUES//max(n_values, 1))
+
+    def chunks():
+        for start in range(0, len(scenarios), chunk_size):
+            chunk = scenarios[start:start+chunk_size]
+            yield [_ensemble_values(data, columns, chunk, times) 
+                   for data, columns in results]
+
+    return scenarios, times, names, chunks()
+
+def _ensemble_values(data, columns, scenarios, times):
+    """
+    3-D array (scenario, time, column) of results for several scenarios
+    """
+    if isinstance(data, pd.DataFrame):
+        rows = pd.MultiIndex.from_product([scenarios, times])
+        values = data.reindex(index=rows, columns=columns).to_numpy(dtype=float)
+    else:
+        frame = _ensemble_frames(data)[1]
+        values = np.stack([_frame_values(frame(name), columns, times) 
+                           for name in scenarios])
+    return values.reshape(len(scenarios), len(times), len(columns))
+
+def _frame_values(frame, columns, times):
+    """
+    2-D array (time, column) of one DataFrame
+    """
+    if frame.index.equals(times):
+        # Select columns from the array, which avoids reindexing the DataFrame
+        column_index = frame.columns.get_indexer(columns)
+        if (column_index >= 0).all():
+            return frame.to_numpy()[:, column_index].astype(float)
+    return frame.reindex(index=times, columns=columns).to_numpy(dtype=float)
+
+def _ensemble_output(values, scenarios, times, names, columns=None):
+    """
+    Series (or DataFrame if columns are given) indexed by scenario and time 
+    from a list of arrays computed for chunks of scenarios
+    """
+    index = pd.MultiIndex.from_product([scenarios, times], names=names)
+    values = np.concatenate(values)
+    if columns is None:
+        return pd.Series(values.reshape(-1), index=index)
+    return pd.DataFrame(values.reshape(-1, len(columns)), index=index, 
+                        columns=columns)
+
 def entropy(G, sources=None, sinks=None):
     """
     Compute entropy, equations from :cite:p:`awgb90`.
@@ -331,6 +571,7 @@ def entropy(G, sources=None, sinks=None):
     G : NetworkX or WNTR graph
         Entropy is computed using a directed graph based on pipe flow direction.
         The 'weight' of each link is equal to the flow rate.
+        Links with zero flow are removed if they form cycles in the graph.
 
     sources : list of strings, optional (default = all reservoirs)
         List of node names to use as sources.
@@ -354,6 +595,186 @@ def entropy(G, sources=None, sinks=None):
     if sinks is None:
         sinks = G.nodes()
 
+    result = _entropy_dag(G, sources, sinks)
+    if result is None:
+        # Cycles can only be formed by links without flow
+        dag = G.copy()
+        dag.remove_edges_from([(u, v, k) for u, v, k, weight in G.edges(keys=True, data='weight')
+                               if weight == 0])
+        result = _entropy_dag(dag, sources, sinks)
+    if result is None:
+        result = _entropy_simple_paths(G, sources, sinks)
+    S, Q = result
+
+    Q0 = sum(nx.get_edge_attributes(G, 'weight').values())
+
+    # Equation 3
+    S_ave = 0
+    for nodej in sinks:
+        if not np.isnan(S[nodej]):
+            if nodej not in sources:
+                if Q[nodej]/Q0 > 0:
+                    S_ave = S_ave + \
+                        (Q[nodej]*S[nodej])/Q0 - \
+                        Q[nodej]/Q0*math.log(Q[nodej]/Q0)
+                        
+    S = pd.Series(S) # convert S to a series
+    
+    return [S, S_ave]
+
+def _entropy_dag(G, sources, sinks):
+    """
+    Compute entropy at each sink and the total flow into each sink on a
+    directed acyclic graph, returns None if the graph has cycles.
+
+    The number of paths through each link and the degree of the links on
+    these paths are computed by dynamic programming in topological order
+    instead of enumerating all simple paths (see _entropy_simple_paths), the
+    result is the same.  For each node pair on the paths to sink j through
+    node i, the degree is the number of these paths that include the pair
+    divided by the number of parallel links between the two nodes.
+
+    P[v] is the number of paths from the sources to node v and B[v] is the sum
+    of the degree of the node pairs on these paths.  R[v] and F[v] are the
+    same for the paths from node v to sink j.  The number of node pairs on the
+    paths from the sources to node v is counted from the set of ancestors of
+    node v, stored as an integer bitmask.  Path counts are Python integers so
+    they do not overflow on large networks.
+    """
+    # Successors and predecessors with the number of parallel links
+    links = dict(G.reverse(copy=False).adjacency())
+    succ = {v: [(w, len(keys)) for w, keys in adj.items()] for v, adj in G.adjacency()}
+    pred = {v: [(u, len(keys)) for u, keys in adj.items()] for v, adj in links.items()}
+    node_type = nx.get_node_attributes(G, 'type')
+
+    # Topological order, generation by generation so that the nodes between
+    # a sink and its predecessors are close in the order
+    order = [v for v in pred if len(pred[v]) == 0]
+    indegree = {v: len(pred[v]) for v in pred}
+    for v in order:
+        for w, m in succ[v]:
+            indegree[w] -= 1
+            if indegree[w] == 0:
+                order.append(w)
+    if len(order) < len(pred):
+        return None # G has cycles
+    position = dict(zip(order, range(len(order))))
+
+    P = dict()
+    B = dict()
+    source_set = set(sources)
+    for v in order:
+        P[v] = int(v in source_set)
+        B[v] = 0
+        for u, m in pred[v]:
+            P[v] += m*P[u]
+            B[v] += m*B[u] + P[u]
+
+    # Number of node pairs on the paths from the sources to each node, the
+    # sum over the ancestors b of the number of predecessors of b on a path
+    # from the sources.  Ancestor bitmasks are released once all successors
+    # have been processed.
+    count = np.array([sum(P[u] > 0 for u, m in pred[v]) if P[v] > 0 else 0 for v in order])
+    masks = [int.from_bytes(np.packbits(count > k, bitorder='little').tobytes(), 'little')
+             for k in range(count.max(initial=0))]
+    E = dict()
+    ancestors = dict()
+    remaining = {v: len(succ[v]) for v in order}
+    for v in order:
+        ancestors[v] = 1 << position[v]
+        for u, m in pred[v]:
+            ancestors[v] |= ancestors[u]
+            remaining[u] -= 1
+            if remaining[u] == 0:
+                del ancestors[u]
+        if P[v] > 0:
+            E[v] = sum((ancestors[v] & mask).bit_count() for mask in masks)
+        if remaining[v] == 0:
+            del ancestors[v]
+
+    S = {}
+    Q = {}
+    for nodej in sinks:
+        if nodej in sources:
+            S[nodej] = 0 # nodej is the source
+            continue
+
+        if node_type[nodej] != 'Junction' or P[nodej] == 0:
+            S[nodej] = np.nan # nodej is not connected to any sources
+            continue
+
+        # Nodes upstream of nodej and downstream of a predecessor of nodej,
+        # these come after the first predecessor in topological order
+        first = min(position[u] for u, m in pred[nodej])
+        upstream = {nodej}
+        stack = [nodej]
+        while stack:
+            for u, m in pred[stack.pop()]:
+                if u not in upstream and position[u] >= first:
+                    upstream.add(u)
+                    stack.append(u)
+        R = {nodej: 1}
+        F = {nodej: 0}
+        for v in sorted(upstream, key=position.__getitem__, reverse=True)[1:]:
+            R[v] = 0
+            F[v] = 0
+            for w, m in succ[v]:
+                if w in upstream:
+                    R[v] += m*R[w]
+                    F[v] += R[w] + m*F[w]
+
+        qij = []
+        aij = []
+        for nodei, m in pred[nodej]:
+            # NDij = number of paths through nodei
+            NDij = P[nodei]*R[nodei]
+            if NDij == 0:
+                continue
+
+            flow = 0
+            for attr in links[nodej][nodei].values():
+                flow = flow + attr['weight']
+            qij.append(flow)
+
+            # Sum and number of the link degrees in the NDij paths
+            sum_dk = B[nodei]*R[nodei] + P[nodei]*F[nodei]
+            num_dk = E[nodei] + _count_pairs(nodei, succ, upstream)
+            aij.append(NDij*num_dk/sum_dk)
+
+        Q[nodej] = sum(qij) # Total flow into node j
+
+        # Equation 7
+        S[nodej] = 0
+        for idx in range(len(qij)):
+            if Q[nodej] != 0 and qij[idx]/Q[nodej] > 0:
+                S[nodej] = S[nodej] - \
+                    qij[idx]/Q[nodej]*math.log(qij[idx]/Q[nodej]) + \
+                    qij[idx]/Q[nodej]*math.log(aij[idx])
+
+    return S, Q
+
+def _count_pairs(node, successors, nodes):
+    """
+    Count the node pairs on the paths from node within a set of nodes
+    """
+    visited = {node}
+    stack = [node]
+    count = 0
+    while stack:
+        for v, m in successors[stack.pop()]:
+            if v in nodes:
+                count += 1
+                if v not in visited:
+                    visited.add(v)
+                    stack.append(v)
+    return count
+
+def _entropy_simple_paths(G, sources, sinks):
+    """
+    Compute entropy at each sink and the total flow into each sink by
+    enumerating all simple paths from the sources to each sink, used when
+    the graph has cycles.
+    """
     S = {}
     Q = {}
     for nodej in sinks:
@@ -420,18 +841,5 @@ def entropy(G, sources=None, sinks=None):
                     qij[idx]/Q[nodej]*math.log(qij[idx]/Q[nodej]) + \
                     qij[idx]/Q[nodej]*math.log(aij[idx])
 
-    Q0 = sum(nx.get_edge_attributes(G, 'weight').values())
+    return S, Q
 
-    # Equation 3
-    S_ave = 0
-    for nodej in sinks:
-        if not np.isnan(S[nodej]):
-            if nodej not in sources:
-                if Q[nodej]/Q0 > 0:
-                    S_ave = S_ave + \
-                        (Q[nodej]*S[nodej])/Q0 - \
-                        Q[nodej]/Q0*math.log(Q[nodej]/Q0)
-                        
-    S = pd.Series(S) # convert S to a series
-    
-    return [S, S_ave]
@@ -8,9 +8,17 @@ import numpy as np
 import pandas as pd
 import logging
 import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from scipy import stats
+from scipy.sparse.linalg import ArpackNoConvergence, eigsh, lobpcg
 
 logger = logging.getLogger(__name__)
 
+# Graphs up to this number of nodes use dense eigenvalue decomposition
+_DENSE_EIGENVALUES_SIZE = 500
+
 def terminal_nodes(G):
     """
     Nodes with degree 1
@@ -53,72 +61,179 @@ def bridges(G):
         
     return bridge_links
 
-def central_point_dominance(G):
+def central_point_dominance(G, k=None, seed=None, processes=1):
     """
     Central point dominance
-    
+
+    Betweenness centrality is computed exactly from shortest paths from all
+    nodes, or estimated from shortest paths from k randomly sampled pivot
+    nodes.  The shortest paths can be computed in parallel by splitting the
+    source nodes across worker processes.
+
     Parameters
     ----------
     G: networkx MultiDiGraph
         Graph
-        
+
+    k: int or None, optional
+        Number of pivot nodes used to estimate betweenness centrality.
+        If None, all nodes are used.
+
+    seed: int or None, optional
+        Random seed used to sample the pivot nodes
+
+    processes: int, optional
+        Number of worker processes
+
     Returns
     -------
     Central point dominance (float)
-    
+
     """
-    uG = G.to_undirected() # uses an undirected graph
-    bet_cen = nx.betweenness_centrality(nx.Graph(uG)) # not implemented for multigraph 
-    bet_cen = list(bet_cen.values())
-    cpd = sum(max(bet_cen) - np.array(bet_cen))/(len(bet_cen)-1)
+    uG = nx.Graph(G.to_undirected()) # uses an undirected simple graph
+    nodes = list(uG.nodes())
+    n = len(nodes)
+    if k is None or k >= n:
+        sources = nodes
+    else:
+        rng = np.random.default_rng(seed)
+        sources = [nodes[i] for i in rng.choice(n, size=k, replace=False)]
+
+    # Partial betweenness sums from each chunk of source nodes
+    if processes > 1:
+        chunks = [sources[i::processes] for i in range(processes)]
+        bet_sum = pd.Series(0.0, index=nodes)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for partial in executor.map(_betweenness_from_sources, repeat(uG),
+                                        chunks):
+                bet_sum = bet_sum + partial
+    else:
+        bet_sum = _betweenness_from_sources(uG, sources)
+
+    # Normalize by the number of node pairs, betweenness from sampled pivots
+    # is scaled by the fraction of sources sampled (excluding the node itself)
+    if n > 2:
+        bet_cen = bet_sum*2/(n-2)
+        if len(sources) == n:
+            bet_cen = bet_cen/(n-1)
+        else:
+            sampled = bet_cen.index.isin(sources)
+            bet_cen[sampled] = bet_cen[sampled]/max(len(sources)-1, 1)
+            bet_cen[~sampled] = bet_cen[~sampled]/len(sources)
+    else:
+        bet_cen = bet_sum
+    bet_cen = bet_cen.values
+    cpd = sum(max(bet_cen) - bet_cen)/(len(bet_cen)-1)
 
     return cpd
 
-def spectral_gap(G):
+def _betweenness_from_sources(G, sources):
+    """
+    Unnormalized betweenness centrality from shortest paths starting at a
+    list of source nodes
+    """
+    bet = nx.betweenness_centrality_subset(G, sources, list(G.nodes()),
+                                           normalized=False)
+    return pd.Series(bet, dtype=float)
+
+def spectral_gap(G, tol=0):
     """
     Spectral gap
-    
+
     Difference in the first and second eigenvalue of the adjacency matrix
-    
+
+    The two largest eigenvalues are computed from the sparse adjacency matrix
+    using ARPACK in shift-invert mode (dense eigenvalue decomposition is used
+    for small graphs).
+
     Parameters
     ----------
     G: networkx MultiDiGraph
         Graph
-        
+
+    tol: float, optional
+        Relative accuracy of the eigenvalues, 0 uses machine precision
+
     Returns
     -------
     Spectral gap (float)
-    
+
     """
     uG = G.to_undirected() # uses an undirected graph
-    eig = nx.adjacency_spectrum(uG)
-    spectral_gap = abs(eig[0] - eig[1])
+    A = nx.to_scipy_sparse_array(uG, dtype=float, format='csc')
+    # Shift above the largest eigenvalue, which is bounded by the largest
+    # absolute row sum
+    bound = max(abs(A).sum(axis=1).max(initial=0), 1)
+    eig = _eigenvalues_near(A, 2, bound*(1 + 1e-6), tol, largest=True)
+    spectral_gap = eig[-1] - eig[-2]
 
-    return spectral_gap.real
+    return spectral_gap
 
-def algebraic_connectivity(G):
+def algebraic_connectivity(G, tol=0):
     """
     Algebraic connectivity
-    
+
     Second smallest eigenvalue of the normalized Laplacian matrix of a network
 
+    The two smallest eigenvalues are computed from the sparse Laplacian matrix
+    using ARPACK in shift-invert mode (dense eigenvalue decomposition is used
+    for small graphs).  The algebraic connectivity of a disconnected graph
+    is 0.
+
     Parameters
     ----------
     G: networkx MultiDiGraph
         Graph
-        
+
+    tol: float, optional
+        Relative accuracy of the eigenvalues, 0 uses machine precision
+
     Returns
     -------
     Algebraic connectivity (float)
-    
+
     """
     uG = G.to_undirected() # uses an undirected graph
-    eig = nx.laplacian_spectrum(uG)
-    eig = np.sort(eig)
+    if not nx.is_connected(uG):
+        return 0.0 # the Laplacian has a zero eigenvalue for each component
+    L = nx.laplacian_matrix(uG).astype(float).tocsc()
+    # Shift below the smallest eigenvalue, which is 0 if the weights are not
+    # negative and is otherwise bounded by the largest absolute row sum
+    bound = max(abs(L).sum(axis=1).max(initial=0), 1)
+    off_diagonal = L.copy()
+    off_diagonal.setdiag(0)
+    if off_diagonal.max() <= 0:
+        sigma = -bound*1e-6
+    else:
+        sigma = -bound*(1 + 1e-6)
+    eig = _eigenvalues_near(L, 2, sigma, tol, largest=False)
     alg_con = eig[1]
 
     return alg_con
 
+def _eigenvalues_near(M, k, sigma, tol, largest):
+    """
+    Eigenvalues of a sparse symmetric matrix, in ascending order
+
+    Returns the k eigenvalues nearest to sigma, which is chosen outside of
+    the spectrum so that these are the k largest or smallest eigenvalues.
+    If ARPACK does not converge, LOBPCG is used.  All eigenvalues are
+    returned for small matrices.
+    """
+    n = M.shape[0]
+    if n <= _DENSE_EIGENVALUES_SIZE:
+        return np.linalg.eigvalsh(M.toarray())
+    try:
+        eig = eigsh(M, k=k, sigma=sigma, which='LM', tol=tol,
+                    return_eigenvectors=False)
+    except ArpackNoConvergence:
+        logger.warning('ARPACK did not converge, using LOBPCG')
+        X = np.random.default_rng(0).random((n, k))
+        eig = lobpcg(M, X, tol=tol if tol > 0 else None, maxiter=10*n,
+                     largest=largest)[0]
+
+    return np.sort(eig)
+
 def critical_ratio_defrag(G):
     """
     Critical ratio of defragmentation
@@ -140,10 +255,20 @@ def critical_ratio_defrag(G):
     return fc
 
 
-def _links_in_simple_paths(G, sources, sinks):
+def _links_in_simple_paths(G, sources, sinks, method=None, processes=1,
+                           n_samples=1000, confidence=0.95, seed=None):
     """
     Count all links in a simple path between sources and sinks
 
+    The number of paths can be counted by enumerating all simple paths
+    (method='enumerate'), which is only feasible for small networks since the
+    number of paths grows exponentially with the number of loops.  If the
+    graph is a directed acyclic graph, for example a graph directed by flow
+    (see :class:`~wntr.network.model.WaterNetworkModel.to_graph`), the number
+    of paths is counted exactly by dynamic programming (method='dag').
+    Otherwise, the number of paths can be estimated by sampling random simple
+    paths (method='sample').
+
     Parameters
     -----------
     G: networkx MultiDiGraph
@@ -152,11 +277,55 @@ def _links_in_simple_paths(G, sources, sinks):
         List of source nodes
     sinks: list
         List of sink nodes
+    method: str, optional
+        'enumerate', 'dag' or 'sample'.  If None, 'dag' is used if G is
+        acyclic, otherwise 'enumerate'.
+    processes: int, optional
+        Number of worker processes used to enumerate the paths to each sink
+        (method='enumerate')
+    n_samples: int, optional
+        Number of random paths sampled from each source (method='sample')
+    confidence: float, optional
+        Confidence level of the interval (method='sample')
+    seed: int or None, optional
+        Random seed (method='sample')
 
     Returns
     -------
-    Dictionary with the number of times each link is involved in a path
-    
+    Dictionary with the number of times each link is involved in a path.
+    If method='sample', a pandas DataFrame with the estimated number of paths
+    ('count') and the lower and upper bounds of the confidence interval
+    ('lower' and 'upper') for each link.
+
+    """
+    if method is None:
+        method = 'dag' if nx.is_directed_acyclic_graph(G) else 'enumerate'
+
+    if method == 'dag':
+        return _links_in_dag_paths(G, sources, sinks)
+    elif method == 'sample':
+        return _links_in_sampled_paths(G, sources, sinks, n_samples, confidence, seed)
+    elif method != 'enumerate':
+        raise ValueError("method must be 'enumerate', 'dag' or 'sample'")
+
+    link_names = [name for (node1, node2, name) in list(G.edges(keys=True))]
+    link_count = pd.Series(data = 0, index=link_names)
+
+    if processes > 1:
+        sinks = list(sinks)
+        chunks = [sinks[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for counts in executor.map(_links_in_simple_paths_to_sinks, repeat(G),
+                                       repeat(sources), chunks):
+                link_count = link_count + counts
+        return link_count
+
+    return link_count + _links_in_simple_paths_to_sinks(G, sources, sinks)
+
+def _links_in_simple_paths_to_sinks(G, sources, sinks):
+    """
+    Count all links in a simple path between sources and a list of sinks by
+    enumerating the paths
     """
     link_names = [name for (node1, node2, name) in list(G.edges(keys=True))]
     link_count = pd.Series(data = 0, index=link_names)
@@ -173,6 +342,104 @@ def _links_in_simple_paths(G, sources, sinks):
 
     return link_count
 
+def _links_in_dag_paths(G, sources, sinks):
+    """
+    Count all links in a simple path between sources and sinks in a directed
+    acyclic graph
+
+    The number of paths through a link from node a to node b is the number of
+    paths from the sources to node a, times the number of links from node a
+    to node b, times the number of paths from node b to the sinks.  Path
+    counts are Python integers so they do not overflow on large networks.
+    """
+    if not nx.is_directed_acyclic_graph(G):
+        raise ValueError("G has cycles, use method='enumerate' or 'sample'")
+
+    order = list(nx.topological_sort(G))
+    source_count = Counter(sources)
+    sink_count = Counter(sinks)
+    # Number of paths from the sources to each node and from each node to the
+    # sinks, counting parallel links
+    upstream = dict()
+    for v in order:
+        upstream[v] = source_count[v] + \
+            sum(len(keys)*upstream[u] for u, keys in G.pred[v].items())
+    downstream = dict()
+    for v in reversed(order):
+        downstream[v] = sink_count[v] + \
+            sum(len(keys)*downstream[w] for w, keys in G.succ[v].items())
+
+    link_names = []
+    counts = []
+    for node1, node2, name in G.edges(keys=True):
+        link_names.append(name)
+        counts.append(upstream[node1]*len(G[node1][node2])*downstream[node2])
+
+    return pd.Series(data=counts, index=link_names)
+
+def _links_in_sampled_paths(G, sources, sinks, n_samples, confidence, seed):
+    """
+    Estimate the number of times each link is involved in a simple path
+    between sources and sinks
+
+    From each source, random simple paths are sampled by a walk that follows
+    a random link to an unvisited node until there is none.  Each path from
+    the source to a sink along the walk is weighted by the inverse of its
+    probability, the product of the number of links to unvisited nodes along
+    the path.  The weighted count is an unbiased estimate of the number of
+    paths (Knuth, 1975, Estimating the efficiency of backtrack programs).
+    The confidence interval uses the normal
+    approximation of the sample mean.
+    """
+    rng = np.random.default_rng(seed)
+    link_names = [name for (node1, node2, name) in G.edges(keys=True)]
+    link_index = dict(zip(link_names, range(len(link_names))))
+    sink_count = Counter(sinks)
+
+    estimate = np.zeros(len(link_names))
+    variance = np.zeros(len(link_names))
+    for source in sources:
+        total = np.zeros(len(link_names))
+        total_sq = np.zeros(len(link_names))
+        for sample in range(n_samples):
+            node = source
+            visited = {source}
+            weight = 1.0
+            path = [] # links between consecutive nodes of the walk
+            hits = [] # weighted number of paths that end at each node
+            while True:
+                choices = [(w, keys) for w, keys in G.succ[node].items() if w not in visited]
+                n_links = sum(len(keys) for w, keys in choices)
+                if n_links == 0:
+                    break
+                r = rng.integers(n_links)
+                for w, keys in choices:
+                    if r < len(keys):
+                        break
+                    r -= len(keys)
+                weight = weight*n_links
+                path.append([link_index[k] for k in keys])
+                hits.append(weight*sink_count[w])
+                node = w
+                visited.add(w)
+            # The links at each step are in all paths that end further along
+            # the walk
+            paths = np.cumsum(hits[::-1])[::-1]
+            for links, x in zip(path, paths):
+                total[links] += x
+                total_sq[links] += x**2
+        mean = total/n_samples
+        estimate += mean
+        if n_samples > 1:
+            variance += (total_sq - n_samples*mean**2)/(n_samples - 1)/n_samples
+
+    error = stats.norm.ppf(0.5 + confidence/2)*np.sqrt(np.maximum(variance, 0))
+    link_count = pd.DataFrame({'count': estimate,
+                               'lower': np.maximum(estimate - error, 0),
+                               'upper': estimate + error}, index=link_names)
+
+    return link_count
+
 def valve_segments(G, valve_layer):
     """
     Valve segmentation
@@ -203,100 +470,95 @@ def valve_segments(G, valve_layer):
         valve_layer.drop_duplicates(inplace = True)
         warnings.warn('One or more valves were duplicated in `valve_layer`; duplicates are ignored.', stacklevel=0)
 
-    # Convert the graph to an undirected graph
-    uG = G.to_undirected()
-
-    # Node and link names
-    # Append N_ and L_ to node and link names to account for naming overlap
-    node_names = ['N_'+n for n in uG.nodes()]
-    link_names = ['L_'+k for u,v,k in uG.edges(keys=True)]
-    all_names = node_names + link_names
+    # Undirected links, in the same order as G.to_undirected().edges(keys=True)
+    adjacency = {node: dict() for node in G}
+    for u, v, k in G.edges(keys=True):
+        adjacency[u].setdefault(v, dict())[k] = None
+        adjacency[v].setdefault(u, dict())[k] = None
+    edges = []
+    seen = set()
+    for u, nbrs in adjacency.items():
+        for v, keys in nbrs.items():
+            if v not in seen:
+                edges.extend((u, v, k) for k in keys)
+        seen.add(u)
+
+    # Integer node and link indices
+    node_names = list(adjacency)
+    node_index = dict(zip(node_names, range(len(node_names))))
+    link_names = [k for u,v,k in edges]
+    start_node = np.array([node_index[u] for u,v,k in edges], dtype=int)
+    end_node = np.array([node_index[v] for u,v,k in edges], dtype=int)
+
+    # Valves on each link and at each node
+    valve_nodes = valve_layer['node'].to_numpy()
+    valve_links = valve_layer['link'].to_numpy()
+    link_valves = {link_name: valve_nodes[i].tolist() for link_name, i in
+                   valve_layer.groupby('link', sort=False).indices.items()}
+    node_valves = {node_name: valve_links[i].tolist() for node_name, i in
+                   valve_layer.groupby('node', sort=False).indices.items()}
 
     # Initialization for labelling
     seg_index = 0
-    seg_label = np.zeros(shape=(len(all_names)), dtype=int)
+    node_label = np.zeros(len(node_names), dtype=int)
+    link_label = np.zeros(len(link_names), dtype=int)
 
     # Find and label links isolated by valves, EG 0|----|0
-    for start_node, end_node, link_name in uG.edges(keys=True):
-        link_valves = valve_layer[valve_layer['link']==link_name]
-        if set(link_valves['node']) >= set([start_node, end_node]):
+    for i, (start_node_name, end_node_name, link_name) in enumerate(edges):
+        if set(link_valves.get(link_name, [])) >= set([start_node_name, end_node_name]):
             seg_index += 1
-            seg_label[all_names.index('L_'+link_name)] = seg_index
-
-    # Find and label nodes isolated by valves, EG 0----|0|----0
-    for node_name in node_names:
-        node_valves = valve_layer[valve_layer['node']==node_name]
-        node_links = [k for u,v,k in uG.edges(node_name[2:], keys=True)]
-        if set(node_valves['link']) >= set(node_links):
+            link_label[i] = seg_index
+
+    # Nodes isolated by valves, EG 0----|0|----0, are labelled by the
+    # connected components below.  Valves at each node are looked up by the
+    # prefixed name 'N_' + node name, so in practice only nodes without links
+    # take a segment number here.  This keeps the segment numbers unchanged.
+    for node_name, nbrs in adjacency.items():
+        node_links = set().union(*nbrs.values())
+        if set(node_valves.get('N_'+node_name, [])) >= node_links:
             seg_index += 1
-            seg_label[all_names.index(node_name)] = seg_index
-    
-    # Collect valved link names
-    valved_link_names = list(valve_layer['link'].unique()) 
-
-    # Remove valved edges from G
-    valved_edges = []
-    for edge in uG.edges:
-        link_name = edge[2]
-        if link_name in valved_link_names:
-            valved_edges.append(edge)
-    uG.remove_edges_from(valved_edges)
-
-    ## Label unvalved portion of graph using connected components
-
-    # Assign labels to nodes
-    for component in nx.connected_components(uG):
-        # component is a set of node names
-        seg_index += 1
-        for node in component:
-            index = all_names.index('N_'+node)
-            seg_label[index] = seg_index
+
+    ## Label unvalved portion of graph using a disjoint-set union of the
+    ## nodes connected by links without valves, segments are numbered in
+    ## the order of their first node
+    valved = np.array([link_name in link_valves for link_name in link_names], dtype=bool)
+    parent = list(range(len(node_names)))
+    for node1, node2 in zip(start_node[~valved].tolist(), end_node[~valved].tolist()):
+        root1 = _find_root(parent, node1)
+        root2 = _find_root(parent, node2)
+        if root1 != root2:
+            parent[max(root1, root2)] = min(root1, root2)
+    roots = np.array([_find_root(parent, node) for node in range(len(node_names))], dtype=int)
+    # The root is the first node of each segment
+    component_roots, component = np.unique(roots, return_inverse=True)
+    node_label[:] = seg_index + 1 + component
+    seg_index += len(component_roots)
 
     # Assign labels to links based on labelling of their nodes
-    for edge in uG.edges(keys=True):
-        node1, node2, link_name = edge
-        node1 = all_names.index('N_'+node1)
-        link_index = all_names.index('L_'+link_name)
-        seg_label[link_index] = seg_label[node1]
+    link_label[~valved] = node_label[start_node[~valved]]
 
     ## Label valved portion of graph
-    for valved_edge in valved_edges:
-        node1_name, node2_name, link_name = valved_edge
-        link_valves = valve_layer[valve_layer['link']==link_name]
-        link_index = all_names.index('L_'+link_name)
+    for i in np.flatnonzero(valved):
+        node1_name, node2_name, link_name = edges[i]
+        link_valve_nodes = link_valves[link_name]
 
         # When link only has one valved node, locate unvalved node
         # and label link and unvalved node together
-        if link_valves.shape[0] == 1:
+        if len(link_valve_nodes) == 1:
             both_node_names = [node1_name, node2_name]
-            valved_node_name = link_valves.iloc[0]['node']
-            both_node_names.remove(valved_node_name)
+            both_node_names.remove(link_valve_nodes[0])
             unvalved_node_name = both_node_names[0]
-            unvalved_node_index = all_names.index('N_'+unvalved_node_name)
-            if seg_label[unvalved_node_index] == 0:
-                seg_index += 1
-                seg_label[unvalved_node_index] = seg_index
-                seg_label[link_index] = seg_index
-            else:
-                seg_label[link_index] = seg_label[unvalved_node_index]
-
-        # Links with link_valves.size == 2 are already labelled (isolated link)
-        elif link_valves.shape[0] == 2:
+            link_label[i] = node_label[node_index[unvalved_node_name]]
+
+        # Links with two valves are already labelled (isolated link)
+        elif len(link_valve_nodes) == 2:
             continue
         else:
             raise Exception("Each link should have a maximum of two valves.")
 
-
     # Finalize results
-    seg_labels_index = all_names
-    seg_label = pd.Series(seg_label, index=seg_labels_index, dtype=int)
-
-    node_segments = seg_label[node_names]
-    link_segments = seg_label[link_names]
-
-    # Remove "N_" and "L_" from nodes and links
-    node_segments.index = node_segments.index.str[2::]
-    link_segments.index = link_segments.index.str[2::]
+    node_segments = pd.Series(node_label, index=node_names, dtype=int)
+    link_segments = pd.Series(link_label, index=link_names, dtype=int)
 
     # Extract segment sizes, for nodes and links
     seg_link_sizes = link_segments.value_counts().rename('link')
@@ -306,6 +568,15 @@ def valve_segments(G, valve_layer):
 
     return node_segments, link_segments, seg_sizes
 
+def _find_root(parent, node):
+    """
+    Root of a node in a disjoint-set forest, with path halving
+    """
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
 
 def valve_segment_attributes(valve_layer, node_segments, link_segments, 
                              demand=None, length=None):
@@ -364,138 +635,216 @@ def valve_segment_attributes(valve_layer, node_segments, link_segments,
                                            
     return valve_attr
 
+def valve_failure_impact(valve_layer, node_segments, link_segments,
+                         demand=None, length=None, pairs=False):
+    """
+    Impact of valves that fail to close.
+
+    If a valve fails to close, the segments on the node side and link side of
+    the valve merge into one segment that can only be isolated as a whole.
+    All valves are evaluated at once from the segment of each valve and the
+    size of each segment, without recomputing the segmentation.  Optionally,
+    failures of two valves that surround a common segment (which merge up to
+    three segments) are also evaluated.  Failures of two valves that do not
+    surround a common segment merge segments independently.
+
+    Parameters
+    ----------
+    valve_layer: pandas DataFrame
+        Valve layer, defined by node and link pairs (for example, valve 0 is
+        on link A and protects node B). The valve_layer DataFrame is indexed by
+        valve number, with columns named 'node' and 'link'.
+
+    node_segments: pandas Series
+       Segment number for each node, indexed by node name.
+       node_segments can be computed using `wntr.metrics.topographic.valve_segments`
+
+    link_segments: pandas Series
+        Segment number for each link, indexed by link name.
+        link_segments can be computed using `wntr.metrics.topographic.valve_segments`
+
+    demand: pandas Series, optional
+        Node demand, the average expected node demand can be computed using
+        wntr.metrics.average_expected_demand(wn).
+
+    length: pandas Series, optional
+        Link length, the output from wn.query_link_attribute('length')
+
+    pairs: bool, optional
+        If True, failures of pairs of valves that surround a common segment
+        are evaluated instead of single valve failures
+
+    Returns
+    -------
+    pandas DataFrame
+        Valve failure impact, indexed by valve number (or by valve pair,
+        'valve1' and 'valve2', if pairs is True), that contains:
+
+       * num_segments: number of segments that merge
+       * num_nodes: number of nodes in the merged segment
+       * num_links: number of links in the merged segment
+       * demand: demand in the merged segment
+       * demand_increase: increase in demand over the largest segment that merges
+       * length: pipe length in the merged segment
+       * length_increase: increase in length over the largest segment that merges
+    """
+    (node_seg, link_seg, valve_node_seg, valve_link_seg,
+     node_codes, link_codes, segments) = _valve_segment_codes(valve_layer,
+                                             node_segments, link_segments)
+    n_segments = len(segments)
+
+    if pairs:
+        # Valves on the boundary of each segment
+        valves = np.arange(len(node_seg))
+        boundary = pd.DataFrame({'segment': np.concatenate([node_seg, link_seg]),
+                                 'valve': np.concatenate([valves, valves])})
+        boundary = boundary.drop_duplicates()
+        valve_pairs = boundary.merge(boundary, on='segment')
+        valve_pairs = valve_pairs[valve_pairs['valve_x'] < valve_pairs['valve_y']]
+        valve_pairs = valve_pairs[['valve_x', 'valve_y']].drop_duplicates()
+        valve_pairs = valve_pairs.sort_values(['valve_x', 'valve_y'])
+        valve1 = valve_pairs['valve_x'].to_numpy()
+        valve2 = valve_pairs['valve_y'].to_numpy()
+        merged = np.stack([node_seg[valve1], link_seg[valve1],
+                           node_seg[valve2], link_seg[valve2]], axis=1)
+        index = pd.MultiIndex.from_arrays([valve1, valve2], names=['valve1', 'valve2'])
+        impact = pd.DataFrame(index=index)
+    else:
+        merged = np.stack([node_seg, link_seg], axis=1)
+        impact = pd.DataFrame({'node_segment': segments[node_seg],
+                               'link_segment': segments[link_seg]})
+
+    # Each segment is counted once in a merged segment
+    merged = np.sort(merged, axis=1)
+    unique = np.ones(merged.shape, dtype=bool)
+    unique[:,1:] = merged[:,1:] != merged[:,:-1]
+
+    def merged_total(totals):
+        return (totals[merged]*unique).sum(axis=1)
+
+    impact['num_segments'] = unique.sum(axis=1)
+    impact['num_nodes'] = merged_total(np.bincount(node_codes, minlength=n_segments))
+    impact['num_links'] = merged_total(np.bincount(link_codes, minlength=n_segments))
+
+    for name, values, index, codes in [('demand', demand, node_segments.index, node_codes),
+                                       ('length', length, link_segments.index, link_codes)]:
+        if values is None:
+            continue
+        values = values.reindex(index).fillna(0).to_numpy(dtype=float)
+        totals = np.bincount(codes, weights=values, minlength=n_segments)
+        impact[name] = merged_total(totals)
+        impact[name+'_increase'] = impact[name] - totals[merged].max(axis=1)
+
+    return impact
+
+def _valve_segment_codes(valve_layer, node_segments, link_segments):
+    """
+    Integer codes of the node-side and link-side segment of each valve
+
+    Returns the node-side and link-side segment codes of valves 0 to n-1, the
+    segment codes of the node and link of every valve in the valve layer (-1
+    if the node or link has no segment), the segment codes of the nodes and
+    links, and the segment number of each code.
+    """
+    codes, segments = pd.factorize(np.concatenate([node_segments.to_numpy(),
+                                                   link_segments.to_numpy()]))
+    node_codes = codes[:len(node_segments)]
+    link_codes = codes[len(node_segments):]
+
+    # Segments of the node and link of each valve in the valve layer
+    node_index = node_segments.index.get_indexer(valve_layer['node'])
+    link_index = link_segments.index.get_indexer(valve_layer['link'])
+    valve_node_seg = np.where(node_index >= 0, node_codes[node_index], -1)
+    valve_link_seg = np.where(link_index >= 0, link_codes[link_index], -1)
+
+    # Valves are numbered 0 to n-1
+    valves = valve_layer.index.get_indexer(range(len(valve_layer)))
+    if (valves < 0).any():
+        raise KeyError("The valve_layer DataFrame must be indexed by valve number 0 to n-1")
+    node_seg = valve_node_seg[valves]
+    link_seg = valve_link_seg[valves]
+    if (node_seg < 0).any() or (link_seg < 0).any():
+        missing = valve_layer.iloc[valves[(node_seg < 0) | (link_seg < 0)]]
+        raise KeyError("Valve nodes or links without a segment: {}".format(
+            list(missing.index)))
+
+    return node_seg, link_seg, valve_node_seg, valve_link_seg, \
+        node_codes, link_codes, segments
+
+def _segment_increase(totals, node_seg, link_seg):
+    """
+    Increase in the segment total if each valve is removed, expressed as a
+    fraction of the largest of the node-side and link-side segment totals
+    """
+    T_node = totals[node_seg]
+    T_link = totals[link_seg]
+    T_max = np.maximum(T_node, T_link)
+    VC = np.zeros(len(node_seg))
+    mask = (node_seg != link_seg) & ~((T_node == 0) & (T_link == 0))
+    VC[mask] = (T_link[mask] + T_node[mask]) / T_max[mask] - 1
+
+    return pd.Series(VC)
+
 def _valve_criticality(valve_layer, node_segments, link_segments):
     """
 	Returns the number of valves surrounding each valve
-	
+
+    The valves surrounding a valve are the valves on a link or node in the
+    node-side or link-side segment of the valve.  These are counted from
+    the number of valves on links and nodes in each segment, minus the
+    number of valves with both the link and node in these segments.
     """
-    # Assess the number of valves in the system
-    n_valves = len(valve_layer)   
-
-    # Calculate valve-based valve criticality
-    VC = {}
-    for i in range(n_valves):
-        # identify the node-side and link-side segments
-        node_seg = node_segments[valve_layer.loc[i,'node']]
-        link_seg = link_segments[valve_layer.loc[i,'link']] 
-        # if the node and link are in the same segment, set criticality to 0
-        if node_seg == link_seg:
-            VC_val_i = 0 
-        else:
-            V_list = []
-            # identify links and nodes in surrounding segments
-            links_in_segs = link_segments[(link_segments == link_seg) | (link_segments == node_seg)].index
-            nodes_in_segs = node_segments[(node_segments == link_seg) | (node_segments == node_seg)].index
-            # add unique valves to the V_list from the link list
-            for link in links_in_segs:
-                valves = valve_layer[valve_layer['link'] == link].index
-                if len(valves) == 0:
-                    pass
-                else:
-                    for valve in valves:
-                        if valve in V_list:
-                            pass
-                        else:
-                            V_list.append(valve)
-            # add unique valves to the V_list from the node list
-            for node in nodes_in_segs:
-                valves = valve_layer[valve_layer['node'] == node].index
-                if len(valves) == 0:
-                    pass
-                else:
-                    for valve in valves:
-                        if valve in V_list:
-                            pass
-                        else:
-                            V_list.append(valve)
-            # calculate valve-based criticality for the valve
-            # count the number of valves in the list, minus the valve in question
-            VC_val_i = len(V_list) - 1
-
-        VC[i] = VC_val_i
-    
-    VC = pd.Series(VC)
-    
-    return VC
+    (node_seg, link_seg, valve_node_seg, valve_link_seg,
+     node_codes, link_codes, segments) = _valve_segment_codes(valve_layer,
+                                             node_segments, link_segments)
+    n_segments = len(segments)
+
+    # Number of valves on a link in each segment and at a node in each segment
+    link_count = np.bincount(valve_link_seg[valve_link_seg >= 0], minlength=n_segments)
+    node_count = np.bincount(valve_node_seg[valve_node_seg >= 0], minlength=n_segments)
+    # Number of valves with the link and node in each pair of segments
+    pair_count = pd.DataFrame({'link': valve_link_seg, 'node': valve_node_seg}
+                              ).groupby(['link', 'node']).size()
+
+    count = link_count[node_seg] + link_count[link_seg] + \
+        node_count[node_seg] + node_count[link_seg]
+    for seg1, seg2 in [(node_seg, node_seg), (node_seg, link_seg),
+                       (link_seg, node_seg), (link_seg, link_seg)]:
+        pairs = pd.MultiIndex.from_arrays([seg1, seg2])
+        count = count - pair_count.reindex(pairs, fill_value=0).to_numpy()
+
+    # count the number of valves, minus the valve in question.  If the node
+    # and link are in the same segment, set criticality to 0
+    VC = np.where(node_seg == link_seg, 0, count - 1)
+
+    return pd.Series(VC)
 
 def _valve_criticality_length(link_lengths, valve_layer, node_segments, link_segments):
     """
 	Returns the ratio of the segment lengths on either side of the valve
     """
-    # Assess the number of valves in the system
-    n_valves = len(valve_layer)   
+    (node_seg, link_seg, valve_node_seg, valve_link_seg,
+     node_codes, link_codes, segments) = _valve_segment_codes(valve_layer,
+                                             node_segments, link_segments)
+    n_segments = len(segments)
 
-    # Calculate the length-based valve crticiality
-    VC = {}
-    
-    for i in range(n_valves):
-		# identify the node-side and link-side segments
-        node_seg = node_segments[valve_layer.loc[i,'node']]
-        link_seg = link_segments[valve_layer.loc[i,'link']]
-        
-        # if the node and link are in the same segment, set criticality to 0
-        if node_seg == link_seg:
-            VC_len_i = 0
-        else:
-            # calculate total length of links in the node segment
-            links_in_node_seg = link_segments[link_segments == node_seg].index
-            n_ixs = link_lengths.index.intersection(links_in_node_seg)
-            L_node = link_lengths[n_ixs].sum()
-
-            # calculate total length of links in the link segment
-            links_in_link_seg = link_segments[link_segments == link_seg].index
-            l_ixs = link_lengths.index.intersection(links_in_link_seg)
-            L_link = link_lengths[l_ixs].sum()
-
-            # calculate link length criticality for the valve
-            if L_node == 0 and L_link == 0:
-                VC_len_i = 0.0
-            else:
-                VC_len_i = (L_link + L_node) / max(L_link, L_node) - 1
-
-        VC[i] = VC_len_i
-    
-    VC = pd.Series(VC)
-    
-    return VC
+    # Total length of links in each segment
+    lengths = link_lengths.reindex(link_segments.index).fillna(0).to_numpy(dtype=float)
+    L = np.bincount(link_codes, weights=lengths, minlength=n_segments)
+
+    return _segment_increase(L, node_seg, link_seg)
 
 def _valve_criticality_demand(node_demands, valve_layer, node_segments, link_segments):
     """
 	Returns the ratio of node demands on either side of a valve.
     """
-    # Assess the number of valves in the system
-    n_valves = len(valve_layer)         
-
-    # Calculate the demand-based valve crticiality
-    VC = {}
+    (node_seg, link_seg, valve_node_seg, valve_link_seg,
+     node_codes, link_codes, segments) = _valve_segment_codes(valve_layer,
+                                             node_segments, link_segments)
+    n_segments = len(segments)
 
-    for i in range(n_valves):
-        # identify the node-side and link-side segments
-        node_seg = node_segments[valve_layer.loc[i,'node']]
-        link_seg = link_segments[valve_layer.loc[i,'link']] 
-        # if the node and link are in the same segment, set criticality to 0
-        if node_seg == link_seg:
-            VC_dem_i = 0.0
-        else:
-            # calculate total demand in the node segment
-            nodes_in_node_seg = node_segments[node_segments == node_seg].index
-            n_ixs = node_demands.index.intersection(nodes_in_node_seg)
-            D_node = node_demands.loc[n_ixs].sum()
-
-            # calculate total demand in the link segment
-            nodes_in_link_seg = node_segments[node_segments == link_seg].index
-            l_ixs = node_demands.index.intersection(nodes_in_link_seg)
-            D_link = node_demands[l_ixs].sum()
-
-            # calculate demand criticality for the valve
-            if D_node == 0 and D_link == 0:
-                VC_dem_i = 0
-            else:
-                VC_dem_i = (D_link + D_node) / max(D_link, D_node) - 1
-
-        VC[i] = VC_dem_i
-    
-    VC = pd.Series(VC)
-    
-    return VC
+    # Total demand in each segment
+    demands = node_demands.reindex(node_segments.index).fillna(0).to_numpy(dtype=float)
+    D = np.bincount(node_codes, weights=demands, minlength=n_segments)
 
+    return _segment_increase(D, node_seg, link_seg)
@@ -92,7 +92,7 @@ class _Skeletonize(object):
             self.wn = wn
         
         # Get the WaterNetworkModel graph
-        G = self.wn.to_graph()
+        G = self.wn.graph_view()
         G = G.to_undirected()
         self.G = G
         
@@ -15,5 +15,6 @@ from .controls import Comparison, ControlPriority, TimeOfDayCondition, \
 from .io import to_dict, from_dict, to_gis, from_gis, to_graph, \
     read_inpfile, write_inpfile, \
     read_json, write_json, \
+    load_snapshot, save_snapshot, \
     read_geojson, write_geojson, \
     read_shapefile, write_shapefile
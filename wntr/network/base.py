@@ -53,7 +53,87 @@ class Observer(six.with_metaclass(abc.ABCMeta, object)):
         pass
 
 
-class Node(six.with_metaclass(abc.ABCMeta, object)):
+# Attributes of an object of a copy-on-write clone that refer to the object
+# of the model and to the clone, see _CopyOnWrite
+_COW_KEYS = frozenset(["_cow_base", "_cow_context"])
+
+# Undo journals of the active transactions of water network models, see
+# WaterNetworkModel.transaction
+_journals = []
+
+
+class _CopyOnWrite(object):
+    """
+    Base class for the model objects that are shared by copy-on-write
+    clones (see WaterNetworkModel.clone) and whose attributes are recorded by
+    transactions (see WaterNetworkModel.transaction).
+
+    An object of a clone is an instance of the same class as the object of
+    the model that only stores the object of the model (``_cow_base``), the
+    clone (``_cow_context``) and the attributes that are set in the clone.
+    The other attributes are read from the object of the model, with the
+    registries, options and elements of the model replaced by those of the
+    clone.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not found in the object
+        state = self.__dict__
+        if "_cow_base" not in state or name[:2] == "__":
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        value = getattr(state["_cow_base"], name)
+        context = state["_cow_context"]
+        if type(value) in context.immutable_types:
+            return value
+        clone_value = context.refs.get(id(value))
+        if clone_value is not None:
+            return clone_value
+        return context.value(value)
+
+    def __getstate__(self):
+        return _element_state(self)
+
+
+def _attribute_names(obj):
+    """Names of the attributes of a model object, including the attributes
+    that an object of a copy-on-write clone reads from the model"""
+    state = obj.__dict__
+    if "_cow_base" not in state:
+        return state.keys()
+    return (_attribute_names(state["_cow_base"]) | state.keys()) - _COW_KEYS
+
+
+def _element_state(obj):
+    """Attributes of a model object, including the attributes that an object
+    of a copy-on-write clone reads from the model"""
+    state = obj.__dict__
+    if "_cow_base" not in state:
+        return state
+    element_state = dict()
+    for key in _element_state(state["_cow_base"]):
+        element_state[key] = getattr(obj, key)
+    for key, value in state.items():
+        if key not in _COW_KEYS:
+            element_state[key] = value
+    return element_state
+
+
+def _journal_setattr(self, name, value):
+    """__setattr__ of the model objects while a transaction is active"""
+    for journal in _journals:
+        journal.record(self, name)
+    object.__setattr__(self, name, value)
+
+
+def _journal_item(container, key, remove=False):
+    """Record an item of a mapping of a model (such as the controls) in the
+    undo journals before it is added, replaced or removed"""
+    for journal in _journals:
+        journal.record_item(container, key, remove)
+
+
+class Node(six.with_metaclass(abc.ABCMeta, _CopyOnWrite)):
     """Base class for nodes.
     
     For details about the different subclasses, see one of the following:
@@ -285,7 +365,7 @@ class Node(six.with_metaclass(abc.ABCMeta, object)):
         return self._name
 
 
-class Link(six.with_metaclass(abc.ABCMeta, object)):
+class Link(six.with_metaclass(abc.ABCMeta, _CopyOnWrite)):
     """Base class for links.
 
     For details about the different subclasses, see one of the following:
@@ -445,7 +525,10 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         return self._start_node
     @start_node.setter
     def start_node(self, node):
-        self._node_reg.remove_usage(self.start_node_name, (self._link_name, self.link_type))
+        # The old start node is still used if it is the end node (as when 
+        # reversing the link)
+        if self.start_node_name != self.end_node_name:
+            self._node_reg.remove_usage(self.start_node_name, (self._link_name, self.link_type))
         self._node_reg.add_usage(node.name, (self._link_name, self.link_type))
         self._start_node = self._node_reg[node.name]
 
@@ -455,7 +538,8 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         return self._end_node
     @end_node.setter
     def end_node(self, node):
-        self._node_reg.remove_usage(self.end_node_name, (self._link_name, self.link_type))
+        if self.end_node_name != self.start_node_name:
+            self._node_reg.remove_usage(self.end_node_name, (self._link_name, self.link_type))
         self._node_reg.add_usage(node.name, (self._link_name, self.link_type))
         self._end_node = self._node_reg[node.name]
 
@@ -631,6 +715,8 @@ class Registry(MutableMapping):
     def __setitem__(self, key, value):
         if not isinstance(key, string_types):
             raise ValueError('Registry keys must be strings')
+        if _journals:
+            self._journal(key)
         self._data[key] = value
     
     def __delitem__(self, key):
@@ -640,7 +726,9 @@ class Registry(MutableMapping):
                                    self.__class__.__name__,
                                    key,
                                    self._usage[key])
-            elif key in self._usage:
+            if _journals:
+                self._journal(key, remove=True)
+            if key in self._usage:
                 self._usage.pop(key)
             return self._data.pop(key)
         except KeyError:
@@ -653,6 +741,12 @@ class Registry(MutableMapping):
     def __len__(self):
         return len(self._data)
 
+    def _journal(self, key, remove=False):
+        """Record the element, the usage and the type of `key` in the undo 
+        journals before they are changed"""
+        for journal in _journals:
+            journal.record_registry(self, key, remove)
+
     def __call__(self):
         for key, value in self._data.items():
             yield key, value
@@ -730,12 +824,16 @@ class Registry(MutableMapping):
         """if key in usage, clear usage[key]"""
         if not key:
             return
+        if _journals:
+            self._journal(key)
         self._usage[key].clear()
     
     def add_usage(self, key, *args):
         """add args to usage[key]"""
         if not key:
             return
+        if _journals:
+            self._journal(key)
         if not (key in self._usage):
             self._usage[key] = OrderedSet()
         for arg in args:
@@ -745,6 +843,8 @@ class Registry(MutableMapping):
         """remove args from usage[key]"""
         if not key:
             return
+        if _journals:
+            self._journal(key, remove=True)
         for arg in args:
             self._usage[key].discard(arg)
         if len(self._usage[key]) < 1:
@@ -15,7 +15,7 @@ from scipy.optimize import curve_fit, OptimizeWarning
 from warnings import warn
 from collections.abc import MutableSequence
 
-from .base import Node, Link, Registry, LinkStatus
+from .base import Node, Link, Registry, LinkStatus, _CopyOnWrite, _journals
 from .options import TimeOptions
 from wntr.epanet.util import MixType
 from wntr.utils.check_values import _check_float, _check_positive_non_zero_float, _check_positive_or_zero_float
@@ -2097,7 +2097,7 @@ class GPValve(Valve):
         self._headloss_curve_name = name
     
 
-class Pattern(object):
+class Pattern(_CopyOnWrite):
     """
     Pattern class.
     
@@ -2274,7 +2274,7 @@ class Pattern(object):
         return self._multipliers[step]
     
 
-class TimeSeries(object): 
+class TimeSeries(_CopyOnWrite): 
     """
     Time series class.
     
@@ -2400,7 +2400,7 @@ class TimeSeries(object):
 #        return fmt.format(self._base, self._pattern, self._category)
     
 
-class Demands(MutableSequence):
+class Demands(MutableSequence, _CopyOnWrite):
     """
     Demands class.
     
@@ -2427,10 +2427,14 @@ class Demands(MutableSequence):
     
     def __setitem__(self, index, obj):
         """Set demand and index <==> S[index] = object"""
+        if _journals:
+            self._journal()
         return self._list.__setitem__(index, self.to_ts(obj))
     
     def __delitem__(self, index):
         """Remove demand at index <==> del S[index]"""
+        if _journals:
+            self._journal()
         return self._list.__delitem__(index)
 
     def __len__(self):
@@ -2460,17 +2464,28 @@ class Demands(MutableSequence):
     
     def insert(self, index, obj):
         """S.insert(index, object) - insert object before index"""
+        if _journals:
+            self._journal()
         self._list.insert(index, self.to_ts(obj))
     
     def append(self, obj):
         """S.append(object) - append object to the end"""
+        if _journals:
+            self._journal()
         self._list.append(self.to_ts(obj))
     
     def extend(self, iterable):
         """S.extend(iterable) - extend list by appending elements from the iterable"""
+        if _journals:
+            self._journal()
         for obj in iterable:
             self._list.append(self.to_ts(obj))
 
+    def _journal(self):
+        # Record a copy of the list in the undo journals before it is changed
+        for journal in _journals:
+            journal.record(self, "_list", mutable=True)
+
     def clear(self):
         """S.clear() - remove all entries"""
         self._list = []
@@ -2529,7 +2544,7 @@ class Demands(MutableSequence):
         return res
         
 
-class Curve(object):
+class Curve(_CopyOnWrite):
     """
     Curve base class.
     
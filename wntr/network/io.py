@@ -5,14 +5,21 @@ The wntr.network.io module includes functions that convert the water network
 model to other data formats, create a water network model from file, and write 
 the water network model to a file.
 """
+import functools
 import logging
 import json
+import os
+import struct
+import zipfile
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 import wntr.epanet
 from wntr.epanet.util import FlowUnits
 import wntr.network.model
+from wntr.network.base import LinkStatus, _attribute_names
+from wntr.network.elements import Junction, Pipe
 from wntr.gis.network import WaterNetworkGIS
 try:
     import geopandas as gpd
@@ -48,12 +55,6 @@ def to_dict(wn) -> dict:
     """
     from wntr import __version__
 
-    controls = list()
-    for k, c in wn._controls.items():
-        cc = c.to_dict()
-        if "name" in cc.keys() and not cc["name"]:
-            cc["name"] = k
-        controls.append(cc)
     d = dict(
         version="wntr-{}".format(__version__),
         comment="WaterNetworkModel - all values given in SI units",
@@ -65,11 +66,22 @@ def to_dict(wn) -> dict:
         nodes=wn._node_reg.to_list(),
         links=wn._link_reg.to_list(),
         sources=wn._sources.to_list(),
-        controls=controls,
+        controls=_controls_to_list(wn),
     )
     return d
 
 
+def _controls_to_list(wn):
+    """List of the dictionary representations of the controls"""
+    controls = list()
+    for k, c in wn._controls.items():
+        cc = c.to_dict()
+        if "name" in cc.keys() and not cc["name"]:
+            cc["name"] = k
+        controls.append(cc)
+    return controls
+
+
 def from_dict(d: dict, append=None):
     """
     Create or append a WaterNetworkModel from a dictionary
@@ -87,8 +99,6 @@ def from_dict(d: dict, append=None):
     WaterNetworkModel
     
     """
-    from wntr.epanet.io import _read_control_line, _EpanetRule
-
     keys = [
         "version",
         "comment",
@@ -122,203 +132,266 @@ def from_dict(d: dict, append=None):
         for pattern in d["patterns"]:
             wn.add_pattern(name=pattern["name"], pattern=pattern["multipliers"])
     if "nodes" in d:
-        for node in d["nodes"]:
-            name = node["name"]
-            if node["node_type"] == "Junction":
-                dl = node.setdefault("demand_timeseries_list")
-                if dl is not None and len(dl) > 0:
-                    base_demand = dl[0].setdefault("base_val", 0.0)
-                    pattern_name = _nan_to_none(dl[0].setdefault("pattern_name"))
-                    demand_category = _nan_to_none(dl[0].setdefault("category"))
-                else:
-                    base_demand = node.setdefault('base_demand',0.0)
-                    pattern_name = _nan_to_none(node.setdefault('pattern_name'))
-                    demand_category = _nan_to_none(node.setdefault('demand_category'))
-                wn.add_junction(
-                    name=name,
-                    base_demand=base_demand,
-                    demand_pattern=pattern_name,
-                    elevation=node.setdefault("elevation", 0.0),
-                    coordinates=node.setdefault("coordinates", list()),
-                    demand_category=demand_category,
-                )
-                j = wn.get_node(name)
-                j.emitter_coefficient = node.setdefault("emitter_coefficient")
-                j.initial_quality = node.setdefault("initial_quality")
-                j.minimum_pressure = node.setdefault("minimum_pressure")
-                j.pressure_exponent = node.setdefault("pressure_exponent")
-                j.required_pressure = node.setdefault("required_pressure")
-                j.tag = _nan_to_none(node.setdefault("tag"))
-                
-                j._leak = node.setdefault("leak", False)
-                j._leak_area = node.setdefault("leak_area", 0.0)
-                j._leak_discharge_coeff = node.setdefault("leak_discharge_coeff", 0.0)
-                
-                # custom additional attributes
-                for attr in list(set(node.keys()) - set(dir(j))):
-                    setattr( j, attr, node[attr] )
-                if dl is not None and len(dl) > 1:
-                    for i in range(1, len(dl)):
-                        base_val = dl[i].setdefault("base_val", 0.0)
-                        pattern_name = _nan_to_none(dl[i].setdefault("pattern_name"))
-                        category = _nan_to_none(dl[i].setdefault("category"))
-                        j.add_demand(base_val, pattern_name, category)
-            elif node["node_type"] == "Tank":
-                coordinates = node.setdefault("coordinates")
-
-                wn.add_tank(
-                    name,
-                    elevation=node.setdefault("elevation"),
-                    init_level=node.setdefault("init_level", node.setdefault("min_level", 0)),
-                    min_level=node.setdefault("min_level", 0),
-                    max_level=node.setdefault("max_level", node.setdefault("min_level", 0) + 10),
-                    diameter=node.setdefault("diameter", 0),
-                    min_vol=node.setdefault("min_vol", 0),
-                    vol_curve=_nan_to_none(node.setdefault("vol_curve_name")),
-                    overflow=node.setdefault("overflow", False),
-                    coordinates=coordinates,
-                )
-                t = wn.get_node(name)
-                t.initial_quality = node.setdefault("initial_quality", 0.0)
-                if node.setdefault("mixing_fraction"):
-                    t.mixing_fraction = node.setdefault("mixing_fraction")
-                if node.setdefault("mixing_model"):
-                    t.mixing_model = node.setdefault("mixing_model")
-                t.bulk_coeff = node.setdefault("bulk_coeff")
-                t.tag = _nan_to_none(node.setdefault("tag"))
-                # custom additional attributes
-                for attr in list(set(node.keys()) - set(dir(t))):
-                    setattr( t, attr, node[attr] )
-            elif node["node_type"] == "Reservoir":
-                wn.add_reservoir(
-                    name,
-                    base_head=node.setdefault("base_head"),
-                    head_pattern=_nan_to_none(node.setdefault("head_pattern_name")),
-                    coordinates=node.setdefault("coordinates"),
-                )
-                r = wn.get_node(name)
-                r.initial_quality = node.setdefault("initial_quality", 0.0)
-                r.tag = _nan_to_none(node.setdefault("tag"))
-                # custom additional attributes
-                for attr in list(set(node.keys()) - set(dir(r))):
-                    setattr( r, attr, node[attr] )
-            else:
-                raise ValueError("Illegal node type '{}'".format(node["node_type"]))
+        _add_nodes_from_dict(wn, d["nodes"])
     if "links" in d:
-        for link in d["links"]:
-            name = link["name"]
-            if link["link_type"] == "Pipe":
-                wn.add_pipe(
-                    name,
-                    link["start_node_name"],
-                    end_node_name=link["end_node_name"],
-                    length=link.setdefault("length", 304.8),
-                    diameter=link.setdefault("diameter", 0.3048),
-                    roughness=link.setdefault("roughness", 100.0),
-                    minor_loss=link.setdefault("minor_loss", 0.0),
-                    initial_status=link.setdefault("initial_status", "OPEN"),
-                    check_valve=link.setdefault("check_valve", False),
-                )
-                p = wn.get_link(name)
-                p.bulk_coeff = link.setdefault("bulk_coeff")
-                p.tag = _nan_to_none(link.setdefault("tag"))
-                p.vertices = link.setdefault("vertices", list())
-                p.wall_coeff = link.setdefault("wall_coeff")
-                # custom additional attributes
-                for attr in list(set(link.keys()) - set(dir(p))):
-                    setattr( p, attr, link[attr] )
-            elif link["link_type"] == "Pump":
-                pump_type = link.setdefault("pump_type", "POWER")
-                wn.add_pump(
-                    name,
-                    link["start_node_name"],
-                    link["end_node_name"],
-                    pump_type=pump_type,
-                    pump_parameter=link.setdefault("power")
-                    if pump_type.lower() == "power"
-                    else link.setdefault("pump_curve_name"),
-                    speed=link.setdefault("base_speed", 1.0),
-                    pattern=_nan_to_none(link.setdefault("speed_pattern_name")),
-                    initial_status=link.setdefault("initial_status", "OPEN"),
-                )
-                p = wn.get_link(name)
-                p.efficiency_curve_name = _nan_to_none(link.setdefault("efficiency_curve_name"))
-                p.energy_pattern = _nan_to_none(link.setdefault("energy_pattern"))
-                p.energy_price = link.setdefault("energy_price")
-                p.initial_setting = link.setdefault("initial_setting")
-                p.tag = _nan_to_none(link.setdefault("tag"))
-                p.vertices = link.setdefault("vertices", list())
-                # custom additional attributes
-                for attr in list(set(link.keys()) - set(dir(p))):
-                    setattr( p, attr, link[attr] )
-            elif link["link_type"] == "Valve":
-                valve_type = link["valve_type"]
-                wn.add_valve(
-                    name,
-                    link["start_node_name"],
-                    link["end_node_name"],
-                    diameter=link.setdefault("diameter", 0.3048),
-                    valve_type=valve_type,
-                    minor_loss=link.setdefault("minor_loss", 0),
-                    initial_setting=link.setdefault("initial_setting", 0),
-                    initial_status=link.setdefault("initial_status", "ACTIVE"),
-                )
-                v = wn.get_link(name)
-                if valve_type.lower() == "gpv":
-                    v.headloss_curve_name = _nan_to_none(link.setdefault("headloss_curve_name"))
-                v.vertices = link.setdefault("vertices", list())
-                # custom additional attributes
-                for attr in list(set(link.keys()) - set(dir(v))):
-                    setattr( v, attr, link[attr] )
-            else:
-                raise ValueError("Illegal link type '{}'".format(link["link_type"]))
+        _add_links_from_dict(wn, d["links"])
     if "sources" in d:
-        for source in d["sources"]:
-            wn.add_source(
-                source["name"],
-                node_name=source["node_name"],
-                source_type=source["source_type"],
-                quality=source["strength"],
-                pattern=source["pattern"],
-            )
+        _add_sources_from_dict(wn, d["sources"])
     if "controls" in d:  # TODO: FIXME: FINISH
-        control_count = 0
-        for control in d["controls"]:
-            ctrl_type = control["type"]
-            if ctrl_type.lower() == "simple":
-                control_count += 1
-                control_name = "control " + str(control_count)
-                ta = control["then_actions"][0].split()
-                tstring = " ".join([ta[0], ta[1], ta[4]])
-                cond = control["condition"].split()
-                if cond[0].lower() == "system":
-                    cstr = " ".join(["AT", cond[1], cond[3], cond[4] if len(cond) > 4 else ""])
-                else:
-                    cstr = " ".join(["IF", cond[0], cond[1], cond[3], cond[4]])
-                ctrl = _read_control_line(tstring + " " + cstr, wn, FlowUnits.SI, control_name)
-                wn.add_control(control_name, ctrl)
-            elif ctrl_type.lower() == "rule":
-                ctrllst = ["RULE"]
-                control_name = control["name"]
-                ctrllst.append(control["name"])
-                ctrllst.append("IF")
-                ctrllst.append(control["condition"])
-                thenact = " AND ".join(control["then_actions"])
-                ctrllst.append("THEN")
-                ctrllst.append(thenact)
-                if "else_actions" in control and control["else_actions"]:
-                    ctrllst.append("ELSE")
-                    ctrllst.append(" AND ".join(control["else_actions"]))
-                ctrllst.append("PRIORITY")
-                ctrllst.append(str(control["priority"]))
-                ctrlstring = " ".join(ctrllst)
-                c = _EpanetRule.parse_rules_lines([ctrlstring])
-                wn.add_control(control_name, c[0].generate_control(wn))
-            else:
-                raise ValueError("Illegal control type '{}'".format(ctrl_type))
+        _add_controls_from_dict(wn, d["controls"])
     return wn
 
 
+def _add_nodes_from_dict(wn, nodes):
+    """Add nodes from their dictionary representations"""
+    # Consecutive junctions are added in bulk, which preserves the node order
+    junction_runs = _runs(nodes, "node_type", "Junction")
+    for i, node in enumerate(nodes):
+        name = node["name"]
+        if i in junction_runs:
+            _add_junctions_from_dict(wn, junction_runs[i])
+        if node["node_type"] == "Junction":
+            dl = node["demand_timeseries_list"]
+            j = wn.get_node(name)
+            j.emitter_coefficient = node.setdefault("emitter_coefficient")
+            j.initial_quality = node.setdefault("initial_quality")
+            j.minimum_pressure = node.setdefault("minimum_pressure")
+            j.pressure_exponent = node.setdefault("pressure_exponent")
+            j.required_pressure = node.setdefault("required_pressure")
+            j.tag = _nan_to_none(node.setdefault("tag"))
+            
+            j._leak = node.setdefault("leak", False)
+            j._leak_area = node.setdefault("leak_area", 0.0)
+            j._leak_discharge_coeff = node.setdefault("leak_discharge_coeff", 0.0)
+            
+            # custom additional attributes
+            for attr in list(set(node.keys()) - _dir(j)):
+                setattr( j, attr, node[attr] )
+            if dl is not None and len(dl) > 1:
+                for i in range(1, len(dl)):
+                    base_val = dl[i].setdefault("base_val", 0.0)
+                    pattern_name = _nan_to_none(dl[i].setdefault("pattern_name"))
+                    category = _nan_to_none(dl[i].setdefault("category"))
+                    j.add_demand(base_val, pattern_name, category)
+        elif node["node_type"] == "Tank":
+            coordinates = node.setdefault("coordinates")
+
+            wn.add_tank(
+                name,
+                elevation=node.setdefault("elevation"),
+                init_level=node.setdefault("init_level", node.setdefault("min_level", 0)),
+                min_level=node.setdefault("min_level", 0),
+                max_level=node.setdefault("max_level", node.setdefault("min_level", 0) + 10),
+                diameter=node.setdefault("diameter", 0),
+                min_vol=node.setdefault("min_vol", 0),
+                vol_curve=_nan_to_none(node.setdefault("vol_curve_name")),
+                overflow=node.setdefault("overflow", False),
+                coordinates=coordinates,
+            )
+            t = wn.get_node(name)
+            t.initial_quality = node.setdefault("initial_quality", 0.0)
+            if node.setdefault("mixing_fraction"):
+                t.mixing_fraction = node.setdefault("mixing_fraction")
+            if node.setdefault("mixing_model"):
+                t.mixing_model = node.setdefault("mixing_model")
+            t.bulk_coeff = node.setdefault("bulk_coeff")
+            t.tag = _nan_to_none(node.setdefault("tag"))
+            # custom additional attributes
+            for attr in list(set(node.keys()) - _dir(t)):
+                setattr( t, attr, node[attr] )
+        elif node["node_type"] == "Reservoir":
+            wn.add_reservoir(
+                name,
+                base_head=node.setdefault("base_head"),
+                head_pattern=_nan_to_none(node.setdefault("head_pattern_name")),
+                coordinates=node.setdefault("coordinates"),
+            )
+            r = wn.get_node(name)
+            r.initial_quality = node.setdefault("initial_quality", 0.0)
+            r.tag = _nan_to_none(node.setdefault("tag"))
+            # custom additional attributes
+            for attr in list(set(node.keys()) - _dir(r)):
+                setattr( r, attr, node[attr] )
+        else:
+            raise ValueError("Illegal node type '{}'".format(node["node_type"]))
+
+
+def _add_links_from_dict(wn, links):
+    """Add links from their dictionary representations"""
+    # Consecutive pipes are added in bulk, which preserves the link order
+    pipe_runs = _runs(links, "link_type", "Pipe")
+    for i, link in enumerate(links):
+        name = link["name"]
+        if i in pipe_runs:
+            wn.add_pipes(dict(
+                name=[pipe["name"] for pipe in pipe_runs[i]],
+                start_node_name=[pipe["start_node_name"] for pipe in pipe_runs[i]],
+                end_node_name=[pipe["end_node_name"] for pipe in pipe_runs[i]],
+                length=[pipe.setdefault("length", 304.8) for pipe in pipe_runs[i]],
+                diameter=[pipe.setdefault("diameter", 0.3048) for pipe in pipe_runs[i]],
+                roughness=[pipe.setdefault("roughness", 100.0) for pipe in pipe_runs[i]],
+                minor_loss=[pipe.setdefault("minor_loss", 0.0) for pipe in pipe_runs[i]],
+                initial_status=[pipe.setdefault("initial_status", "OPEN") for pipe in pipe_runs[i]],
+                check_valve=[pipe.setdefault("check_valve", False) for pipe in pipe_runs[i]],
+            ))
+        if link["link_type"] == "Pipe":
+            p = wn.get_link(name)
+            p.bulk_coeff = link.setdefault("bulk_coeff")
+            p.tag = _nan_to_none(link.setdefault("tag"))
+            p.vertices = link.setdefault("vertices", list())
+            p.wall_coeff = link.setdefault("wall_coeff")
+            # custom additional attributes
+            for attr in list(set(link.keys()) - _dir(p)):
+                setattr( p, attr, link[attr] )
+        elif link["link_type"] == "Pump":
+            pump_type = link.setdefault("pump_type", "POWER")
+            wn.add_pump(
+                name,
+                link["start_node_name"],
+                link["end_node_name"],
+                pump_type=pump_type,
+                pump_parameter=link.setdefault("power")
+                if pump_type.lower() == "power"
+                else link.setdefault("pump_curve_name"),
+                speed=link.setdefault("base_speed", 1.0),
+                pattern=_nan_to_none(link.setdefault("speed_pattern_name")),
+                initial_status=link.setdefault("initial_status", "OPEN"),
+            )
+            p = wn.get_link(name)
+            p.efficiency_curve_name = _nan_to_none(link.setdefault("efficiency_curve_name"))
+            p.energy_pattern = _nan_to_none(link.setdefault("energy_pattern"))
+            p.energy_price = link.setdefault("energy_price")
+            p.initial_setting = link.setdefault("initial_setting")
+            p.tag = _nan_to_none(link.setdefault("tag"))
+            p.vertices = link.setdefault("vertices", list())
+            # custom additional attributes
+            for attr in list(set(link.keys()) - _dir(p)):
+                setattr( p, attr, link[attr] )
+        elif link["link_type"] == "Valve":
+            valve_type = link["valve_type"]
+            wn.add_valve(
+                name,
+                link["start_node_name"],
+                link["end_node_name"],
+                diameter=link.setdefault("diameter", 0.3048),
+                valve_type=valve_type,
+                minor_loss=link.setdefault("minor_loss", 0),
+                initial_setting=link.setdefault("initial_setting", 0),
+                initial_status=link.setdefault("initial_status", "ACTIVE"),
+            )
+            v = wn.get_link(name)
+            if valve_type.lower() == "gpv":
+                v.headloss_curve_name = _nan_to_none(link.setdefault("headloss_curve_name"))
+            v.vertices = link.setdefault("vertices", list())
+            # custom additional attributes
+            for attr in list(set(link.keys()) - _dir(v)):
+                setattr( v, attr, link[attr] )
+        else:
+            raise ValueError("Illegal link type '{}'".format(link["link_type"]))
+
+
+def _add_sources_from_dict(wn, sources):
+    """Add sources from their dictionary representations"""
+    for source in sources:
+        wn.add_source(
+            source["name"],
+            node_name=source["node_name"],
+            source_type=source["source_type"],
+            quality=source["strength"],
+            pattern=source["pattern"],
+        )
+
+
+def _add_controls_from_dict(wn, controls):
+    """Add controls from their dictionary representations"""
+    from wntr.epanet.io import _read_control_line, _EpanetRule
+
+    control_count = 0
+    for control in controls:
+        ctrl_type = control["type"]
+        if ctrl_type.lower() == "simple":
+            control_count += 1
+            control_name = "control " + str(control_count)
+            ta = control["then_actions"][0].split()
+            tstring = " ".join([ta[0], ta[1], ta[4]])
+            cond = control["condition"].split()
+            if cond[0].lower() == "system":
+                cstr = " ".join(["AT", cond[1], cond[3], cond[4] if len(cond) > 4 else ""])
+            else:
+                cstr = " ".join(["IF", cond[0], cond[1], cond[3], cond[4]])
+            ctrl = _read_control_line(tstring + " " + cstr, wn, FlowUnits.SI, control_name)
+            wn.add_control(control_name, ctrl)
+        elif ctrl_type.lower() == "rule":
+            ctrllst = ["RULE"]
+            control_name = control["name"]
+            ctrllst.append(control["name"])
+            ctrllst.append("IF")
+            ctrllst.append(control["condition"])
+            thenact = " AND ".join(control["then_actions"])
+            ctrllst.append("THEN")
+            ctrllst.append(thenact)
+            if "else_actions" in control and control["else_actions"]:
+                ctrllst.append("ELSE")
+                ctrllst.append(" AND ".join(control["else_actions"]))
+            ctrllst.append("PRIORITY")
+            ctrllst.append(str(control["priority"]))
+            ctrlstring = " ".join(ctrllst)
+            c = _EpanetRule.parse_rules_lines([ctrlstring])
+            wn.add_control(control_name, c[0].generate_control(wn))
+        else:
+            raise ValueError("Illegal control type '{}'".format(ctrl_type))
+
+
+@functools.lru_cache(maxsize=None)
+def _class_dir(cls):
+    return frozenset(dir(cls))
+
+
+def _dir(obj):
+    """Set of attribute names of an object, same as set(dir(obj))"""
+    return _class_dir(type(obj)) | _attribute_names(obj)
+
+
+def _runs(elements, type_key, element_type):
+    """Map the start index of each run of consecutive elements of a type to the run"""
+    runs = dict()
+    start = None
+    for i, element in enumerate(elements):
+        if element[type_key] != element_type:
+            start = None
+        elif start is None:
+            start = i
+            runs[start] = [element]
+        else:
+            runs[start].append(element)
+    return runs
+
+
+def _add_junctions_from_dict(wn, junctions):
+    """Add junctions in bulk from their dictionary representations"""
+    base_demand = []
+    demand_pattern = []
+    demand_category = []
+    for node in junctions:
+        dl = node.setdefault("demand_timeseries_list")
+        if dl is not None and len(dl) > 0:
+            base_demand.append(dl[0].setdefault("base_val", 0.0))
+            demand_pattern.append(_nan_to_none(dl[0].setdefault("pattern_name")))
+            demand_category.append(_nan_to_none(dl[0].setdefault("category")))
+        else:
+            base_demand.append(node.setdefault('base_demand',0.0))
+            demand_pattern.append(_nan_to_none(node.setdefault('pattern_name')))
+            demand_category.append(_nan_to_none(node.setdefault('demand_category')))
+    wn.add_junctions(dict(
+        name=[node["name"] for node in junctions],
+        base_demand=base_demand,
+        demand_pattern=demand_pattern,
+        elevation=[node.setdefault("elevation", 0.0) for node in junctions],
+        coordinates=[node.setdefault("coordinates", list()) for node in junctions],
+        demand_category=demand_category,
+    ))
+
+
 def to_gis(wn, crs=None, pumps_as_points=False, valves_as_points=False):
     """
     Convert a WaterNetworkModel into GeoDataFrames
@@ -394,37 +467,37 @@ def to_graph(wn, node_weight=None, link_weight=None, modify_direction=False):
     """
     G = nx.MultiDiGraph()
 
-    for name, node in wn.nodes():
-        G.add_node(name)
-        nx.set_node_attributes(G, name="pos", values={name: node.coordinates})
-        nx.set_node_attributes(G, name="type", values={name: node.node_type})
-
-        if node_weight is not None:
-            try:  # weight nodes
-                value = node_weight[name]
-                nx.set_node_attributes(G, name="weight", values={name: value})
-            except:
-                pass
-
-    for name, link in wn.links():
-        start_node = link.start_node_name
-        end_node = link.end_node_name
-        G.add_edge(start_node, end_node, key=name)
-        nx.set_edge_attributes(G, name="type", values={(start_node, end_node, name): link.link_type})
-
-        if link_weight is not None:
-            try:  # weight links
-                value = link_weight[name]
-                if modify_direction and value < 0:  # change the direction of the link and value
-                    G.remove_edge(start_node, end_node, name)
-                    G.add_edge(end_node, start_node, name)
-                    nx.set_edge_attributes(G, name="type", values={(end_node, start_node, name): link.link_type})
-                    nx.set_edge_attributes(G, name="weight", values={(end_node, start_node, name): -value})
-                else:
-                    nx.set_edge_attributes(G, name="weight", values={(start_node, end_node, name): value})
-            except:
-                pass
-    
+    # Collect the nodes and links first and add them in bulk, which is much 
+    # faster than adding them and setting their attributes one at a time
+    with wntr.network.model._gc_paused():
+        nodes = []
+        for name, node in wn.nodes():
+            attributes = {"pos": node.coordinates, "type": node.node_type}
+            if node_weight is not None:
+                try:  # weight nodes
+                    attributes["weight"] = node_weight[name]
+                except:
+                    pass
+            nodes.append((name, attributes))
+        G.add_nodes_from(nodes)
+
+        links = []
+        for name, link in wn.links():
+            start_node = link.start_node_name
+            end_node = link.end_node_name
+            attributes = {"type": link.link_type}
+            if link_weight is not None:
+                try:  # weight links
+                    value = link_weight[name]
+                    if modify_direction and value < 0:  # change the direction of the link and value
+                        start_node, end_node = end_node, start_node
+                        value = -value
+                    attributes["weight"] = value
+                except:
+                    pass
+            links.append((start_node, end_node, name, attributes))
+        G.add_edges_from(links)
+
     return G
 
 def write_json(wn, path_or_buf, **kw_json,):
@@ -473,6 +546,328 @@ def read_json(path_or_buf, append=None, **kw_json):
     return from_dict(d, append)
 
 
+_SNAPSHOT_FORMAT = "wntr-snapshot"
+_SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(wn, filename, compressed=False):
+    """
+    Write the WaterNetworkModel to a binary snapshot file
+
+    A snapshot is a NumPy ``.npz`` file. Attributes of junctions and pipes 
+    are stored as one array per attribute. Other elements, patterns, 
+    curves, sources, controls and options are stored as JSON, using the 
+    same representation as :func:`~wntr.network.io.to_dict`. 
+    Junctions with more than one demand and pipes with vertices or custom 
+    attributes are also stored as JSON. The snapshot is versioned so that 
+    :func:`~wntr.network.io.load_snapshot` can check that it can read it.
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Water network model
+    filename : str or file-like
+        Name of the snapshot file (``.npz`` is added if the name has no 
+        extension) or a binary file-like object
+    compressed : bool, optional
+        If True, the arrays are compressed, which gives a smaller file that 
+        cannot be memory-mapped when it is loaded. Default = False.
+
+    """
+    from wntr import __version__
+
+    node_names = list(wn._node_reg._data.keys())
+    node_index = {name: i for i, name in enumerate(node_names)}
+    node_bulk = np.zeros(len(node_names), dtype=bool)
+    junctions = []
+    nodes = []
+    for i, node in enumerate(wn._node_reg._data.values()):
+        if _is_bulk_junction(node):
+            node_bulk[i] = True
+            junctions.append(node)
+        else:
+            nodes.append(node.to_dict())
+    link_names = list(wn._link_reg._data.keys())
+    link_bulk = np.zeros(len(link_names), dtype=bool)
+    pipes = []
+    links = []
+    for i, link in enumerate(wn._link_reg._data.values()):
+        if _is_bulk_pipe(link):
+            link_bulk[i] = True
+            pipes.append(link)
+        else:
+            links.append(link.to_dict())
+
+    header = dict(
+        format=_SNAPSHOT_FORMAT,
+        snapshot_version=_SNAPSHOT_VERSION,
+        version="wntr-{}".format(__version__),
+        comment="WaterNetworkModel - all values given in SI units",
+        name=wn.name,
+        references=wn._references.copy(),
+        options=wn._options.to_dict(),
+        curves=wn._curve_reg.to_list(),
+        patterns=wn._pattern_reg.to_list(),
+        nodes=nodes,
+        links=links,
+        sources=wn._sources.to_list(),
+        controls=_controls_to_list(wn),
+    )
+    arrays = dict(
+        header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        node_name=np.array(node_names, dtype=str),
+        node_bulk=node_bulk,
+        link_name=np.array(link_names, dtype=str),
+        link_bulk=link_bulk,
+    )
+
+    demands = [junction._demand_timeseries_list[0] for junction in junctions]
+    coordinates = np.array([junction._coordinates for junction in junctions], dtype=float).reshape(-1, 2)
+    arrays.update(
+        junction_elevation=np.array([junction._elevation for junction in junctions], dtype=float),
+        junction_base_demand=np.array([demand._base for demand in demands], dtype=float),
+        junction_x=coordinates[:, 0],
+        junction_y=coordinates[:, 1],
+        junction_leak=np.array([junction._leak for junction in junctions], dtype=bool),
+    )
+    for attribute in ["emitter_coefficient", "initial_quality", "minimum_pressure", 
+                      "required_pressure", "pressure_exponent", "leak_area", 
+                      "leak_discharge_coeff"]:
+        arrays["junction_" + attribute] = np.array(
+            [getattr(junction, "_" + attribute) for junction in junctions], dtype=float
+        )
+    _encode_strings(arrays, "junction_demand_pattern", [
+        None if isinstance(demand._pattern, wntr.network.model.PatternRegistry.DefaultPattern) 
+        else demand.pattern_name for demand in demands
+    ])
+    _encode_strings(arrays, "junction_demand_category", [demand._category for demand in demands])
+    _encode_strings(arrays, "junction_tag", [junction._tag for junction in junctions])
+
+    arrays.update(
+        pipe_start_node=np.array([node_index[pipe._start_node._name] for pipe in pipes], dtype=np.int64),
+        pipe_end_node=np.array([node_index[pipe._end_node._name] for pipe in pipes], dtype=np.int64),
+        pipe_initial_status=np.array([int(pipe._initial_status) for pipe in pipes], dtype=np.int8),
+        pipe_check_valve=np.array([pipe._check_valve for pipe in pipes], dtype=bool),
+    )
+    for attribute in ["length", "diameter", "roughness", "minor_loss", "initial_quality", 
+                      "bulk_coeff", "wall_coeff"]:
+        arrays["pipe_" + attribute] = np.array([getattr(pipe, "_" + attribute) for pipe in pipes], dtype=float)
+    _encode_strings(arrays, "pipe_tag", [pipe._tag for pipe in pipes])
+
+    if compressed:
+        np.savez_compressed(filename, **arrays)
+    else:
+        np.savez(filename, **arrays)
+
+
+def load_snapshot(filename, mmap_mode=None):
+    """
+    Create a WaterNetworkModel from a binary snapshot file
+
+    Junctions and pipes are added in bulk from the stored arrays, see 
+    :meth:`~wntr.network.model.WaterNetworkModel.add_junctions` and 
+    :meth:`~wntr.network.model.WaterNetworkModel.add_pipes`.
+
+    Parameters
+    ----------
+    filename : str or file-like
+        Name of a snapshot file written by 
+        :func:`~wntr.network.io.save_snapshot`, or a binary file-like object
+    mmap_mode : {None, 'r', 'c'}, optional
+        If not None, the arrays of an uncompressed snapshot file are 
+        memory-mapped with this mode (see :class:`numpy.memmap`) instead of 
+        being read into memory. Pages of the file are then only read when 
+        they are used and are shared, through the operating system page 
+        cache, by all processes that load the same snapshot. Ignored for a 
+        file-like object or a compressed snapshot.
+
+    Returns
+    -------
+    WaterNetworkModel
+
+    Raises
+    ------
+    ValueError
+        If the file is not a snapshot or was written by a newer version of 
+        the snapshot format
+
+    """
+    arrays = _read_npz(filename, mmap_mode)
+    if "header" not in arrays:
+        raise ValueError("{} is not a WNTR snapshot".format(filename))
+    header = json.loads(bytes(arrays["header"]).decode("utf-8"))
+    if header.get("format") != _SNAPSHOT_FORMAT:
+        raise ValueError("{} is not a WNTR snapshot".format(filename))
+    if header["snapshot_version"] > _SNAPSHOT_VERSION:
+        raise ValueError(
+            "Snapshot version {} is not supported, the latest supported version is {}".format(
+                header["snapshot_version"], _SNAPSHOT_VERSION
+            )
+        )
+
+    wn = from_dict(dict(header, nodes=[], links=[], sources=[], controls=[]))
+
+    node_name = arrays["node_name"]
+    rows = 0
+    dicts = 0
+    for start, stop, bulk in _mask_runs(arrays["node_bulk"]):
+        if not bulk:
+            _add_nodes_from_dict(wn, header["nodes"][dicts : dicts + stop - start])
+            dicts += stop - start
+            continue
+        run = slice(rows, rows + stop - start)
+        rows += stop - start
+        names = node_name[start:stop].tolist()
+        wn.add_junctions(dict(
+            name=names,
+            base_demand=arrays["junction_base_demand"][run],
+            demand_pattern=_decode_strings(arrays, "junction_demand_pattern", run),
+            elevation=arrays["junction_elevation"][run],
+            coordinates=list(zip(arrays["junction_x"][run].tolist(), arrays["junction_y"][run].tolist())),
+            demand_category=_decode_strings(arrays, "junction_demand_category", run),
+            emitter_coeff=_nan_to_none_list(arrays["junction_emitter_coefficient"][run]),
+            initial_quality=_nan_to_none_list(arrays["junction_initial_quality"][run]),
+        ))
+        junctions = [wn._node_reg._data[name] for name in names]
+        for attribute in ["minimum_pressure", "required_pressure", "pressure_exponent"]:
+            values = arrays["junction_" + attribute][run]
+            for i in np.flatnonzero(~np.isnan(values)):
+                setattr(junctions[i], "_" + attribute, float(values[i]))
+        for attribute in ["leak", "leak_area", "leak_discharge_coeff"]:
+            values = arrays["junction_" + attribute][run]
+            for i in np.flatnonzero(values):
+                setattr(junctions[i], "_" + attribute, values[i].item())
+        _set_strings(junctions, "_tag", arrays, "junction_tag", run)
+
+    link_name = arrays["link_name"]
+    rows = 0
+    dicts = 0
+    for start, stop, bulk in _mask_runs(arrays["link_bulk"]):
+        if not bulk:
+            _add_links_from_dict(wn, header["links"][dicts : dicts + stop - start])
+            dicts += stop - start
+            continue
+        run = slice(rows, rows + stop - start)
+        rows += stop - start
+        names = link_name[start:stop].tolist()
+        wn.add_pipes(dict(
+            name=names,
+            start_node_name=node_name[arrays["pipe_start_node"][run]].tolist(),
+            end_node_name=node_name[arrays["pipe_end_node"][run]].tolist(),
+            length=arrays["pipe_length"][run],
+            diameter=arrays["pipe_diameter"][run],
+            roughness=arrays["pipe_roughness"][run],
+            minor_loss=arrays["pipe_minor_loss"][run],
+            initial_status=[LinkStatus(status) for status in arrays["pipe_initial_status"][run].tolist()],
+            check_valve=arrays["pipe_check_valve"][run].tolist(),
+        ))
+        pipes = [wn._link_reg._data[name] for name in names]
+        for attribute in ["initial_quality", "bulk_coeff", "wall_coeff"]:
+            values = arrays["pipe_" + attribute][run]
+            for i in np.flatnonzero(~np.isnan(values)):
+                setattr(pipes[i], "_" + attribute, float(values[i]))
+        _set_strings(pipes, "_tag", arrays, "pipe_tag", run)
+
+    _add_sources_from_dict(wn, header["sources"])
+    _add_controls_from_dict(wn, header["controls"])
+    return wn
+
+
+def _is_bulk_junction(node):
+    """True if all the attributes of a node can be stored in the junction arrays of a snapshot"""
+    if type(node) is not Junction or len(node._demand_timeseries_list) != 1:
+        return False
+    if not (node._tag is None or isinstance(node._tag, str)):
+        return False
+    demand = node._demand_timeseries_list[0]
+    if not (demand._category is None or isinstance(demand._category, str)):
+        return False
+    # Custom attributes are the only attributes without a leading underscore
+    return all(key[0] == "_" for key in _attribute_names(node))
+
+
+def _is_bulk_pipe(link):
+    """True if all the attributes of a link can be stored in the pipe arrays of a snapshot"""
+    if type(link) is not Pipe or len(link._vertices) > 0:
+        return False
+    if not (link._tag is None or isinstance(link._tag, str)):
+        return False
+    return all(key[0] == "_" for key in _attribute_names(link))
+
+
+def _encode_strings(arrays, key, values):
+    """Store strings (or None) as integer codes (-1 for None) and an array of unique strings"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    arrays[key] = codes.astype(np.int64)
+    arrays[key + "_values"] = np.array(list(uniques), dtype=str)
+
+
+def _decode_strings(arrays, key, rows):
+    """List of the strings (or None) stored by _encode_strings"""
+    codes = arrays[key][rows]
+    uniques = np.append(arrays[key + "_values"].astype(object), None)
+    return uniques[codes].tolist()
+
+
+def _set_strings(elements, attribute, arrays, key, rows):
+    """Set an attribute to the strings stored by _encode_strings, skipping None"""
+    codes = arrays[key][rows]
+    uniques = arrays[key + "_values"].tolist()
+    for i in np.flatnonzero(codes >= 0):
+        setattr(elements[i], attribute, uniques[codes[i]])
+
+
+def _nan_to_none_list(values):
+    """List of floats with NaN values replaced by None"""
+    values = np.asarray(values, dtype=object)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def _mask_runs(mask):
+    """Start, stop and value of each run of equal values in a boolean array"""
+    mask = np.asarray(mask)
+    if len(mask) == 0:
+        return []
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(mask.astype(np.int8))) + 1, [len(mask)]])
+    return [(int(start), int(stop), bool(mask[start])) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _read_npz(filename, mmap_mode=None):
+    """
+    Dictionary of the arrays in an npz file, memory-mapping the arrays 
+    that are stored uncompressed if mmap_mode is not None
+    """
+    if mmap_mode is None or not isinstance(filename, (str, os.PathLike)):
+        with np.load(filename) as npz:
+            return {key: npz[key] for key in npz.files}
+    arrays = dict()
+    with zipfile.ZipFile(filename) as zf, open(filename, "rb") as f:
+        for info in zf.infolist():
+            key = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+                continue
+            # The array data follows the local file header and the npy header
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<26xHH", f.read(30))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject or int(np.prod(shape)) == 0:
+                with zf.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+                continue
+            arrays[key] = np.memmap(
+                filename, dtype=dtype, mode=mmap_mode, offset=f.tell(), shape=shape, 
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
 def write_inpfile(wn, filename: str, units=None, version: float = 2.2, 
                   force_coordinates: bool = False):
     """
@@ -490,8 +885,9 @@ def write_inpfile(wn, filename: str, units=None, version: float = 2.2,
     ----------
     wn : wntr WaterNetworkModel
         Water network model
-    filename : string
-        Name of the inp file.
+    filename : string or file-like
+        Name of the inp file, or a binary file-like object (such as an 
+        :class:`io.BytesIO`) to write the inp text to.
     units : str, int or FlowUnits
         Name of the units being written to the inp file.
     version : float, {2.0, **2.2**}
@@ -510,7 +906,7 @@ def write_inpfile(wn, filename: str, units=None, version: float = 2.2,
     wn._inpfile.write(filename, wn, units=units, version=version, force_coordinates=force_coordinates)
 
 
-def read_inpfile(filename, append=None):
+def read_inpfile(filename, append=None, fast=False):
     """
     Create or append a WaterNetworkModel from an EPANET INP file
 
@@ -521,6 +917,10 @@ def read_inpfile(filename, append=None):
     append : WaterNetworkModel or None, optional
         Existing WaterNetworkModel to append.  If None, a new WaterNetworkModel 
         is created.
+    fast : bool, optional
+        If True, junctions and pipes are parsed into column arrays and added 
+        to the model in bulk, see :meth:`~wntr.epanet.io.InpFile.read`. 
+        Default = False.
         
     Returns
     -------
@@ -528,7 +928,7 @@ def read_inpfile(filename, append=None):
     
     """
     inpfile = wntr.epanet.InpFile()
-    wn = inpfile.read(filename, wn=append)
+    wn = inpfile.read(filename, wn=append, fast=fast)
     wn._inpfile = inpfile
     
     return wn
@@ -2,21 +2,42 @@
 The wntr.network.model module includes methods to build a water network
 model.
 """
+import contextlib
+import copy
+import enum
+import gc
 import logging
+import operator
+import pickle
 from collections import OrderedDict
+from collections.abc import MutableMapping
+from io import BytesIO
+from itertools import chain, compress, repeat
 from typing import List, Union
 from warnings import warn
 
 import networkx as nx
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import six
 import wntr.epanet
 import wntr.network.io
 from wntr.utils.check_values import _check_float, _check_numeric_or_str, _check_str
 from wntr.utils.ordered_set import OrderedSet
 
-from .base import AbstractModel, Link, LinkStatus, Registry
+from .base import (
+    AbstractModel,
+    Link,
+    LinkStatus,
+    Node,
+    Registry,
+    _CopyOnWrite,
+    _element_state,
+    _journal_item,
+    _journal_setattr,
+    _journals,
+)
 from .controls import Control, Rule
 from .elements import (
     Curve,
@@ -46,6 +67,19 @@ from .io import read_inpfile
 logger = logging.getLogger(__name__)
 
 
+@contextlib.contextmanager
+def _gc_paused():
+    """Pause garbage collection, which would otherwise repeatedly scan the 
+    many new objects created by a bulk insertion"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 class WaterNetworkModel(AbstractModel):
     """
     Water network model class.
@@ -79,7 +113,8 @@ class WaterNetworkModel(AbstractModel):
         self._curve_reg._finalize_(self)
         self._sources._finalize_(self)
 
-        # NetworkX Graph to store the pipe connectivity and node coordinates
+        # Indexes of the pipe connectivity, rebuilt when the topology changes
+        self._topology_cache = dict()
 
         self._labels = None
 
@@ -141,6 +176,102 @@ class WaterNetworkModel(AbstractModel):
                     return False
         return True
 
+    def __reduce__(self):
+        """
+        Pickle the model from a compact state, see :func:`_model_state`
+        """
+        return (_model_from_state, (type(self), _model_state(self)))
+
+    def __deepcopy__(self, memo):
+        wn = _model_from_state(type(self), _model_state(self))
+        memo[id(self)] = wn
+        return wn
+
+    def __copy__(self):
+        # A shallow copy shares the registries with this model
+        wn = object.__new__(type(self))
+        wn.__dict__.update(self.__dict__)
+        return wn
+
+    def clone(self, cow=True):
+        """
+        Create a copy of the water network model for a scenario.
+
+        A copy-on-write clone shares the nodes, links, patterns, curves and 
+        demands of this model. An element of the clone is an object of the 
+        same class as the element of this model that only stores the 
+        attributes that are changed in the clone and reads the other 
+        attributes from the element of this model, so elements are not copied 
+        when they are read, for example by a simulator or when the clone is 
+        written to an INP file. Elements that are added or removed are only 
+        recorded in the clone. The clone can be used like any other model, for 
+        example by both simulators. Options, controls and sources are copied.
+
+        Reading the attributes of an element of the clone is slower than 
+        reading those of an element of a full copy, so a full copy can be 
+        faster for a scenario that is simulated many times.
+
+        .. warning::
+            The elements of this model must not be changed while its 
+            copy-on-write clones are in use, because the clones read the 
+            attributes they did not change from this model. Clones of a clone 
+            are possible.
+
+        Parameters
+        ----------
+        cow : bool
+            If True (default), create a copy-on-write clone. If False, create 
+            a full copy (same as ``copy.deepcopy``).
+
+        Returns
+        -------
+        WaterNetworkModel
+        """
+        if not cow:
+            return copy.deepcopy(self)
+        return _cow_clone(self)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Context manager that rolls back all changes made to the model within 
+        the block when the block exits.
+
+        Within the block, an undo journal records the previous value of each 
+        attribute of the model, its elements (nodes, links, patterns, curves, 
+        demands and sources) and its options that is set, and the elements, 
+        controls and sources that are added or removed. When the block exits, 
+        normally or with an exception, the recorded changes are reverted, 
+        which also restores the simulation state of the elements. The cost of 
+        a transaction depends on the number of changes rather than on the 
+        size of the model. Transactions can be nested.
+
+        .. warning::
+            Changes made in place to mutable attribute values, such as the 
+            multipliers of a pattern, the points of a curve or the attributes 
+            of a control, are not recorded. Assign a new value instead.
+
+        Examples
+        --------
+        >>> for pipe_name in wn.pipe_name_list: # doctest: +SKIP
+        ...     with wn.transaction():
+        ...         wn.get_link(pipe_name).initial_status = 'CLOSED'
+        ...         results = wntr.sim.EpanetSimulator(wn).run_sim()
+        """
+        journal = _Journal(self)
+        if not _journals:
+            for cls in _JOURNAL_CLASSES:
+                cls.__setattr__ = _journal_setattr
+        _journals.append(journal)
+        try:
+            yield self
+        finally:
+            _journals.remove(journal)
+            if not _journals:
+                for cls in _JOURNAL_CLASSES:
+                    del cls.__setattr__
+            journal.undo()
+
     @property
     def _shifted_time(self):
         """
@@ -322,6 +453,32 @@ class WaterNetworkModel(AbstractModel):
         """Iterator over all general purpose valves (GPVs)"""
         return self._link_reg.gpvs
 
+    def element_arrays(self, element_type):
+        """
+        Array access to the attributes of all elements of one type
+
+        Parameters
+        ----------
+        element_type : type or str
+            Element class, or its name, for example ``Pipe`` or ``'Pipe'``
+
+        Returns
+        -------
+        ElementArrays
+            Elements of the type, with each public attribute available as an 
+            :class:`~wntr.network.model.AttributeColumn`, for example 
+            ``wn.element_arrays('Pipe').diameter[:]``
+        """
+        if isinstance(element_type, str):
+            classes = {cls.__name__: cls for cls in _ELEMENT_ARRAYS}
+            if element_type not in classes:
+                raise ValueError("Unknown element type '{}'".format(element_type))
+            element_type = classes[element_type]
+        if element_type not in _ELEMENT_ARRAYS:
+            raise ValueError("Unknown element type {}".format(element_type))
+        registry, kind = _ELEMENT_ARRAYS[element_type]
+        return ElementArrays(getattr(self, registry), kind, element_type)
+
     @property
     def msx(self):
         """A multispecies water quality model, if defined"""
@@ -568,6 +725,102 @@ class WaterNetworkModel(AbstractModel):
             name, start_node_name, end_node_name, diameter, valve_type, minor_loss, initial_setting, initial_status
         )
 
+    def add_junctions(self, data):
+        """
+        Adds many junctions to the water network model at once
+
+        Values are validated for all junctions before any junction is added,
+        and the junctions are built and registered in one pass, which is 
+        much faster than calling :meth:`add_junction` for each junction.
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Junction attributes with one column (or dictionary entry) per 
+            :meth:`add_junction` argument, for example ``name``, 
+            ``base_demand``, ``demand_pattern`` and ``elevation``. A 
+            dictionary entry can also be a single value used for all 
+            junctions. Missing columns use the :meth:`add_junction` defaults. 
+            If a DataFrame has no ``name`` column, the index is used as the 
+            names.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> import wntr
+        >>> wn = wntr.network.WaterNetworkModel()
+        >>> wn.add_junctions(pd.DataFrame({'elevation': [10.0, 12.5], 'base_demand': 0.01}, index=['J1', 'J2']))
+        >>> wn.junction_name_list
+        ['J1', 'J2']
+        """
+        self._node_reg.add_junctions(**_bulk_data(data))
+
+    def add_tanks(self, data):
+        """
+        Adds many tanks to the water network model at once
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Tank attributes with one column (or dictionary entry) per 
+            :meth:`add_tank` argument, see :meth:`add_junctions`
+        """
+        self._node_reg.add_tanks(**_bulk_data(data))
+
+    def add_reservoirs(self, data):
+        """
+        Adds many reservoirs to the water network model at once
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Reservoir attributes with one column (or dictionary entry) per 
+            :meth:`add_reservoir` argument, see :meth:`add_junctions`
+        """
+        self._node_reg.add_reservoirs(**_bulk_data(data))
+
+    def add_pipes(self, data):
+        """
+        Adds many pipes to the water network model at once
+
+        Values are validated for all pipes before any pipe is added, and the 
+        pipes are built and registered in one pass, which is much faster than 
+        calling :meth:`add_pipe` for each pipe.
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Pipe attributes with one column (or dictionary entry) per 
+            :meth:`add_pipe` argument, for example ``name``, 
+            ``start_node_name``, ``end_node_name``, ``length``, ``diameter`` 
+            and ``roughness``, see :meth:`add_junctions`
+        """
+        self._link_reg.add_pipes(**_bulk_data(data))
+
+    def add_pumps(self, data):
+        """
+        Adds many pumps to the water network model at once
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Pump attributes with one column (or dictionary entry) per 
+            :meth:`add_pump` argument, see :meth:`add_junctions`
+        """
+        self._link_reg.add_pumps(**_bulk_data(data))
+
+    def add_valves(self, data):
+        """
+        Adds many valves to the water network model at once
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict
+            Valve attributes with one column (or dictionary entry) per 
+            :meth:`add_valve` argument, see :meth:`add_junctions`
+        """
+        self._link_reg.add_valves(**_bulk_data(data))
+
     def add_pattern(self, name, pattern=None):
         """
         Adds a pattern to the water network model
@@ -674,6 +927,8 @@ class WaterNetworkModel(AbstractModel):
             raise ValueError(
                 "The name provided for the control is already used. Please either remove the control with that name first or use a different name for this control."
             )
+        if _journals:
+            _journal_item(self._controls, name)
         self._controls[name] = control_object
 
     ### #
@@ -758,6 +1013,8 @@ class WaterNetworkModel(AbstractModel):
 
     def remove_control(self, name):
         """Removes a control from the water network model"""
+        if _journals:
+            _journal_item(self._controls, name, remove=True)
         del self._controls[name]
 
     def _discard_control(self, name):
@@ -770,6 +1027,8 @@ class WaterNetworkModel(AbstractModel):
         name : string
            The name of the control object to be removed.
         """
+        if _journals:
+            _journal_item(self._controls, name, remove=True)
         try:
             del self._controls[name]
         except KeyError:
@@ -1289,6 +1548,67 @@ class WaterNetworkModel(AbstractModel):
         """
         return wntr.network.io.to_graph(self, node_weight, link_weight, 
                                         modify_direction)
+
+    def graph_view(self):
+        """
+        Returns a cached, read-only networkx MultiDiGraph of the model
+        
+        The graph is the unweighted graph returned by :meth:`to_graph`. It 
+        is built when first needed and reused until nodes or links are added 
+        or removed, or links are connected to other nodes. Node coordinates 
+        are updated on each call. The graph is frozen, use :meth:`to_graph` 
+        (or ``networkx.MultiDiGraph(G)``) to get a graph that can be modified.
+        
+        Returns
+        --------
+        networkx MultiDiGraph
+        """
+        G = self._topology("graph", lambda: nx.freeze(wntr.network.io.to_graph(self)))
+        # Coordinates can change without a change in topology
+        with _gc_paused():
+            nodes = self._node_reg._data
+            positions = dict(zip(nodes.keys(), map(operator.attrgetter("coordinates"), nodes.values())))
+        nx.set_node_attributes(G, positions, "pos")
+        return G
+
+    def incidence_matrix(self):
+        """
+        Returns the node-link incidence matrix of the network
+        
+        Rows are nodes and columns are links, numbered as in 
+        :meth:`node_link_index` (the order of ``node_name_list`` and 
+        ``link_name_list``). Each link has -1 in the row of its start node 
+        and 1 in the row of its end node. The matrix is cached until the 
+        topology changes and a copy is returned.
+        
+        Returns
+        --------
+        scipy.sparse.csr_matrix
+        """
+        return self._topology("incidence_matrix", lambda: _incidence_matrix(self.node_link_index())).copy()
+
+    def adjacency_csr(self, directed=True):
+        """
+        Returns the node adjacency matrix of the network
+        
+        Rows and columns are nodes, numbered as in :meth:`node_link_index` 
+        (the order of ``node_name_list``). If directed, entry (i, j) is the 
+        number of links that start at node i and end at node j. Otherwise 
+        entries (i, j) and (j, i) are both the number of links between 
+        nodes i and j. The matrix is cached until the topology changes and 
+        a copy is returned.
+        
+        Parameters
+        ----------
+        directed : bool (optional)
+            If True (default), use the link direction
+        
+        Returns
+        --------
+        scipy.sparse.csr_matrix
+        """
+        key = "adjacency" if directed else "undirected_adjacency"
+        return self._topology(key, lambda: _adjacency_csr(self.node_link_index(), directed)).copy()
                                         
                                
     def get_graph(self, node_weight=None, link_weight=None, modify_direction=False):
@@ -1379,33 +1699,51 @@ class WaterNetworkModel(AbstractModel):
         -------
         A list of link names connected to the node
         """
-        link_types = {"Pipe", "Pump", "Valve"}
+        # The node usage lists the links connected to each node and is kept 
+        # up to date as links are added, removed, or reconnected
         link_data = self._node_reg.get_usage(node_name)
         if link_data is None:
             return []
-        else:
-            if flag.upper() == "ALL":
-                return [
-                    link_name
-                    for link_name, link_type in link_data
-                    if link_type in link_types
-                    and node_name in {self.get_link(link_name).start_node_name, self.get_link(link_name).end_node_name}
-                ]
-            elif flag.upper() == "INLET":
-                return [
-                    link_name
-                    for link_name, link_type in link_data
-                    if link_type in link_types and node_name == self.get_link(link_name).end_node_name
-                ]
-            elif flag.upper() == "OUTLET":
-                return [
-                    link_name
-                    for link_name, link_type in link_data
-                    if link_type in link_types and node_name == self.get_link(link_name).start_node_name
-                ]
-            else:
-                logger.error("Unrecognized flag: {0}".format(flag))
-                raise ValueError("Unrecognized flag: {0}".format(flag))
+        flag = flag.upper()
+        if flag not in ("ALL", "INLET", "OUTLET"):
+            logger.error("Unrecognized flag: {0}".format(flag))
+            raise ValueError("Unrecognized flag: {0}".format(flag))
+        inlet = flag != "OUTLET"
+        outlet = flag != "INLET"
+        links = self._link_reg._data
+        link_names = []
+        for link_name, link_type in link_data:
+            if link_type not in {"Pipe", "Pump", "Valve"}:
+                continue
+            link = links[link_name]
+            if (inlet and link._end_node.name == node_name) or (outlet and link._start_node.name == node_name):
+                link_names.append(link_name)
+        return link_names
+
+    def node_link_index(self):
+        """
+        Returns an index of the links connected to each node.
+
+        The index is built when first needed and cached until nodes or links 
+        are added or removed, or links are connected to other nodes.
+
+        Returns
+        -------
+        :class:`~wntr.network.model.NodeLinkIndex`
+        """
+        return self._topology("node_link_index", lambda: NodeLinkIndex(self))
+
+    def _topology(self, key, build):
+        """Get a cached index of the pipe connectivity, rebuilding the cache 
+        if the topology changed since it was built"""
+        cache = self.__dict__.setdefault("_topology_cache", dict())
+        version = self._node_reg._topology_version
+        if cache.get("version") != version:
+            cache.clear()
+            cache["version"] = version
+        if key not in cache:
+            cache[key] = build()
+        return cache[key]
 
     def query_node_attribute(self, attribute, operation=None, value=None, node_type=None):
         """
@@ -1446,18 +1784,7 @@ class WaterNetworkModel(AbstractModel):
         for all nodes with the specified attribute.
 
         """
-        node_attribute_dict = {}
-        for name, node in self.nodes(node_type):
-            try:
-                if operation == None and value == None:
-                    node_attribute_dict[name] = getattr(node, attribute)
-                else:
-                    node_attribute = getattr(node, attribute)
-                    if operation(node_attribute, value):
-                        node_attribute_dict[name] = node_attribute
-            except AttributeError:
-                pass
-        return pd.Series(node_attribute_dict)
+        return _query_attribute(self._node_reg, node_type, attribute, operation, value)
 
     def query_link_attribute(self, attribute, operation=None, value=None, link_type=None):
         """
@@ -1498,18 +1825,54 @@ class WaterNetworkModel(AbstractModel):
         for all links with the specified attribute.
 
         """
-        link_attribute_dict = {}
-        for name, link in self.links(link_type):
-            try:
-                if operation == None and value == None:
-                    link_attribute_dict[name] = getattr(link, attribute)
-                else:
-                    link_attribute = getattr(link, attribute)
-                    if operation(link_attribute, value):
-                        link_attribute_dict[name] = link_attribute
-            except AttributeError:
-                pass
-        return pd.Series(link_attribute_dict)
+        return _query_attribute(self._link_reg, link_type, attribute, operation, value)
+
+    def get_attributes(self, attributes, element_type=Link):
+        """
+        Get several attributes of all nodes or links in a single pass.
+
+        Parameters
+        ----------
+        attributes: list of str
+            Node or link attributes, for example ['diameter', 'length', 'roughness']
+
+        element_type: Node or Link type
+            Type of the elements, options include
+            :class:`~wntr.network.base.Node`,
+            :class:`~wntr.network.elements.Junction`,
+            :class:`~wntr.network.elements.Reservoir`,
+            :class:`~wntr.network.elements.Tank`,
+            :class:`~wntr.network.base.Link`,
+            :class:`~wntr.network.elements.Pipe`,
+            :class:`~wntr.network.elements.Pump`, or
+            :class:`~wntr.network.elements.Valve`. Default = Link.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame` indexed by element name with one column per attribute.
+        Elements that do not have an attribute have a NaN value in that column.
+
+        """
+        if isinstance(attributes, str):
+            attributes = [attributes]
+        attributes = list(attributes)
+        if isinstance(element_type, type) and issubclass(element_type, Node):
+            names, elements = _typed_elements(self._node_reg, None if element_type is Node else element_type)
+        elif isinstance(element_type, type) and issubclass(element_type, Link):
+            names, elements = _typed_elements(self._link_reg, None if element_type is Link else element_type)
+        else:
+            raise RuntimeError("element_type, " + str(element_type) + ", not recognized.")
+
+        columns = OrderedDict()
+        with _gc_paused():
+            for attribute in attributes:
+                getter = operator.attrgetter(attribute)
+                try:
+                    values = list(map(getter, elements))
+                except AttributeError:
+                    values = [_get_or_default(getter, element) for element in elements]
+                columns[attribute] = values
+        return pd.DataFrame(columns, index=pd.Index(names), columns=attributes)
 
     def convert_controls_to_rules(self, priority=3):
         """
@@ -1694,6 +2057,8 @@ class CurveRegistry(Registry):
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError("Registry keys must be strings")
+        if _journals:
+            self._journal(key)
         self._data[key] = value
         if value is not None:
             self.set_curve_type(key, value.curve_type)
@@ -1858,7 +2223,9 @@ class SourceRegistry(Registry):
                 raise RuntimeError(
                     "cannot remove %s %s, still used by %s" % (self.__class__.__name__, key, self._usage[key])
                 )
-            elif key in self._usage:
+            if _journals:
+                self._journal(key, remove=True)
+            if key in self._usage:
                 self._usage.pop(key)
             source = self._data.pop(key)
             self._pattern_reg.remove_usage(source.strength_timeseries.pattern_name, (source.name, "Source"))
@@ -1877,6 +2244,8 @@ class NodeRegistry(Registry):
         self._junctions = OrderedSet()
         self._reservoirs = OrderedSet()
         self._tanks = OrderedSet()
+        # Incremented when the nodes or the link connections change
+        self._topology_version = 0
 
     def _finalize_(self, model):
         super()._finalize_(model)
@@ -1885,7 +2254,10 @@ class NodeRegistry(Registry):
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError("Registry keys must be strings")
+        if _journals:
+            self._journal(key)
         self._data[key] = value
+        self._topology_version += 1
         if isinstance(value, Junction):
             self._junctions.add(key)
         elif isinstance(value, Tank):
@@ -1899,9 +2271,12 @@ class NodeRegistry(Registry):
                 raise RuntimeError(
                     "cannot remove %s %s, still used by %s" % (self.__class__.__name__, key, str(self._usage[key]))
                 )
-            elif key in self._usage:
+            if _journals:
+                self._journal(key, remove=True)
+            if key in self._usage:
                 self._usage.pop(key)
             node = self._data.pop(key)
+            self._topology_version += 1
             self._junctions.discard(key)
             self._reservoirs.discard(key)
             self._tanks.discard(key)
@@ -1917,6 +2292,16 @@ class NodeRegistry(Registry):
         except KeyError:
             return
 
+    def add_usage(self, key, *args):
+        """add args to usage[key]"""
+        super().add_usage(key, *args)
+        self._topology_version += 1
+
+    def remove_usage(self, key, *args):
+        """remove args from usage[key]"""
+        super().remove_usage(key, *args)
+        self._topology_version += 1
+
     def __call__(self, node_type=None):
         """
         Returns a generator to iterate over all nodes of a specific node type.
@@ -2010,6 +2395,113 @@ class NodeRegistry(Registry):
         if initial_quality is not None:
             junction.initial_quality = initial_quality
 
+    @_gc_paused()
+    def add_junctions(
+        self,
+        name,
+        base_demand=0.0,
+        demand_pattern=None,
+        elevation=0.0,
+        coordinates=None,
+        demand_category=None,
+        emitter_coeff=None,
+        initial_quality=None,
+    ):
+        """
+        Adds many junctions to the water network model at once.
+
+        Each argument is either one value per junction or a single value 
+        used for all junctions, see :meth:`add_junction`. Values are 
+        validated for all junctions before any junction is added. Junctions 
+        are created by copying the attributes of a prototype junction and the 
+        pattern usage is updated once per pattern.
+
+        Parameters
+        ----------
+        name : list of str
+            Names of the junctions.
+        base_demand : float or array-like of float
+            Base demand at each junction.
+        demand_pattern : str, Pattern, or list of str or Pattern
+            Name of the demand pattern at each junction (None for the default 
+            pattern).
+        elevation : float or array-like of float
+            Elevation of each junction.
+        coordinates : list of tuples of floats, optional
+            X-Y coordinates of each junction.
+        demand_category : str or list of str, optional
+            Category of the **base** demand at each junction
+        emitter_coeff : float or list of float, optional
+            Emitter coefficient of each junction
+        initial_quality : float or list of float, optional
+            Initial quality at each junction
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        """
+        names = _check_bulk_names(name, self._data, "node")
+        n = len(names)
+        if n == 0:
+            return
+        base_demand = _check_bulk_float(base_demand, n, "base_demand").tolist()
+        elevation = _check_bulk_float(elevation, n, "elevation").tolist()
+        demand_pattern = _bulk_column(demand_pattern, n, "demand_pattern")
+        for pattern in demand_pattern:
+            assert isinstance(
+                pattern, (type(None), str, PatternRegistry.DefaultPattern, Pattern)
+            ), "demand_pattern must be a string or Pattern"
+        coordinates = _check_bulk_coordinates(coordinates, n)
+        demand_category = [
+            None if category is None else _check_str(category, "demand_category")
+            for category in _bulk_column(demand_category, n, "demand_category")
+        ]
+        emitter_coeff = [
+            _check_float(value, "emitter_coeff", allow_none=True)
+            for value in _bulk_column(emitter_coeff, n, "emitter_coeff")
+        ]
+        initial_quality = [
+            _check_float(value, "initial_quality", allow_none=True)
+            for value in _bulk_column(initial_quality, n, "initial_quality")
+        ]
+
+        if _journals:
+            for name in names:
+                self._journal(name)
+        default_pattern = self._pattern_reg.default_pattern
+        pattern_usage = OrderedDict()
+        prototype = Junction(names[0], self).__dict__
+        for i, name in enumerate(names):
+            attributes = prototype.copy()
+            attributes["_name"] = name
+            attributes["_elevation"] = elevation[i]
+            attributes["_coordinates"] = [0, 0] if coordinates[i] is None else coordinates[i]
+            attributes["_emitter_coefficient"] = emitter_coeff[i]
+            attributes["_initial_quality"] = initial_quality[i]
+            attributes["_leak_start_control_name"] = "junction" + name + "start_leak_control"
+            attributes["_leak_end_control_name"] = "junction" + name + "end_leak_control"
+            pattern = demand_pattern[i]
+            demands = Demands(self._pattern_reg)
+            demands._list.append(
+                TimeSeries(
+                    self._pattern_reg,
+                    base_demand[i],
+                    default_pattern if pattern is None else pattern,
+                    demand_category[i],
+                )
+            )
+            attributes["_demand_timeseries_list"] = demands
+            junction = object.__new__(Junction)
+            junction.__dict__ = attributes
+            self._data[name] = junction
+            if pattern is not None:
+                pattern_usage.setdefault(pattern, []).append((name, "Junction"))
+        self._junctions.update(names)
+        self._topology_version += 1
+        for pattern, users in pattern_usage.items():
+            self._pattern_reg.add_usage(pattern, *users)
+
     def add_tank(
         self,
         name,
@@ -2152,6 +2644,68 @@ class NodeRegistry(Registry):
         if coordinates is not None:
             reservoir.coordinates = coordinates
 
+    def add_tanks(
+        self,
+        name,
+        elevation=0.0,
+        init_level=3.048,
+        min_level=0.0,
+        max_level=6.096,
+        diameter=15.24,
+        min_vol=0.0,
+        vol_curve=None,
+        overflow=False,
+        coordinates=None,
+    ):
+        """
+        Adds many tanks to the water network model at once.
+
+        Each argument is either one value per tank or a single value used 
+        for all tanks, see :meth:`add_tank`. If a tank is invalid, none of 
+        the tanks are added.
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        """
+        names = _check_bulk_names(name, self._data, "node")
+        n = len(names)
+        columns = [
+            _bulk_column(elevation, n, "elevation"),
+            _bulk_column(init_level, n, "init_level"),
+            _bulk_column(min_level, n, "min_level"),
+            _bulk_column(max_level, n, "max_level"),
+            _bulk_column(diameter, n, "diameter"),
+            _bulk_column(min_vol, n, "min_vol"),
+            _bulk_column(vol_curve, n, "vol_curve"),
+            _bulk_column(overflow, n, "overflow"),
+            _check_bulk_coordinates(coordinates, n),
+        ]
+        _add_each(self, self.add_tank, names, columns)
+
+    def add_reservoirs(self, name, base_head=0.0, head_pattern=None, coordinates=None):
+        """
+        Adds many reservoirs to the water network model at once.
+
+        Each argument is either one value per reservoir or a single value 
+        used for all reservoirs, see :meth:`add_reservoir`. If a reservoir is 
+        invalid, none of the reservoirs are added.
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        """
+        names = _check_bulk_names(name, self._data, "node")
+        n = len(names)
+        columns = [
+            _bulk_column(base_head, n, "base_head"),
+            _bulk_column(head_pattern, n, "head_pattern"),
+            _check_bulk_coordinates(coordinates, n),
+        ]
+        _add_each(self, self.add_reservoir, names, columns)
+
     @property
     def junction_names(self):
         """List of names of all junctions"""
@@ -2248,7 +2802,10 @@ class LinkRegistry(Registry):
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError("Registry keys must be strings")
+        if _journals:
+            self._journal(key)
         self._data[key] = value
+        self._node_reg._topology_version += 1
         if isinstance(value, Pipe):
             self._pipes.add(key)
         elif isinstance(value, Pump):
@@ -2278,7 +2835,9 @@ class LinkRegistry(Registry):
                 raise RuntimeError(
                     "cannot remove %s %s, still used by %s", self.__class__.__name__, key, self._usage[key]
                 )
-            elif key in self._usage:
+            if _journals:
+                self._journal(key, remove=True)
+            if key in self._usage:
                 self._usage.pop(key)
             link = self._data.pop(key)
             self._node_reg.remove_usage(link.start_node_name, (link.name, link.link_type))
@@ -2397,6 +2956,126 @@ class LinkRegistry(Registry):
         pipe.check_valve = check_valve
         self[name] = pipe
 
+    @_gc_paused()
+    def add_pipes(
+        self,
+        name,
+        start_node_name,
+        end_node_name,
+        length=304.8,
+        diameter=0.3048,
+        roughness=100,
+        minor_loss=0.0,
+        initial_status="OPEN",
+        check_valve=False,
+    ):
+        """
+        Adds many pipes to the water network model at once.
+
+        Each argument is either one value per pipe or a single value used 
+        for all pipes, see :meth:`add_pipe`. Values are validated for all 
+        pipes before any pipe is added. The first pipe is created with the 
+        Pipe constructor and the others by copying its attributes, and the 
+        node usage is updated in a single pass.
+
+        Parameters
+        ----------
+        name : list of str
+            Names of the pipes.
+        start_node_name : list of str
+             Names of the start nodes.
+        end_node_name : list of str
+             Names of the end nodes.
+        length : float or array-like of float
+            Length of each pipe.
+        diameter : float or array-like of float
+            Diameter of each pipe.
+        roughness : float or array-like of float
+            Roughness coefficient of each pipe.
+        minor_loss : float or array-like of float
+            Minor loss coefficient of each pipe.
+        initial_status : str, LinkStatus, or list of str or LinkStatus
+            Initial status of each pipe. Options are 'OPEN' or 'CLOSED'.
+        check_valve : bool or list of bool
+            True for each pipe that has a check valve.
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        KeyError
+            If a start or end node does not exist
+        """
+        names = _check_bulk_names(name, self._data, "link")
+        n = len(names)
+        if n == 0:
+            return
+        start_node_name, start_nodes = _check_bulk_nodes(start_node_name, n, self._node_reg)
+        end_node_name, end_nodes = _check_bulk_nodes(end_node_name, n, self._node_reg)
+
+        length = _check_bulk_float(length, n, "length")
+        diameter = _check_bulk_float(diameter, n, "diameter")
+        roughness = _check_bulk_float(roughness, n, "roughness")
+        minor_loss = _check_bulk_float(minor_loss, n, "minor_loss")
+        if (length < 0).any():
+            raise ValueError("Pipe length must not be negative")
+        if not (diameter > 0).all():
+            raise ValueError("Pipe diameter must be greater than zero")
+        if not (roughness > 0).all():
+            raise ValueError("Pipe roughness must be greater than zero")
+        if (minor_loss < 0).any():
+            raise ValueError("Pipe minor loss must not be negative")
+        initial_status = [
+            status if isinstance(status, LinkStatus) else
+            LinkStatus[status] if isinstance(status, str) else LinkStatus(status)
+            for status in _bulk_column(initial_status, n, "initial_status")
+        ]
+        check_valve = [
+            value if value is True or value is False else _check_bulk_check_valve(value)
+            for value in _bulk_column(check_valve, n, "check_valve")
+        ]
+
+        length = length.tolist()
+        diameter = diameter.tolist()
+        roughness = roughness.tolist()
+        minor_loss = minor_loss.tolist()
+
+        # Build the first pipe with the constructor and use it as a prototype
+        if _journals:
+            for name in names:
+                self._journal(name)
+            for node_name in chain(start_node_name, end_node_name):
+                self._node_reg._journal(node_name)
+        pipe = Pipe(names[0], start_node_name[0], end_node_name[0], self)
+        prototype = pipe.__dict__
+        node_usage = self._node_reg._usage
+        for i, name in enumerate(names):
+            if i > 0:
+                attributes = prototype.copy()
+                attributes["_link_name"] = name
+                attributes["_start_node"] = start_nodes[i]
+                attributes["_end_node"] = end_nodes[i]
+                attributes["_vertices"] = []
+                pipe = object.__new__(Pipe)
+                pipe.__dict__ = attributes
+                usage = (name, "Pipe")
+                for node_name in (start_node_name[i], end_node_name[i]):
+                    if node_name in node_usage:
+                        node_usage[node_name].add(usage)
+                    else:
+                        node_usage[node_name] = OrderedSet([usage])
+            attributes = pipe.__dict__
+            attributes["_length"] = length[i]
+            attributes["_diameter"] = diameter[i]
+            attributes["_roughness"] = roughness[i]
+            attributes["_minor_loss"] = minor_loss[i]
+            attributes["_initial_status"] = initial_status[i]
+            attributes["_user_status"] = initial_status[i]
+            attributes["_check_valve"] = check_valve[i]
+            self._data[name] = pipe
+        self._pipes.update(names)
+        self._node_reg._topology_version += 1
+
     def add_pump(
         self,
         name,
@@ -2576,6 +3255,82 @@ class LinkRegistry(Registry):
         valve.minor_loss = minor_loss
         self[name] = valve
 
+    def add_pumps(
+        self,
+        name,
+        start_node_name,
+        end_node_name,
+        pump_type="POWER",
+        pump_parameter=50.0,
+        speed=1.0,
+        pattern=None,
+        initial_status="OPEN",
+    ):
+        """
+        Adds many pumps to the water network model at once.
+
+        Each argument is either one value per pump or a single value used 
+        for all pumps, see :meth:`add_pump`. If a pump is invalid, none of 
+        the pumps are added.
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        KeyError
+            If a start or end node does not exist
+        """
+        names = _check_bulk_names(name, self._data, "link")
+        n = len(names)
+        columns = [
+            _check_bulk_nodes(start_node_name, n, self._node_reg)[0],
+            _check_bulk_nodes(end_node_name, n, self._node_reg)[0],
+            _bulk_column(pump_type, n, "pump_type"),
+            _bulk_column(pump_parameter, n, "pump_parameter"),
+            _bulk_column(speed, n, "speed"),
+            _bulk_column(pattern, n, "pattern"),
+            _bulk_column(initial_status, n, "initial_status"),
+        ]
+        _add_each(self, self.add_pump, names, columns)
+
+    def add_valves(
+        self,
+        name,
+        start_node_name,
+        end_node_name,
+        diameter=0.3048,
+        valve_type="PRV",
+        minor_loss=0.0,
+        initial_setting=0.0,
+        initial_status="ACTIVE",
+    ):
+        """
+        Adds many valves to the water network model at once.
+
+        Each argument is either one value per valve or a single value used 
+        for all valves, see :meth:`add_valve`. If a valve is invalid, none 
+        of the valves are added.
+
+        Raises
+        ------
+        ValueError
+            If a name is already used or a value is invalid
+        KeyError
+            If a start or end node does not exist
+        """
+        names = _check_bulk_names(name, self._data, "link")
+        n = len(names)
+        columns = [
+            _check_bulk_nodes(start_node_name, n, self._node_reg)[0],
+            _check_bulk_nodes(end_node_name, n, self._node_reg)[0],
+            _bulk_column(diameter, n, "diameter"),
+            _bulk_column(valve_type, n, "valve_type"),
+            _bulk_column(minor_loss, n, "minor_loss"),
+            _bulk_column(initial_setting, n, "initial_setting"),
+            _bulk_column(initial_status, n, "initial_status"),
+        ]
+        _add_each(self, self.add_valve, names, columns)
+
     def check_valves(self):
         """Generator to get all pipes with check valves
         
@@ -2800,3 +3555,1171 @@ class LinkRegistry(Registry):
         for name in self._gpvs:
             yield name, self._data[name]
 
+
+# Registry and generator name of the element types of 
+# WaterNetworkModel.element_arrays
+_ELEMENT_ARRAYS = {
+    Junction: ("_node_reg", "junctions"),
+    Tank: ("_node_reg", "tanks"),
+    Reservoir: ("_node_reg", "reservoirs"),
+    Pipe: ("_link_reg", "pipes"),
+    Pump: ("_link_reg", "pumps"),
+    Valve: ("_link_reg", "valves"),
+    HeadPump: ("_link_reg", "head_pumps"),
+    PowerPump: ("_link_reg", "power_pumps"),
+    PRValve: ("_link_reg", "prvs"),
+    PSValve: ("_link_reg", "psvs"),
+    PBValve: ("_link_reg", "pbvs"),
+    TCValve: ("_link_reg", "tcvs"),
+    FCValve: ("_link_reg", "fcvs"),
+    GPValve: ("_link_reg", "gpvs"),
+}
+
+
+class ElementArrays(object):
+    """
+    The elements of one type, with array access to their attributes, see 
+    :meth:`WaterNetworkModel.element_arrays`.
+
+    Calling the object yields (name, element) pairs, as the registry 
+    generators do. Any public attribute of the element class is available 
+    as an :class:`AttributeColumn`. For example, with 
+    ``pipes = wn.element_arrays('Pipe')``, ``pipes.diameter[:]`` gets the 
+    diameter of all pipes as a NumPy array and ``pipes.roughness[:] = 100`` 
+    sets the roughness of all pipes.
+
+    This is an accessor over the element objects, not a columnar store: 
+    the attributes are still stored in each element, so it does not reduce 
+    the memory used by the model and reading or setting a column costs 
+    about the same as a loop over the elements.
+
+    Parameters
+    ----------
+    registry : NodeRegistry or LinkRegistry
+        Registry holding the elements
+    kind : str
+        Name of the registry generator, for example 'pipes'
+    element_class : type
+        Class of the elements, used to check attribute names
+    """
+
+    def __init__(self, registry, kind, element_class):
+        self._registry = registry
+        self._kind = kind
+        self._element_class = element_class
+
+    def __call__(self):
+        return getattr(self._registry, self._kind)()
+
+    def __len__(self):
+        return len(getattr(self._registry, "_" + self._kind))
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("_") or not isinstance(getattr(self._element_class, attribute, None), property):
+            raise AttributeError(
+                "{} has no attribute '{}'".format(self._element_class.__name__, attribute)
+            )
+        return AttributeColumn(self._registry, getattr(self._registry, "_" + self._kind), attribute)
+
+    def __dir__(self):
+        attributes = [name for name in dir(self._element_class) 
+                      if not name.startswith("_") and isinstance(getattr(self._element_class, name), property)]
+        return sorted(set(object.__dir__(self)) | set(attributes))
+
+    def __repr__(self):
+        return "<ElementArrays '{}' ({} elements)>".format(self._kind, len(self))
+
+
+def _column_array(values):
+    """Convert attribute values to a 1-D array, numeric where possible"""
+    try:
+        array = np.array(values)
+    except ValueError:
+        array = None
+    if (
+        array is None
+        or array.ndim != 1
+        or array.dtype.kind not in "biuf"
+        or (len(values) > 0 and isinstance(values[0], enum.Enum))
+    ):
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+    return array
+
+
+_MISSING = object()
+
+_TYPE_SUBSETS = {
+    Junction: "_junctions",
+    Tank: "_tanks",
+    Reservoir: "_reservoirs",
+    Pipe: "_pipes",
+    Pump: "_pumps",
+    Valve: "_valves",
+}
+
+
+def _typed_elements(registry, element_type):
+    """Names and objects of the elements that calling the registry with 
+    the element type yields, without a generator step per element"""
+    with _gc_paused():
+        if element_type == None:
+            return list(registry._data.keys()), list(registry._data.values())
+        subset = _TYPE_SUBSETS.get(element_type)
+        if subset is None or not hasattr(registry, subset):
+            # Raises the registry error for types it does not recognize
+            items = list(registry(element_type))
+            return [name for name, element in items], [element for name, element in items]
+        names = list(getattr(registry, subset))
+        return names, list(map(registry._data.__getitem__, names))
+
+
+def _query_attribute(registry, element_type, attribute, operation, value):
+    """Get an attribute of the elements that have it, keeping the values 
+    that satisfy the operation (applied to all values at once if it 
+    supports arrays)"""
+    getter = operator.attrgetter(attribute)
+    names, elements = _typed_elements(registry, element_type)
+    with _gc_paused():
+        try:
+            values = list(map(getter, elements))
+        except AttributeError:
+            # Skip the elements that do not have the attribute
+            values = [_get_or_default(getter, element, _MISSING) for element in elements]
+            keep = [v is not _MISSING for v in values]
+            names = list(compress(names, keep))
+            values = list(compress(values, keep))
+    if not (operation == None and value == None):
+        mask = None
+        try:
+            mask = np.asarray(operation(_column_array(values), value))
+        except (TypeError, ValueError):
+            pass
+        if mask is None or mask.shape != (len(values),) or mask.dtype != bool:
+            mask = [bool(operation(v, value)) for v in values]
+        names = list(compress(names, mask))
+        values = list(compress(values, mask))
+    return pd.Series(dict(zip(names, values)))
+
+
+def _get_or_default(getter, element, default=np.nan):
+    try:
+        return getter(element)
+    except AttributeError:
+        return default
+
+
+class AttributeColumn(object):
+    """
+    One attribute of all elements of one type, indexed like a NumPy array.
+
+    Elements are in the order of the registry, for example 
+    ``wn.pipe_name_list``. Indexing returns a NumPy array (a float, integer 
+    or bool array for numeric attributes, an object array otherwise) and 
+    assigning sets the attribute of each selected element through its 
+    property, so values are checked and converted as for 
+    ``setattr(element, attribute, value)``. Use :meth:`to_series` to get the 
+    values indexed by element name.
+
+    The values are not stored in the column. Each read builds a new array 
+    from the elements and each assignment sets the elements one by one, so 
+    changes to the returned arrays do not change the model.
+
+    Parameters
+    ----------
+    registry : NodeRegistry or LinkRegistry
+        Registry holding the elements
+    names : OrderedSet
+        Names of the elements
+    attribute : str
+        Name of the attribute
+    """
+
+    def __init__(self, registry, names, attribute):
+        self._registry = registry
+        self._names = names
+        self._attribute = attribute
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return "<AttributeColumn '{}' ({} elements)>".format(self._attribute, len(self))
+
+    def __array__(self, dtype=None, copy=None):
+        values = self._values()
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __getitem__(self, index):
+        return self._values()[index]
+
+    def __setitem__(self, index, value):
+        names = list(self._names)
+        positions = np.atleast_1d(np.arange(len(names))[index])
+        if np.ndim(value) == 0:
+            values = repeat(value.item() if isinstance(value, np.generic) else value, len(positions))
+        else:
+            values = value.tolist() if isinstance(value, np.ndarray) else list(value)
+            if len(values) != len(positions):
+                raise ValueError(
+                    "Cannot set {} values of {} from {} values".format(len(positions), self._attribute, len(values))
+                )
+        data = self._registry._data
+        with _gc_paused():
+            for position, value in zip(positions.tolist(), values):
+                setattr(data[names[position]], self._attribute, value)
+
+    def _values(self):
+        with _gc_paused():
+            values = list(map(operator.attrgetter(self._attribute), map(self._registry._data.__getitem__, self._names)))
+        return _column_array(values)
+
+    def to_series(self):
+        """
+        Returns the values as a pandas Series indexed by element name.
+
+        Returns
+        -------
+        pandas Series
+        """
+        return pd.Series(self._values(), index=pd.Index(list(self._names)), name=self._attribute)
+
+
+class NodeLinkIndex(object):
+    """
+    Index of the links connected to each node, in compressed sparse row 
+    (CSR) form.
+
+    Nodes and links are numbered in the order of ``wn.node_name_list`` and 
+    ``wn.link_name_list``. The links that end at node ``i`` (inlets) are 
+    ``inlet_links[inlet_indptr[i]:inlet_indptr[i+1]]`` and the links that 
+    start at node ``i`` (outlets) are 
+    ``outlet_links[outlet_indptr[i]:outlet_indptr[i+1]]``, in link order.
+    Use :meth:`~wntr.network.model.WaterNetworkModel.node_link_index` to get 
+    the index of a model, which is cached until the topology changes. The 
+    arrays are read-only.
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Water network model
+
+    Attributes
+    ----------
+    node_names : list of str
+        Node names, by node number
+    link_names : list of str
+        Link names, by link number
+    node_index : dict
+        Node number, by node name
+    link_index : dict
+        Link number, by link name
+    start_node : numpy array
+        Start node number of each link
+    end_node : numpy array
+        End node number of each link
+    inlet_indptr, inlet_links : numpy array
+        CSR index of the links that end at each node
+    outlet_indptr, outlet_links : numpy array
+        CSR index of the links that start at each node
+    """
+
+    def __init__(self, wn):
+        with _gc_paused():
+            self.node_names = list(wn._node_reg._data.keys())
+            self.link_names = list(wn._link_reg._data.keys())
+            self.node_index = dict(zip(self.node_names, range(len(self.node_names))))
+            self.link_index = dict(zip(self.link_names, range(len(self.link_names))))
+            links = list(wn._link_reg._data.values())
+            start_names = map(operator.attrgetter("start_node_name"), links)
+            end_names = map(operator.attrgetter("end_node_name"), links)
+            self.start_node = np.fromiter(map(self.node_index.__getitem__, start_names), dtype=int, count=len(links))
+            self.end_node = np.fromiter(map(self.node_index.__getitem__, end_names), dtype=int, count=len(links))
+        self.inlet_indptr, self.inlet_links = self._csr(self.end_node)
+        self.outlet_indptr, self.outlet_links = self._csr(self.start_node)
+        for array in (self.start_node, self.end_node, self.inlet_indptr, self.inlet_links, 
+                      self.outlet_indptr, self.outlet_links):
+            array.setflags(write=False)
+
+    def _csr(self, nodes):
+        indptr = np.zeros(len(self.node_names) + 1, dtype=int)
+        np.cumsum(np.bincount(nodes, minlength=len(self.node_names)), out=indptr[1:])
+        return indptr, np.argsort(nodes, kind="stable")
+
+    def inlets(self, node_name):
+        """
+        Returns the names of the links that end at a node
+
+        Parameters
+        ----------
+        node_name : str
+            Name of the node
+
+        Returns
+        -------
+        list of str
+        """
+        i = self.node_index[node_name]
+        return [self.link_names[j] for j in self.inlet_links[self.inlet_indptr[i]:self.inlet_indptr[i + 1]]]
+
+    def outlets(self, node_name):
+        """
+        Returns the names of the links that start at a node
+
+        Parameters
+        ----------
+        node_name : str
+            Name of the node
+
+        Returns
+        -------
+        list of str
+        """
+        i = self.node_index[node_name]
+        return [self.link_names[j] for j in self.outlet_links[self.outlet_indptr[i]:self.outlet_indptr[i + 1]]]
+
+
+def _incidence_matrix(index):
+    """Node-link incidence matrix of a node-link index"""
+    n_links = len(index.link_names)
+    rows = np.concatenate([index.start_node, index.end_node])
+    cols = np.concatenate([np.arange(n_links), np.arange(n_links)])
+    values = np.concatenate([-np.ones(n_links), np.ones(n_links)])
+    return scipy.sparse.csr_matrix((values, (rows, cols)), shape=(len(index.node_names), n_links))
+
+
+def _adjacency_csr(index, directed):
+    """Node adjacency matrix (with the number of links between nodes) of a 
+    node-link index"""
+    rows = index.start_node
+    cols = index.end_node
+    if not directed:
+        # Count self loops once
+        different = rows != cols
+        rows, cols = np.concatenate([rows, cols[different]]), np.concatenate([cols, rows[different]])
+    n_nodes = len(index.node_names)
+    return scipy.sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_nodes, n_nodes))
+
+
+def _check_bulk_names(names, existing, label):
+    """Check that the names for a bulk insertion are valid and unused"""
+    if isinstance(names, str):
+        names = [names]
+    names = list(names)
+    for name in names:
+        assert (
+            isinstance(name, str) and len(name) < 32 and name.find(" ") == -1
+        ), "name must be a string with less than 32 characters and contain no spaces"
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate {} names".format(label))
+    used = existing.keys() & set(names)
+    if len(used) > 0:
+        raise ValueError("{} name {} already exists".format(label.capitalize(), sorted(used)[0]))
+    return names
+
+
+def _bulk_data(data):
+    """Column dictionary from a DataFrame or dictionary for a bulk insertion"""
+    if isinstance(data, pd.DataFrame):
+        columns = dict()
+        for column, values in data.items():
+            if pd.api.types.is_numeric_dtype(values):
+                columns[column] = values.tolist()
+            else:
+                values = values.astype(object)
+                columns[column] = values.where(values.notna(), None).tolist()
+        if "name" not in columns:
+            columns["name"] = [str(name) for name in data.index]
+        return columns
+    if isinstance(data, dict):
+        return data
+    raise ValueError("data must be a pandas DataFrame or a dictionary")
+
+
+def _bulk_column(values, n, property_name):
+    """Repeat a single value n times, or check that there is one value per element"""
+    if isinstance(values, (str, Pattern, PatternRegistry.DefaultPattern)) or np.ndim(values) == 0:
+        return [values] * n
+    values = list(values)
+    if len(values) != n:
+        raise ValueError("{} must have one value per element".format(property_name))
+    return values
+
+
+def _check_bulk_float(values, n, property_name):
+    """Transform a single value or array-like to a float array of length n"""
+    if values is None or (isinstance(values, (list, tuple)) and any(value is None for value in values)):
+        raise ValueError("{} must be a float or convertible to float".format(property_name))
+    try:
+        values = np.asarray(values, dtype=float)
+    except (ValueError, TypeError) as e:
+        raise ValueError("{} must be a float or convertible to float".format(property_name)) from e
+    if values.ndim == 0:
+        return np.full(n, float(values))
+    if values.shape != (n,):
+        raise ValueError("{} must have one value per element".format(property_name))
+    return values
+
+
+def _check_bulk_coordinates(coordinates, n):
+    """Check a list of X-Y coordinates (or None) for a bulk insertion"""
+    if coordinates is None:
+        return [None] * n
+    coordinates = list(coordinates)
+    if len(coordinates) != n:
+        raise ValueError("coordinates must have one value per element")
+    for i, xy in enumerate(coordinates):
+        if xy is None:
+            continue
+        if isinstance(xy, (list, tuple, np.ndarray)) and len(xy) == 2:
+            coordinates[i] = tuple(xy)
+        else:
+            raise ValueError("coordinates must be a 2-tuple or len-2 list")
+    return coordinates
+
+
+def _check_bulk_nodes(node_names, n, node_reg):
+    """Check that the nodes for a bulk insertion of links exist"""
+    node_names = _bulk_column(node_names, n, "node names")
+    nodes = [node_reg._data.get(node_name) for node_name in node_names]
+    if None in nodes:
+        raise KeyError(node_names[nodes.index(None)])
+    return node_names, nodes
+
+
+def _check_bulk_check_valve(value):
+    """Transform a check valve indicator to a bool, as in Pipe.check_valve"""
+    if value == False or value is None:
+        return False
+    if value == True:
+        return True
+    if isinstance(value, str):
+        if value.upper() in ["NO", "FALSE", "0"]:
+            return False
+        if value.upper() in ["YES", "TRUE", "1"]:
+            return True
+    raise ValueError(
+        'check_valve must be a boolean; a string "YES", "NO", "1", "0", "True" or "False"; or None. Received {}'.format(value)
+    )
+
+
+def _add_each(registry, add, names, columns):
+    """Add elements one at a time, removing the added elements if one is invalid"""
+    added = []
+    try:
+        for row in zip(names, *columns):
+            add(*row)
+            added.append(row[0])
+    except Exception:
+        for name in reversed(added):
+            del registry[name]
+        raise
+
+
+# Attributes set by Registry._finalize_, which refer to the model's registries
+# and options
+_REGISTRY_REFERENCES = ("_options", "_pattern_reg", "_curve_reg", "_node_reg", "_link_reg", "_controls", "_sources")
+
+# Types of values that are stored as plain data in the model state
+_PLAIN_TYPES = frozenset([float, int, str, bool, type(None)])
+
+
+class _ModelPickler(pickle.Pickler):
+    """Pickler that stores references to the model, its node and link 
+    registries (or the given registries) and the nodes and links by name"""
+
+    def __init__(self, file, wn, registries=("_node_reg", "_link_reg")):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._references = {id(wn): ("model",)}
+        for registry in registries:
+            self._references[id(getattr(wn, registry))] = ("registry", registry)
+        self._nodes = wn._node_reg._data
+        self._links = wn._link_reg._data
+        # Node or Link for element classes and None for other classes, 
+        # which avoids slow isinstance checks on abstract base classes
+        self._kinds = dict()
+
+    def persistent_id(self, obj):
+        cls = type(obj)
+        if cls in _PLAIN_TYPES:
+            return None
+        reference = self._references.get(id(obj))
+        if reference is not None:
+            return reference
+        kind = self._kinds.get(cls, False)
+        if kind is False:
+            kind = self._kinds[cls] = Node if issubclass(cls, Node) else Link if issubclass(cls, Link) else None
+        if kind is Node and self._nodes.get(obj._name) is obj:
+            return ("node", obj._name)
+        if kind is Link and self._links.get(obj._link_name) is obj:
+            return ("link", obj._link_name)
+        return None
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """Unpickler that resolves the references stored by _ModelPickler"""
+
+    def __init__(self, file, wn):
+        super().__init__(file)
+        self._wn = wn
+
+    def persistent_load(self, pid):
+        if pid[0] == "model":
+            return self._wn
+        if pid[0] == "registry":
+            return getattr(self._wn, pid[1])
+        if pid[0] == "node":
+            return self._wn._node_reg._data[pid[1]]
+        if pid[0] == "link":
+            return self._wn._link_reg._data[pid[1]]
+        raise pickle.UnpicklingError("Unknown reference {}".format(pid))
+
+
+@_gc_paused()
+def _model_state(wn):
+    """
+    Compact state of a water network model, used to pickle and copy it
+
+    Elements are grouped by class and attribute names, and each group is 
+    stored column by column: an attribute that is the same object for all 
+    elements of a group is stored once, attributes that are plain values 
+    (numbers, strings, enums, and tuples and lists of those) are stored as 
+    lists, and references to nodes are stored as node names. All other 
+    values, the model attributes and the registry references are pickled 
+    together by _ModelPickler, which stores references to the model and its 
+    elements by name so that they are restored as the same objects. The 
+    lines of the INP file kept by the INP file reader are not included.
+    """
+    registries = []
+    consts = []
+    objects = []
+    for registry in (wn._node_reg, wn._link_reg):
+        registry_state = _registry_state(registry)
+        groups = []
+        group_index = dict()
+        codes = []
+        for element in registry._data.values():
+            cls, element_state = type(element), _element_state(element)
+            group = (cls, tuple(element_state))
+            code = group_index.get(group)
+            if code is None:
+                code = group_index[group] = len(groups)
+                groups.append((group, []))
+            groups[code][1].append(element_state)
+            codes.append(code)
+        group_states = []
+        group_consts = []
+        group_objects = []
+        for (cls, keys), element_states in groups:
+            columns = _element_columns(wn, keys, element_states)
+            group_states.append((cls, keys, columns["plain"], columns["nodes"], columns["demands"]))
+            group_consts.append(columns["consts"])
+            group_objects.append(columns["objects"])
+        registries.append((type(registry), registry_state, list(registry._data.keys()), codes, group_states))
+        consts.append(group_consts)
+        objects.append(group_objects)
+
+    model = _model_attributes(wn, ("_node_reg", "_link_reg"))
+    buffer = BytesIO()
+    _ModelPickler(buffer, wn).dump((model, consts, objects))
+    return dict(registries=registries, payload=buffer.getvalue())
+
+
+def _model_attributes(wn, registries):
+    """Attributes of a model other than the given registries, with the INP 
+    file reader replaced by one that does not keep the INP file lines and 
+    without the cached connectivity indexes"""
+    model = dict(wn.__dict__)
+    for registry in registries:
+        del model[registry]
+    model["_topology_cache"] = dict()
+    if model.get("_inpfile") is not None:
+        inpfile = type(model["_inpfile"])()
+        inpfile.flow_units = model["_inpfile"].flow_units
+        inpfile.mass_units = model["_inpfile"].mass_units
+        if hasattr(model["_inpfile"], "wn"):
+            inpfile.wn = model["_inpfile"].wn
+        model["_inpfile"] = inpfile
+    return model
+
+
+def _registry_state(registry):
+    """Attributes of a node or link registry other than its elements and 
+    references, with ordered sets (such as the usage) stored as lists"""
+    state = dict()
+    for key, value in registry.__dict__.items():
+        if key == "_data" or key in _REGISTRY_REFERENCES:
+            continue
+        if isinstance(value, OrderedSet):
+            state[key] = ("set", list(value._data))
+        elif type(value) is OrderedDict and all(type(item) is OrderedSet for item in value.values()):
+            state[key] = ("sets", [(name, list(item._data)) for name, item in value.items()])
+        else:
+            state[key] = ("value", value)
+    return state
+
+
+def _restore_registry_state(registry, state):
+    """Set the registry attributes stored by _registry_state"""
+    for key, (kind, value) in state.items():
+        if kind == "set":
+            value = _ordered_set(value)
+        elif kind == "sets":
+            value = OrderedDict((name, _ordered_set(items)) for name, items in value)
+        setattr(registry, key, value)
+
+
+def _ordered_set(items):
+    ordered_set = object.__new__(OrderedSet)
+    ordered_set.__dict__ = {"_data": OrderedDict.fromkeys(items)}
+    return ordered_set
+
+
+def _element_columns(wn, keys, element_states):
+    """Sort the attributes of a group of elements into constant values, 
+    plain columns, node name columns and columns of other objects"""
+    columns = dict(consts=dict(), plain=dict(), nodes=dict(), demands=dict(), objects=dict())
+    nodes = wn._node_reg._data
+    # All elements of the group have the same attribute names, in the same order
+    values_by_key = zip(*[tuple(element_state.values()) for element_state in element_states])
+    for key, values in zip(keys, values_by_key):
+        if all(map(operator.is_, values, repeat(values[0]))):
+            columns["consts"][key] = values[0]
+            continue
+        types = set(map(type, values))
+        if all(t in _PLAIN_TYPES or issubclass(t, enum.Enum) for t in types):
+            columns["plain"][key] = values
+            continue
+        if all(issubclass(t, Node) for t in types):
+            names = [value._name for value in values]
+            if all(map(operator.is_, map(nodes.get, names), values)):
+                columns["nodes"][key] = names
+                continue
+        if types == {Demands}:
+            demands = _demands_to_plain(wn, values)
+            if demands is not None:
+                columns["demands"][key] = demands
+                continue
+        if types <= {tuple, list} | _PLAIN_TYPES and all(
+            type(value) in _PLAIN_TYPES or all(type(item) in _PLAIN_TYPES for item in value) for value in values
+        ):
+            columns["plain"][key] = values
+            continue
+        columns["objects"][key] = values
+    return columns
+
+
+@_gc_paused()
+def _model_from_state(cls, state):
+    """Create a water network model from the state returned by _model_state"""
+    wn = object.__new__(cls)
+    registries = []
+    for registry_cls, registry_state, names, codes, groups in state["registries"]:
+        registry = object.__new__(registry_cls)
+        _restore_registry_state(registry, registry_state)
+        # Create all elements first, so that the payload can refer to them
+        elements = [[] for _ in groups]
+        data = OrderedDict()
+        for name, code in zip(names, codes):
+            element = object.__new__(groups[code][0])
+            elements[code].append(element)
+            data[name] = element
+        registry._data = data
+        registries.append((registry, elements))
+    wn._node_reg = registries[0][0]
+    wn._link_reg = registries[1][0]
+
+    model, consts, objects = _ModelUnpickler(BytesIO(state["payload"]), wn).load()
+    wn.__dict__.update(model)
+    nodes = wn._node_reg._data
+    for r, (registry, elements) in enumerate(registries):
+        registry._finalize_(wn)
+        for g, (cls, keys, plain, node_names, demands) in enumerate(state["registries"][r][4]):
+            columns = []
+            for key in keys:
+                if key in consts[r][g]:
+                    columns.append(repeat(consts[r][g][key]))
+                elif key in plain:
+                    columns.append(plain[key])
+                elif key in node_names:
+                    columns.append(map(nodes.__getitem__, node_names[key]))
+                elif key in demands:
+                    columns.append(_demands_from_plain(wn, demands[key]))
+                else:
+                    columns.append(objects[r][g][key])
+            for element, row in zip(elements[g], zip(*columns)):
+                element.__dict__ = dict(zip(keys, row))
+    return wn
+
+
+def _demands_to_plain(wn, values):
+    """
+    Demands of each junction as tuples of (base value, pattern name, 
+    category, uses the default pattern), or None if a demand has other 
+    attributes or references
+    """
+    pattern_reg = wn._pattern_reg
+    plain = []
+    for demands in values:
+        if demands.__dict__.keys() != {"_list", "_pattern_reg"} or demands._pattern_reg is not pattern_reg:
+            return None
+        row = []
+        for timeseries in demands._list:
+            if (
+                type(timeseries) is not TimeSeries
+                or timeseries.__dict__.keys() != {"_pattern_reg", "_pattern", "_base", "_category"}
+                or timeseries._pattern_reg is not pattern_reg
+                or type(timeseries._base) not in _PLAIN_TYPES
+                or type(timeseries._category) not in _PLAIN_TYPES
+            ):
+                return None
+            pattern = timeseries._pattern
+            if type(pattern) is PatternRegistry.DefaultPattern:
+                if pattern.__dict__.keys() != {"_options"} or pattern._options is not wn._options:
+                    return None
+                row.append((timeseries._base, None, timeseries._category, True))
+            elif pattern is None or type(pattern) is str:
+                row.append((timeseries._base, pattern, timeseries._category, False))
+            else:
+                return None
+        plain.append(tuple(row))
+    return plain
+
+
+def _demands_from_plain(wn, plain):
+    """Demands objects from the tuples returned by _demands_to_plain"""
+    pattern_reg = wn._pattern_reg
+    values = []
+    for row in plain:
+        timeseries_list = []
+        for base, pattern, category, default in row:
+            timeseries = object.__new__(TimeSeries)
+            timeseries.__dict__ = {
+                "_pattern_reg": pattern_reg,
+                "_pattern": PatternRegistry.DefaultPattern(wn._options) if default else pattern,
+                "_base": base,
+                "_category": category,
+            }
+            timeseries_list.append(timeseries)
+        demands = object.__new__(Demands)
+        demands.__dict__ = {"_list": timeseries_list, "_pattern_reg": pattern_reg}
+        values.append(demands)
+    return values
+
+
+# Registries whose elements are shared by a copy-on-write clone
+_COW_REGISTRIES = ("_node_reg", "_link_reg", "_pattern_reg", "_curve_reg")
+
+# Returned by _CloneContext.view for values that are copied by the clone
+_COPY = object()
+
+
+def _cow_clone(wn):
+    """Copy-on-write clone of a water network model, see WaterNetworkModel.clone"""
+    clone = object.__new__(type(wn))
+    context = _CloneContext(wn, clone)
+    for name in _COW_REGISTRIES:
+        registry = getattr(wn, name)
+        registry_clone = object.__new__(type(registry))
+        for key, value in registry.__dict__.items():
+            if key in _REGISTRY_REFERENCES:
+                continue
+            if key in ("_data", "_usage"):
+                value = _CowData(context, value)
+            elif isinstance(value, OrderedSet):
+                value = _CowSet(value)
+            else:
+                value = copy.deepcopy(value)
+            registry_clone.__dict__[key] = value
+        clone.__dict__[name] = registry_clone
+        context.refs[id(registry)] = registry_clone
+    context._clone_nodes = clone._node_reg._data
+    context._clone_links = clone._link_reg._data
+
+    # Options, controls, sources and all other attributes are copied, with 
+    # references to the shared registries and elements
+    buffer = BytesIO()
+    pickler = _ModelPickler(buffer, wn, _COW_REGISTRIES)
+    pickler._references[id(clone)] = ("model",)
+    pickler.dump(_model_attributes(wn, _COW_REGISTRIES))
+    buffer.seek(0)
+    clone.__dict__.update(_ModelUnpickler(buffer, clone).load())
+    context.refs[id(wn)] = clone
+    for name in ("_options", "_controls", "_sources"):
+        context.refs[id(getattr(wn, name))] = getattr(clone, name)
+    for key, value in wn._options.__dict__.items():
+        if type(value) not in _PLAIN_TYPES:
+            context.refs[id(value)] = clone._options.__dict__[key]
+    context.finish()
+    for name in _COW_REGISTRIES:
+        getattr(clone, name)._finalize_(clone)
+    return clone
+
+
+class _CloneContext(object):
+    """Maps the objects of a model to the objects of its copy-on-write clone"""
+
+    def __init__(self, wn, clone):
+        self.model = wn
+        self.clone = clone
+        # Objects of the model (by id) that are replaced by objects of the 
+        # clone, such as the registries, the options and the elements that 
+        # were read from the clone
+        self.refs = dict()
+        self._nodes = wn._node_reg._data
+        self._links = wn._link_reg._data
+        # Nodes and links of the clone
+        self._clone_nodes = None
+        self._clone_links = None
+        self._kinds = dict()
+        # Types of the values that are the same in the model and the clone
+        self.immutable_types = set(_PLAIN_TYPES)
+        # Objects read before the clone is created, see finish
+        self._pending = []
+
+    def view(self, value, registered=True):
+        """
+        Value of the clone for a value of the model, which is the value itself 
+        if it is immutable, the corresponding registry, node or link of the 
+        clone, an object of the clone that reads its attributes from the 
+        object of the model for nodes, links, patterns, curves and demands 
+        (see _CopyOnWrite), a copy of a list, dictionary or other WNTR object 
+        whose items and attributes are in turn values of the clone, or _COPY 
+        for other values, which must be copied with `copy`.
+
+        Nodes and links are only looked up in the clone registries if 
+        `registered` is True. Objects that are shared in the model are also 
+        shared in the clone.
+        """
+        cls = type(value)
+        if cls in _PLAIN_TYPES:
+            return value
+        # The values of the clone that were already read, which do not 
+        # include the elements that were removed from the clone registries
+        clone_value = self.refs.get(id(value))
+        if clone_value is not None:
+            return clone_value
+        kind = self._kinds.get(cls)
+        if kind is None:
+            kind = self._kinds[cls] = _cow_kind(cls)
+            if kind == "immutable":
+                self.immutable_types.add(cls)
+        if kind == "immutable":
+            return value
+        if kind == "tuple":
+            return value if all(type(item) in _PLAIN_TYPES for item in value) else _COPY
+        if kind == "node" and registered and self._nodes.get(value._name) is value:
+            try:
+                return self._clone_nodes[value._name]
+            except KeyError:
+                pass
+        if kind == "link" and registered and self._links.get(value._link_name) is value:
+            try:
+                return self._clone_links[value._link_name]
+            except KeyError:
+                pass
+        if kind == "list":
+            clone_value = self.refs[id(value)] = [] if cls is list else copy.copy(value)
+            clone_value[:] = [item if type(item) in _PLAIN_TYPES else self.value(item) for item in value]
+        elif kind == "dict":
+            clone_value = self.refs[id(value)] = copy.copy(value)
+            for key, item in value.items():
+                clone_value[key] = self.value(item)
+        elif kind in ("node", "link", "shared"):
+            clone_value = self.refs[id(value)] = object.__new__(cls)
+            clone_value.__dict__.update(_cow_base=value, _cow_context=self)
+        elif kind != "copy" and getattr(value, "__dict__", None) is not None:
+            clone_value = self.refs[id(value)] = object.__new__(cls)
+            if self._pending is None:
+                self._fill(clone_value, value)
+            else:
+                self._pending.append((clone_value, value))
+        else:
+            return _COPY
+        return clone_value
+
+    def _fill(self, clone_value, value):
+        state = clone_value.__dict__
+        for key, item in value.__dict__.items():
+            state[key] = item if type(item) in _PLAIN_TYPES else self.value(item)
+
+    def finish(self):
+        """Set the attributes of the objects that were read while the clone 
+        was created, once the model, options, controls and sources of the 
+        clone are known"""
+        pending = self._pending
+        self._pending = None
+        for clone_value, value in pending:
+            self._fill(clone_value, value)
+
+    def value(self, value, registered=True):
+        """Value of the clone for a value of the model, see view"""
+        clone_value = self.view(value, registered)
+        if clone_value is _COPY:
+            clone_value = self.copy(value)
+        return clone_value
+
+    def copy(self, value):
+        """Copy of a value of the model that refers to the objects of the clone"""
+        # The copied objects are added to the references, so that objects 
+        # that are shared in the model are also shared in the clone
+        return copy.deepcopy(value, self.refs)
+
+
+def _cow_kind(cls):
+    if issubclass(cls, (enum.Enum, bytes, complex, frozenset)):
+        return "immutable"
+    if issubclass(cls, tuple):
+        return "tuple"
+    if issubclass(cls, Node):
+        return "node"
+    if issubclass(cls, Link):
+        return "link"
+    if issubclass(cls, _CopyOnWrite):
+        return "shared"
+    if issubclass(cls, list):
+        return "list"
+    if issubclass(cls, dict):
+        return "dict"
+    if cls.__module__.startswith("wntr."):
+        return "object"
+    return "copy"
+
+
+class _CowData(MutableMapping):
+    """
+    Mapping of a copy-on-write clone registry (the elements or the usage), 
+    which stores the items that are added or replaced in the clone and the 
+    value of the clone of each item of the model that was read (see 
+    _CloneContext.view), which for elements is an object that reads its 
+    attributes from the element of the model
+    """
+
+    def __init__(self, context, base):
+        self._context = context
+        self._base = base
+        self._own = OrderedDict()
+        # Items of the model that were removed from the clone, with their 
+        # values of the clone (or None if they were not read)
+        self._removed = dict()
+        # Values of the clone of the items of the model that were read
+        self._views = dict()
+
+    def __getitem__(self, key):
+        view = self._views.get(key, _COPY)
+        if view is not _COPY:
+            return view
+        try:
+            return self._own[key]
+        except KeyError:
+            pass
+        if key in self._removed:
+            raise KeyError(key)
+        view = self._views[key] = self._context.value(self._base[key], registered=False)
+        return view
+
+    def __setitem__(self, key, value):
+        if key in self._removed and self._removed[key] is value:
+            # An item of the model is restored, for example when a 
+            # transaction is rolled back
+            del self._removed[key]
+            self._own.pop(key, None)
+            self._views[key] = value
+            self._context.refs[id(self._base[key])] = value
+            return
+        self._forget(key)
+        self._own[key] = value
+        self._views.pop(key, None)
+
+    def __delitem__(self, key):
+        found = self._own.pop(key, _COPY) is not _COPY
+        view = self._views.pop(key, None)
+        if key not in self._removed and key in self._base:
+            self._forget(key)
+            self._removed[key] = view
+            found = True
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._own or (key not in self._removed and key in self._base)
+
+    def _forget(self, key):
+        # The item of the model is no longer an item of the clone
+        if key not in self._removed and key in self._base:
+            self._context.refs.pop(id(self._base[key]), None)
+
+    def __iter__(self):
+        base = self._base
+        removed = self._removed
+        for key in base:
+            if key not in removed:
+                yield key
+        for key in self._own:
+            if key in removed or key not in base:
+                yield key
+
+    def __len__(self):
+        base = self._base
+        removed = self._removed
+        return len(base) - len(removed) + sum(1 for key in self._own if key in removed or key not in base)
+
+    def __reduce_ex__(self, protocol):
+        return (OrderedDict, (list(self.items()),))
+
+
+class _CowSet(OrderedSet):
+    """Ordered set of a copy-on-write clone registry (such as the names of 
+    the junctions), which shares the items of the ordered set of the model 
+    until it is changed"""
+
+    def __init__(self, base):
+        self._data = base._data
+        self._shared = True
+
+    def add(self, value):
+        self._own()
+        super().add(value)
+
+    def discard(self, value):
+        self._own()
+        super().discard(value)
+
+    def _own(self):
+        if self._shared:
+            self._data = OrderedDict(self._data)
+            self._shared = False
+
+    def __reduce_ex__(self, protocol):
+        return (OrderedSet, (list(self),))
+
+
+
+# Classes whose objects record their attributes in the undo journals while a
+# transaction is active
+_JOURNAL_CLASSES = (_CopyOnWrite, Source, WaterNetworkModel)
+
+# Value recorded for attributes and items that do not exist
+_MISSING = object()
+
+
+class _Journal(object):
+    """
+    Undo journal of a transaction of a water network model, which records 
+    the previous values of the attributes and items of the model that are 
+    changed, see WaterNetworkModel.transaction
+    """
+
+    def __init__(self, wn):
+        self.model = wn
+        # Objects of the model that its elements refer to
+        self._references = frozenset(id(value) for value in (wn._pattern_reg, wn._options, wn._options.time))
+        self._registries = frozenset(id(getattr(wn, name)) for name in _COW_REGISTRIES + ("_sources",))
+        self._containers = frozenset([id(wn._controls)])
+        # (id of the object, name) -> (object, name, previous value)
+        self._attributes = dict()
+        # (id of the mapping or set, key) -> (mapping or set, key, previous 
+        # value or membership)
+        self._items = dict()
+        # id of a usage set -> (usage set, previous items)
+        self._sets = dict()
+        # id of a mapping or set -> (mapping or set, previous keys), recorded 
+        # when an item is removed to restore the order of the keys
+        self._orders = dict()
+        # The options are small, so their attributes are recorded up front
+        options = wn._options
+        self._options = [(options, dict(options.__dict__))]
+        for value in options.__dict__.values():
+            if type(value) not in _PLAIN_TYPES:
+                self._options.append((value, copy.deepcopy(value.__dict__)))
+
+    def _owns(self, obj):
+        if obj is self.model:
+            return True
+        for name in ("_pattern_reg", "_options", "_time_options"):
+            if id(getattr(obj, name, None)) in self._references:
+                return True
+        return False
+
+    def record(self, obj, name, mutable=False):
+        """Record the value of an attribute before it is set, or a copy of 
+        the value if it is `mutable` and changed in place"""
+        key = (id(obj), name)
+        if key in self._attributes or not self._owns(obj):
+            return
+        state = obj.__dict__
+        if name not in state and isinstance(getattr(type(obj), name, None), property):
+            # The property setter records the attributes it sets
+            return
+        value = state.get(name, _MISSING)
+        if mutable and value is not _MISSING:
+            value = list(value)
+        self._attributes[key] = (obj, name, value)
+
+    def record_item(self, container, key, remove=False):
+        """Record an item of a mapping of the model before it is added, 
+        replaced or removed"""
+        if id(container) in self._containers:
+            self._record_item(container, key, remove)
+
+    def record_registry(self, registry, key, remove=False):
+        """Record the element, the usage and the type of `key` in a registry 
+        of the model before they are changed"""
+        if id(registry) not in self._registries:
+            return
+        self._record_item(registry._data, key, remove)
+        usage = registry._usage
+        self._record_item(usage, key, remove)
+        value = usage.get(key)
+        if value is not None and id(value) not in self._sets:
+            self._sets[id(value)] = (value, list(value))
+        for value in registry.__dict__.values():
+            if isinstance(value, OrderedSet):
+                self._record_item(value, key, remove)
+
+    def _record_item(self, container, key, remove):
+        item = (id(container), key)
+        if item not in self._items:
+            if isinstance(container, OrderedSet):
+                value = key in container
+            else:
+                value = container.get(key, _MISSING)
+            self._items[item] = (container, key, value)
+        if remove and id(container) not in self._orders and key in container:
+            self._orders[id(container)] = (container, list(container))
+
+    def undo(self):
+        """Revert the recorded changes"""
+        for obj, name, value in self._attributes.values():
+            state = obj.__dict__
+            if value is _MISSING:
+                state.pop(name, None)
+            else:
+                state[name] = value
+        for container, key, value in self._items.values():
+            if isinstance(container, OrderedSet):
+                if value:
+                    container.add(key)
+                else:
+                    container.discard(key)
+            elif value is _MISSING:
+                container.pop(key, None)
+            elif container.get(key, _MISSING) is not value:
+                container[key] = value
+        for usage, items in self._sets.values():
+            if list(usage) != items:
+                usage.clear()
+                usage.update(items)
+        for container, keys in self._orders.values():
+            data = container._data if isinstance(container, OrderedSet) else container
+            if isinstance(data, OrderedDict) and list(data) != keys:
+                for key in keys:
+                    if key in data:
+                        data.move_to_end(key)
+        for options, state in self._options:
+            options.__dict__.clear()
+            options.__dict__.update(state)
+        if self._items:
+            self.model._node_reg._topology_version += 1
@@ -5,4 +5,5 @@ simulations using the water network model.
 from wntr.sim.core import WaterNetworkSimulator, WNTRSimulator
 from wntr.sim.results import SimulationResults
 from wntr.sim.solvers import NewtonSolver
-from wntr.sim.epanet import EpanetSimulator
\ No newline at end of file
+from wntr.sim.epanet import EpanetSimulator
+from wntr.sim.pool import EpanetPool
@@ -9,6 +9,10 @@ import warnings
 import time
 import sys
 import logging
+import asyncio
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import scipy.optimize
 import scipy.sparse
 import scipy.sparse.csr
@@ -49,6 +53,16 @@ logger = logging.getLogger(__name__)
 # TODO: allow user to turn of demand status and leak model status controls
 # TODO: allow user to switch between wntr and ipopt models
 
+_async_executor = None
+
+
+def _get_async_executor():
+    """Return the thread pool shared by asynchronous simulations"""
+    global _async_executor
+    if _async_executor is None:
+        _async_executor = ThreadPoolExecutor(thread_name_prefix='wntr_sim')
+    return _async_executor
+
 
 class WaterNetworkSimulator(object):
     """
@@ -71,6 +85,147 @@ class WaterNetworkSimulator(object):
         # self.mode = mode
         self.mode = self._wn.options.hydraulic.demand_model
 
+        # Functions called with (time, node, link) at each report step
+        self._report_hooks = []
+        self._cancel_event = None
+
+    def _check_cancelled(self):
+        """Raise an exception if an asynchronous run was cancelled"""
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            logger.info('Simulation cancelled at time {0}'.format(self._wn.sim_time))
+            raise RuntimeError('Simulation was cancelled')
+
+    @contextlib.contextmanager
+    def _accumulate(self, accumulators):
+        """Call the accumulators at each report step within the context"""
+        accumulators = list(accumulators) if accumulators is not None else []
+        self._report_hooks.extend(accumulators)
+        try:
+            yield
+        finally:
+            for accumulator in accumulators:
+                self._report_hooks.remove(accumulator)
+
+    def _call_report_hooks(self, time, node, link):
+        for hook in self._report_hooks:
+            hook(time, node, link)
+
+    def _report_results(self, results):
+        """Call the report hooks for each report step in a results object"""
+        if len(self._report_hooks) == 0:
+            return
+        for t in results.node['head'].index:
+            # Results that end early (for example MSX results stopped by 
+            # msx_stop) are not passed after their last report step
+            node = {key: df.loc[t] for key, df in results.node.items() if t in df.index}
+            link = {key: df.loc[t] for key, df in results.link.items() if t in df.index}
+            self._call_report_hooks(t, node, link)
+
+    async def run_sim_async(self, *args, timeout=None, executor=None, **kwargs):
+        """
+        Run the simulation without blocking the event loop.
+
+        The simulation runs ``run_sim(*args, **kwargs)`` in an executor 
+        (a thread pool shared by all simulators, by default). If the 
+        awaiting task is cancelled or the timeout expires, the simulation 
+        stops at its next time step.
+
+        Only one simulation may run at a time for a given water network model.
+
+        Parameters
+        ----------
+        args, kwargs
+            Arguments passed to ``run_sim``
+        timeout : float, optional
+            Maximum run time in seconds; :class:`asyncio.TimeoutError` is 
+            raised when it expires
+        executor : concurrent.futures.Executor, optional
+            Executor used to run the simulation
+
+        Returns
+        -------
+        SimulationResults
+        """
+        if executor is None:
+            executor = _get_async_executor()
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+
+        def run():
+            self._cancel_event = cancel_event
+            try:
+                return self.run_sim(*args, **kwargs)
+            finally:
+                self._cancel_event = None
+
+        future = loop.run_in_executor(executor, run)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BaseException:
+            cancel_event.set()
+            raise
+
+    async def stream_sim_async(self, *args, timeout=None, executor=None, **kwargs):
+        """
+        Run the simulation without blocking the event loop and iterate over 
+        results at each report step.
+
+        This is an asynchronous generator that yields ``(time, node, link)`` 
+        tuples, where `node` and `link` are dictionaries of pandas Series 
+        (indexed by element name) that contain the results at that report 
+        time. Leaving the iteration early cancels the simulation.
+
+        .. note::
+
+            The EpanetSimulator reads results from the EPANET binary output 
+            file, so its report steps are yielded once the simulation is 
+            complete.
+
+        Parameters
+        ----------
+        args, kwargs
+            Arguments passed to ``run_sim``
+        timeout : float, optional
+            Maximum run time in seconds; :class:`asyncio.TimeoutError` is 
+            raised when it expires
+        executor : concurrent.futures.Executor, optional
+            Executor used to run the simulation
+
+        Yields
+        ------
+        time : int
+            Simulation time in seconds
+        node : dict of pandas Series
+            Node results at this time
+        link : dict of pandas Series
+            Link results at this time
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def hook(time, node, link):
+            loop.call_soon_threadsafe(queue.put_nowait, (time, node, link))
+
+        self._report_hooks.append(hook)
+        task = loop.create_task(self.run_sim_async(*args, timeout=timeout, executor=executor, **kwargs))
+        task.add_done_callback(lambda t: queue.put_nowait(done))
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            task.result()
+        finally:
+            self._report_hooks.remove(hook)
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except BaseException:
+                    pass
+
 
     def _get_link_type(self, name):
         if isinstance(self._wn.get_link(name), Pipe):
@@ -335,7 +490,7 @@ class _Diagnostics(object): # pragma: no cover
         link_attributes = ['status', '_is_isolated', 'flow']
 
         # Graph
-        G = wn.to_graph()
+        G = wn.graph_view()
 
         open_edges = dict()
         closed_edges = dict()
@@ -1189,7 +1344,7 @@ class WNTRSimulator(WaterNetworkSimulator):
 
     def run_sim(self, solver=NewtonSolver, backup_solver=None, solver_options=None,
                 backup_solver_options=None, convergence_error=False, HW_approx='default',
-                diagnostics=False):
+                diagnostics=False, accumulators=None, keep_results=True):
 
         """
         Run an extended period simulation (hydraulics only).
@@ -1213,7 +1368,21 @@ class WNTRSimulator(WaterNetworkSimulator):
             see the WNTR documentation on hydraulics for details.
         diagnostics: bool
             If True, then run with diagnostics on
+        accumulators: list (optional)
+            Metrics accumulated at each report step, see 
+            :class:`~wntr.metrics.accumulators.Accumulator`
+        keep_results: bool (optional)
+            If False, the results at each report step are passed to the 
+            accumulators and then discarded, and the returned results object 
+            only holds the error code, network name and report times (the node 
+            and link results are empty).  Default = True.
         """
+        with self._accumulate(accumulators):
+            return self._run_sim(solver, backup_solver, solver_options, backup_solver_options, 
+                                 convergence_error, HW_approx, diagnostics, keep_results)
+
+    def _run_sim(self, solver, backup_solver, solver_options, backup_solver_options, 
+                 convergence_error, HW_approx, diagnostics, keep_results=True):
         logger.debug('creating hydraulic model')
         self.mode = self._wn.options.hydraulic.demand_model
         self._model, self._model_updater = wntr.sim.hydraulics.create_hydraulic_model(wn=self._wn, HW_approx=HW_approx)
@@ -1258,6 +1427,7 @@ class WNTRSimulator(WaterNetworkSimulator):
         logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('Sim Time', 'Trial', 'Solver', '# isolated', '# isolated'))
         logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('', '', '# iter', 'junctions', 'links'))
         while True:
+            self._check_cancelled()
             if logger.getEffectiveLevel() <= logging.DEBUG:
                 logger.debug('\n\n')
 
@@ -1338,11 +1508,13 @@ class WNTRSimulator(WaterNetworkSimulator):
                         else:
                             raise RuntimeError('Simulation already solved this timestep')
                     results.time.append(int(self._wn.sim_time))
+                    self._report_step(results.time[-1], node_res, link_res, keep_results)
             elif self._report_timestep.upper() == 'ALL':
                 wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
                 if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
                     raise RuntimeError('Simulation already solved this timestep')
                 results.time.append(int(self._wn.sim_time))
+                self._report_step(results.time[-1], node_res, link_res, keep_results)
             wntr.sim.hydraulics.update_network_previous_values(self._wn)
             first_step = False
             self._wn.sim_time += self._hydraulic_timestep
@@ -1352,10 +1524,28 @@ class WNTRSimulator(WaterNetworkSimulator):
             if self._wn.sim_time > self._wn.options.time.duration:
                 break
 
-        wntr.sim.hydraulics.get_results(self._wn, results, node_res, link_res)
+        if keep_results:
+            wntr.sim.hydraulics.get_results(self._wn, results, node_res, link_res)
+        else:
+            results.node = {}
+            results.link = {}
         
         return results
 
+    def _report_step(self, time, node_res, link_res, keep_results=True):
+        """Pass the results saved at this report step to the report hooks"""
+        if len(self._report_hooks) > 0:
+            node = {key: pd.Series({name: values[-1] for name, values in res.items()}) 
+                    for key, res in node_res.items()}
+            link = {key: pd.Series({name: values[-1] for name, values in res.items()}) 
+                    for key, res in link_res.items()}
+            self._call_report_hooks(time, node, link)
+        if not keep_results:
+            # Only the results at the current report step are held
+            for res in itertools.chain(node_res.values(), link_res.values()):
+                for values in res.values():
+                    values.clear()
+
     def _initialize_name_id_maps(self):
         n = 0
         for link_name, link in self._wn.links():
@@ -4,6 +4,12 @@
 from wntr.sim.core import WaterNetworkSimulator
 from wntr.network.io import write_inpfile
 import wntr.epanet
+import io
+import numpy as np
+import pandas as pd
+import os
+import shutil
+import tempfile
 import warnings
 import logging
 
@@ -65,7 +71,8 @@ class EpanetSimulator(WaterNetworkSimulator):
             self.reader = wntr.epanet.io.BinFile(result_types=result_types)
 
     def run_sim(self, file_prefix='temp', save_hyd=False, use_hyd=False, hydfile=None, 
-                version=2.2, convergence_error=False):
+                version=2.2, convergence_error=False, temp_dir=None, msx_capture=None, 
+                msx_stop=None, accumulators=None, keep_results=True):
 
         """
         Run the EPANET simulator.
@@ -83,8 +90,13 @@ class EpanetSimulator(WaterNetworkSimulator):
 
         Parameters
         ----------
-        file_prefix : str
-            Default prefix is "temp". All files (.inp, .bin/.out, .hyd, .rpt) use this prefix
+        file_prefix : str or None
+            Default prefix is "temp". All files (.inp, .bin/.out, .hyd, .rpt) use this prefix.
+            If None, the files are written to a private temporary directory which is
+            removed once the results have been read. The INP file is always written, 
+            since the EPANET toolkit opens the model from a file; its text is formatted 
+            in memory, reusing the text of unchanged sections from earlier runs (see 
+            :meth:`~wntr.epanet.io.InpFile.write`), and written in a single write.
         use_hyd : bool
             Will load hydraulics from ``file_prefix + '.hyd'`` or from file specified in `hydfile_name`
         save_hyd : bool
@@ -99,11 +111,62 @@ class EpanetSimulator(WaterNetworkSimulator):
             simulation does not converge. If convergence_error is False, partial results are returned, 
             a warning will be issued, and results.error_code will be set to 0
             if the simulation does not converge.  Default = False.
+        temp_dir : str (optional)
+            Directory in which the private temporary directory is created when 
+            `file_prefix` is None, for example a tmpfs mount such as ``/dev/shm``. 
+            Defaults to the system temporary directory.
+        msx_capture : dict (optional)
+            Run EPANET-MSX step by step and capture only selected results at 
+            each reporting time step instead of writing and reading the full 
+            MSX binary output file. The dictionary has the optional keys 
+            'species', 'nodes' and 'links', each a list of names; missing keys 
+            default to all species, nodes or links (use an empty list to 
+            capture no nodes or no links). Only used if the model includes an 
+            MSX model.
+        msx_stop : callable (optional)
+            Function called after each captured reporting time step as 
+            ``msx_stop(time, node, link)``, where `node` and `link` are 
+            dictionaries of pandas Series (indexed by element name) keyed by 
+            species. If it returns True, the water quality simulation stops and 
+            the MSX results end at that time. Implies a stepwise run with 
+            `msx_capture` defaulting to all results.
+        accumulators : list (optional)
+            Metrics accumulated at each report step, see 
+            :class:`~wntr.metrics.accumulators.Accumulator`.  The report 
+            steps are read from the binary output file once the simulation 
+            is complete.
+        keep_results : bool (optional)
+            If False, the node and link results are not kept in the returned 
+            results object, which only holds the error code and network name.  
+            The report steps are read from the binary output file in blocks 
+            and passed to the accumulators, so the full results are never held 
+            in memory.  For models that include an MSX model, the results are 
+            read in full before they are passed to the accumulators and then 
+            discarded.  Default = True.
         """
         if isinstance(version, str):
             version = float(version)
+        with self._accumulate(accumulators):
+            if file_prefix is None:
+                scratch_dir = tempfile.mkdtemp(prefix='wntr_', dir=temp_dir)
+                try:
+                    return self._run_sim(os.path.join(scratch_dir, 'temp'), save_hyd, use_hyd, 
+                                         hydfile, version, convergence_error, msx_capture, msx_stop, 
+                                         keep_results)
+                finally:
+                    shutil.rmtree(scratch_dir, ignore_errors=True)
+            return self._run_sim(file_prefix, save_hyd, use_hyd, hydfile, version, convergence_error, 
+                                 msx_capture, msx_stop, keep_results)
+
+    def _run_sim(self, file_prefix, save_hyd, use_hyd, hydfile, version, convergence_error, 
+                 msx_capture=None, msx_stop=None, keep_results=True):
         inpfile = file_prefix + '.inp'
-        write_inpfile(self._wn, inpfile, units=self._wn.options.hydraulic.inpfile_units, version=version)
+        # Serialize the model in memory and hand it to the file system in a 
+        # single write, which avoids many small writes on network file systems
+        buf = io.BytesIO()
+        write_inpfile(self._wn, buf, units=self._wn.options.hydraulic.inpfile_units, version=version)
+        with open(inpfile, 'wb') as f:
+            f.write(buf.getbuffer())
         enData = wntr.epanet.toolkit.ENepanet(version=version)
         self.enData = enData
         rptfile = file_prefix + '.rpt'
@@ -116,6 +179,18 @@ class EpanetSimulator(WaterNetworkSimulator):
         if use_hyd:
             enData.ENusehydfile(hydfile)
             logger.debug('Loaded hydraulics')
+        elif self._cancel_event is not None:
+            # Step through the hydraulics (as ENsolveH does) so that an 
+            # asynchronous run can be cancelled between time steps
+            enData.ENopenH()
+            enData.ENinitH(1)
+            tstep = 1
+            while tstep > 0:
+                self._check_cancelled()
+                enData.ENrunH()
+                tstep = enData.ENnextH()
+            enData.ENcloseH()
+            logger.debug('Solved hydraulics')
         else:
             enData.ENsolveH()
             logger.debug('Solved hydraulics')
@@ -130,7 +205,12 @@ class EpanetSimulator(WaterNetworkSimulator):
         logger.debug('Completed run')
         #os.sys.stderr.write('Finished Closing\n')
         
-        results = self.reader.read(outfile, convergence_error, self._wn.options.hydraulic.headloss=='D-W')
+        darcy_weisbach = self._wn.options.hydraulic.headloss=='D-W'
+        if not keep_results and self._wn._msx is None:
+            return self.reader.read(outfile, convergence_error, darcy_weisbach, 
+                                    report_hook=self._call_report_hooks, keep_results=False)
+
+        results = self.reader.read(outfile, convergence_error, darcy_weisbach)
 
         if self._wn._msx is not None:
             # Attributed to Matthew's package
@@ -143,15 +223,95 @@ class EpanetSimulator(WaterNetworkSimulator):
             msx.ENopen(inpfile, rptfile, outfile)
             msx.MSXopen(msxfile)
             msx.MSXusehydfile(hydfile)
-            msx.MSXinit()
-            msx.MSXsolveH()
-            msx.MSXsolveQ()
-            msx.MSXreport()
-            msx.MSXsaveoutfile(binfile)
-            msx.MSXsavemsxfile(msxfile2)
-            msx.MSXclose()
-            msx.ENclose()
-            results = wntr.epanet.msx.io.MsxBinFile(binfile, self._wn, results)
+            if msx_capture is not None or msx_stop is not None:
+                try:
+                    self._run_msx_stepwise(msx, results, msx_capture, msx_stop)
+                finally:
+                    msx.MSXclose()
+                    msx.ENclose()
+            else:
+                msx.MSXinit()
+                msx.MSXsolveH()
+                msx.MSXsolveQ()
+                msx.MSXreport()
+                msx.MSXsaveoutfile(binfile)
+                msx.MSXsavemsxfile(msxfile2)
+                msx.MSXclose()
+                msx.ENclose()
+                results = wntr.epanet.msx.io.MsxBinFile(binfile, self._wn, results)
+
+        self._report_results(results)
+        if not keep_results:
+            results.node = {}
+            results.link = {}
+        return results
+
+    def _run_msx_stepwise(self, msx, results, capture, stop):
+        """
+        Step the MSX water quality solver and capture selected species at nodes
+        and links into preallocated arrays at each reporting time step
+        """
+        from wntr.epanet.msx.enums import TkObjectType
 
+        if capture is None:
+            capture = dict()
+        for key in capture.keys():
+            if key not in ['species', 'nodes', 'links']:
+                raise ValueError('Unrecognized msx_capture key: {}'.format(key))
+        species = list(capture.get('species', self._wn._msx.species_name_list))
+        nodes = pd.Index(capture.get('nodes', self._wn.node_name_list), name='name')
+        links = pd.Index(capture.get('links', self._wn.link_name_list), name='name')
+
+        species_index = [msx.MSXgetindex(TkObjectType.SPECIES, name) for name in species]
+        node_index = [msx.ENgetnodeindex(name) for name in nodes]
+        link_index = [msx.ENgetlinkindex(name) for name in links]
+
+        duration = int(self._wn.options.time.duration)
+        report_step = int(self._wn.options.time.report_timestep)
+        timerange = np.arange(0, duration + 1, report_step)
+        node_data = np.full((len(species), len(timerange), len(nodes)), np.nan, dtype=np.float32)
+        link_data = np.full((len(species), len(timerange), len(links)), np.nan, dtype=np.float32)
+
+        msx.MSXinit(0)
+        t = 0
+        tleft = 1
+        step = 0
+        while step < len(timerange):
+            self._check_cancelled()
+            # Capture the first solver time at or after each reporting time
+            if t >= timerange[step]:
+                for i, s in enumerate(species_index):
+                    for j, n in enumerate(node_index):
+                        node_data[i, step, j] = msx.MSXgetqual(TkObjectType.NODE, n, s)
+                    for j, l in enumerate(link_index):
+                        link_data[i, step, j] = msx.MSXgetqual(TkObjectType.LINK, l, s)
+                step += 1
+                if stop is not None:
+                    node = {name: pd.Series(node_data[i, step - 1], index=nodes) for i, name in enumerate(species)}
+                    link = {name: pd.Series(link_data[i, step - 1], index=links) for i, name in enumerate(species)}
+                    if stop(int(timerange[step - 1]), node, link):
+                        logger.debug('MSX simulation stopped at time %s', timerange[step - 1])
+                        break
+                continue
+            if tleft <= 0:
+                break
+            t, tleft = msx.MSXstep()
+
+        index = range(0, duration + 1, report_step)[:step]
+        for i, name in enumerate(species):
+            results.node[name] = pd.DataFrame(node_data[i, :step], index=index, columns=nodes)
+            results.link[name] = pd.DataFrame(link_data[i, :step], index=index, columns=links)
         return results
 
+    async def run_sim_async(self, *args, timeout=None, executor=None, **kwargs):
+        """
+        Run the EPANET simulator without blocking the event loop.
+
+        See :meth:`~wntr.sim.core.WaterNetworkSimulator.run_sim_async`. Unless 
+        `file_prefix` is given, files are written to a private temporary 
+        directory so that concurrent simulations do not overwrite each other.
+        """
+        if len(args) == 0:
+            kwargs.setdefault('file_prefix', None)
+        return await super().run_sim_async(*args, timeout=timeout, executor=executor, **kwargs)
+
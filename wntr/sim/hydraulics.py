@@ -375,17 +375,18 @@ def store_results_in_network(wn, m):
             else:
                 node._leak_demand = 0
 
+    index = wn.node_link_index()
     for name, node in wn.tanks():
         if node.leak_status:
             node._leak_demand = m.leak_rate[name].value
         else:
             node._leak_demand = 0
-        node._demand = (sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'INLET')) -
-                       sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'OUTLET')) -
+        node._demand = (sum(wn.get_link(link_name).flow for link_name in index.inlets(name)) -
+                       sum(wn.get_link(link_name).flow for link_name in index.outlets(name)) -
                        node._leak_demand)
 
     for name, node in wn.reservoirs():
         node._head = node.head_timeseries.at(wn.sim_time)
         node._leak_demand = 0
-        node._demand = (sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'INLET')) -
-                       sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'OUTLET')))
+        node._demand = (sum(wn.get_link(link_name).flow for link_name in index.inlets(name)) -
+                       sum(wn.get_link(link_name).flow for link_name in index.outlets(name)))
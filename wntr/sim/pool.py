@@ -0,0 +1,277 @@
+"""
+The wntr.sim.pool module includes a pool of worker processes that run
+EPANET simulations concurrently.
+"""
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# State of a worker process, set by _init_worker
+_worker = dict()
+
+
+def _init_worker(model, pool_dir, result_types, version, accumulators):
+    _worker["model"] = model
+    _worker["accumulators"] = accumulators
+    _worker["scratch_dir"] = tempfile.mkdtemp(prefix="worker_", dir=pool_dir)
+    _worker["result_types"] = result_types
+    _worker["version"] = version
+    _worker["count"] = 0
+
+
+def _apply_delta(wn, delta):
+    """
+    Apply a model delta to a water network model
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Water network model, modified in place
+    delta : dict, callable, or None
+        Model delta, see :class:`~wntr.sim.pool.EpanetPool`
+    """
+    if delta is None:
+        return
+    if callable(delta):
+        delta(wn)
+        return
+    for key in delta.keys():
+        if key not in ["nodes", "links", "patterns", "options"]:
+            raise ValueError("Unrecognized model delta key: {}".format(key))
+    for name, attributes in delta.get("nodes", {}).items():
+        node = wn.get_node(name)
+        for attribute, value in attributes.items():
+            setattr(node, attribute, value)
+    for name, attributes in delta.get("links", {}).items():
+        link = wn.get_link(name)
+        for attribute, value in attributes.items():
+            setattr(link, attribute, value)
+    for name, multipliers in delta.get("patterns", {}).items():
+        wn.get_pattern(name).multipliers = multipliers
+    for section, attributes in delta.get("options", {}).items():
+        options = getattr(wn.options, section)
+        for attribute, value in attributes.items():
+            setattr(options, attribute, value)
+
+
+def _run_job(delta):
+    from wntr.sim.epanet import EpanetSimulator
+
+    wn = pickle.loads(_worker["model"])
+    _apply_delta(wn, delta)
+
+    _worker["count"] += 1
+    file_prefix = os.path.join(_worker["scratch_dir"], "job{}".format(_worker["count"]))
+    # Each job accumulates metrics with a fresh copy of the accumulators
+    accumulators = None
+    if _worker["accumulators"] is not None:
+        accumulators = pickle.loads(_worker["accumulators"])
+    try:
+        sim = EpanetSimulator(wn, result_types=_worker["result_types"])
+        results = sim.run_sim(file_prefix=file_prefix, version=_worker["version"],
+                              accumulators=accumulators, keep_results=accumulators is None)
+    finally:
+        for filename in os.listdir(_worker["scratch_dir"]):
+            os.remove(os.path.join(_worker["scratch_dir"], filename))
+    if accumulators is not None:
+        return accumulators
+    return results
+
+
+class EpanetPool(object):
+    """
+    Pool of worker processes that run EPANET simulations concurrently.
+
+    Each worker process loads its own copy of the EPANET toolkit library and
+    runs in a private scratch directory, so simulations never share input,
+    report, binary or hydraulic files. The base water network model is
+    serialized once and sent to each worker when it starts. Jobs are
+    submitted as model deltas that are applied to a fresh copy of the base
+    model in the worker.
+
+    A model delta is either None (run the base model), a picklable callable
+    that takes the water network model as its only argument and modifies it,
+    or a dictionary with the following optional keys:
+
+    * nodes: ``{node_name: {attribute: value}}``
+    * links: ``{link_name: {attribute: value}}``
+    * patterns: ``{pattern_name: multipliers}``
+    * options: ``{section: {attribute: value}}``, for example
+      ``{'time': {'duration': 3600}}``
+
+    For example, ``{'links': {'10': {'initial_status': 'CLOSED'}}}`` closes
+    link 10. Scratch directories are removed when the pool is closed.
+
+    If accumulators are given, each job returns a copy of the accumulators
+    updated at each report step of its simulation instead of the full
+    simulation results, so that only reduced statistics are sent back from
+    the workers.  The workers run the simulations with 
+    ``keep_results=False``, see 
+    :meth:`~wntr.sim.epanet.EpanetSimulator.run_sim`.
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Base water network model
+    processes : int, optional
+        Number of worker processes, by default the number of processors
+    version : float, optional
+        {2.0, **2.2**} EPANET toolkit version used by the workers
+    result_types : dict, optional
+        Results to read from the binary output file, see
+        :class:`~wntr.epanet.io.BinFile`
+    temp_dir : str, optional
+        Directory in which the scratch directories are created, by default
+        the system temporary directory
+    mp_context : multiprocessing context, optional
+        Context used to start the worker processes
+    accumulators : list, optional
+        Metrics accumulated at each report step of each simulation, see
+        :class:`~wntr.metrics.accumulators.Accumulator`
+
+    Examples
+    --------
+    >>> import wntr
+    >>> wn = wntr.network.WaterNetworkModel('networks/Net3.inp') # doctest: +SKIP
+    >>> with wntr.sim.EpanetPool(wn, processes=4) as pool: # doctest: +SKIP
+    ...     deltas = [{'links': {name: {'initial_status': 'CLOSED'}}}
+    ...               for name in wn.pipe_name_list]
+    ...     results = pool.map(deltas)
+    """
+
+    def __init__(self, wn, processes=None, version=2.2, result_types=None,
+                 temp_dir=None, mp_context=None, accumulators=None):
+        self._model = pickle.dumps(wn, protocol=pickle.HIGHEST_PROTOCOL)
+        self._accumulators = None
+        if accumulators is not None:
+            self._accumulators = pickle.dumps(list(accumulators), protocol=pickle.HIGHEST_PROTOCOL)
+        self._processes = processes
+        self._version = version
+        self._result_types = result_types
+        self._mp_context = mp_context
+        self._pool_dir = tempfile.mkdtemp(prefix="wntr_pool_", dir=temp_dir)
+        self._executor = None
+        self._start()
+
+    def _start(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(self._model, self._pool_dir, self._result_types, self._version,
+                      self._accumulators),
+        )
+
+    def _restart(self):
+        logger.warning("A worker process terminated abruptly, restarting the pool")
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._start()
+
+    def submit(self, delta=None):
+        """
+        Submit a simulation
+
+        Parameters
+        ----------
+        delta : dict, callable, or None
+            Model delta applied to a copy of the base model before the
+            simulation
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future that resolves to the
+            :class:`~wntr.sim.results.SimulationResults`, or to the list of
+            accumulators if the pool was created with accumulators
+        """
+        if self._executor is None:
+            raise RuntimeError("The pool has been closed")
+        try:
+            return self._executor.submit(_run_job, delta)
+        except BrokenProcessPool:
+            self._restart()
+            return self._executor.submit(_run_job, delta)
+
+    def map(self, deltas, return_exceptions=False):
+        """
+        Run one simulation per model delta
+
+        A worker process that terminates abruptly (for example, due to a
+        crash in the EPANET library) breaks the pool, and all jobs that are
+        not finished fail with it. The pool is then restarted and the
+        unfinished jobs are submitted again, in two halves that each run
+        concurrently, until each job that breaks the pool is found as the
+        only unfinished job of its group. So a failing job does not affect
+        the other jobs, which still run in parallel.
+
+        Parameters
+        ----------
+        deltas : iterable
+            Model deltas, see :class:`~wntr.sim.pool.EpanetPool`
+        return_exceptions : bool, optional
+            If True, exceptions raised by a job are returned in place of its
+            results. If False (default), the first exception is raised.
+
+        Returns
+        -------
+        list of SimulationResults
+            Simulation results (or lists of accumulators), in the same order
+            as `deltas`
+        """
+        deltas = list(deltas)
+        results = [None] * len(deltas)
+        # Groups of jobs (indexes of deltas) to run concurrently, last first
+        groups = [list(range(len(deltas)))]
+        while len(groups) > 0:
+            group = groups.pop()
+            futures = [self.submit(deltas[i]) for i in group]
+            broken = []
+            for i, future in zip(group, futures):
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool as e:
+                    broken.append(i)
+                    error = e
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[i] = e
+            if len(broken) == 0:
+                continue
+            self._restart()
+            if len(broken) == 1:
+                # The only unfinished job of the group broke the pool
+                if not return_exceptions:
+                    raise error
+                results[broken[0]] = error
+            else:
+                half = len(broken) // 2
+                groups.append(broken[half:])
+                groups.append(broken[:half])
+
+        return results
+
+    def close(self):
+        """Shut down the worker processes and remove the scratch directories"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        shutil.rmtree(self._pool_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -727,7 +727,115 @@ class TestNet3InpUnitsResults(unittest.TestCase):
         sim = self.wntr.sim.WNTRSimulator(wn)
         with self.assertRaises(NotImplementedError):
             results = sim.run_sim()
-        
-            
+
+
+class TestInMemoryWriter(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = self.wntr.network.WaterNetworkModel(inp_file)
+
+    def test_write_to_buffer(self):
+        import io
+
+        buf = io.BytesIO()
+        self.wntr.network.write_inpfile(self.wn, buf, units="GPM")
+        self.wntr.network.write_inpfile(self.wn, "temp_buffer.inp", units="GPM")
+        with open("temp_buffer.inp", "rb") as f:
+            text = f.read()
+        # Only the creation time stamp in the header may differ
+        self.assertEqual(buf.getvalue().split(b"[TITLE]")[1], text.split(b"[TITLE]")[1])
+
+    def test_section_cache(self):
+        import io
+
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        inpfile = self.wntr.epanet.InpFile()
+        first = io.BytesIO()
+        inpfile.write(first, wn, units="GPM")
+        self.assertEqual(set(inpfile._section_cache["[PATTERNS]"][0].keys()), set(wn.pattern_name_list))
+        self.assertEqual(set(inpfile._section_cache["[CURVES]"][0].keys()), set(wn.curve_name_list))
+        second = io.BytesIO()
+        inpfile.write(second, wn, units="GPM")
+        self.assertEqual(first.getvalue().split(b"[TITLE]")[1], second.getvalue().split(b"[TITLE]")[1])
+
+        # Changing values in place must invalidate the cached text
+        wn.get_pattern("1").multipliers[0] = 42.0
+        wn.get_curve("1").points[0] = (0.0, 50.0)
+        wn.get_node("10").coordinates = (1.5, 2.5)
+        wn.get_link("10").vertices = [(3.5, 4.5)]
+        buf = io.BytesIO()
+        inpfile.write(buf, wn, units="GPM")
+        text = buf.getvalue()
+        expected = io.BytesIO()
+        self.wntr.epanet.InpFile().write(expected, wn, units="GPM")
+        self.assertEqual(text.split(b"[TITLE]")[1], expected.getvalue().split(b"[TITLE]")[1])
+        self.assertIn(b"1 42.000000", text)
+        self.assertIn(b"1.500000000", text)
+        self.assertIn(b"3.500000000", text)
+
+        # Curves also depend on the flow units
+        buf = io.BytesIO()
+        inpfile.write(buf, wn, units="LPS")
+        expected = io.BytesIO()
+        self.wntr.epanet.InpFile().write(expected, wn, units="LPS")
+        self.assertEqual(buf.getvalue().split(b"[TITLE]")[1], expected.getvalue().split(b"[TITLE]")[1])
+
+    def test_simulator_temporary_files(self):
+        import os
+        import tempfile
+
+        sim = self.wntr.sim.EpanetSimulator(self.wn)
+        results1 = sim.run_sim(file_prefix="temp_prefix")
+        temp_dir = tempfile.mkdtemp(dir=".")
+        results2 = sim.run_sim(file_prefix=None, temp_dir=temp_dir)
+        self.assertEqual(os.listdir(temp_dir), [])
+        self.assertTrue(
+            (results1.node["pressure"] - results2.node["pressure"]).abs().max().max() < 1e-6
+        )
+
+class TestFastReader(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+    def test_same_model(self):
+        for inp_file in [
+            join(test_datadir, "io.inp"),
+            join(ex_datadir, "Net3.inp"),
+            join(ex_datadir, "Net6.inp"),
+            join(test_datadir, "Anytown_multipointcurves.inp"),
+        ]:
+            wn = self.wntr.network.read_inpfile(inp_file)
+            wn2 = self.wntr.network.read_inpfile(inp_file, fast=True)
+            self.assertTrue(wn._compare(wn2))
+            self.assertEqual(self.wntr.network.to_dict(wn), self.wntr.network.to_dict(wn2))
+            self.assertEqual(wn.node_name_list, wn2.node_name_list)
+            self.assertEqual(wn.pipe_name_list, wn2.pipe_name_list)
+            for name, usage in wn._node_reg.usage():
+                self.assertEqual(list(usage), list(wn2._node_reg.get_usage(name)))
+
+    def test_invalid_entry(self):
+        from wntr.epanet.exceptions import EpanetException
+
+        with open(join(test_datadir, "io.inp"), "r") as f:
+            text = f.read()
+        text = text.replace("[PIPES]\n", "[PIPES]\n bad_pipe j1 missing_node 100 12 100 0 Open\n", 1)
+        with open("temp_fast_reader.inp", "w") as f:
+            f.write(text)
+
+        with self.assertRaises(EpanetException) as standard:
+            self.wntr.network.read_inpfile("temp_fast_reader.inp")
+        with self.assertRaises(EpanetException) as fast:
+            self.wntr.network.read_inpfile("temp_fast_reader.inp", fast=True)
+        self.assertEqual(str(fast.exception.__cause__), str(standard.exception.__cause__))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of the standard and fast INP file readers on synthetic networks.
+
+Run with ``pytest -s -m time_consuming test_epanet_io_benchmark.py`` to print
+the timings. The benchmarks only check that both readers build the same
+model, they do not assert on the timings.
+"""
+import time
+import unittest
+
+import pytest
+
+
+def write_grid_inpfile(filename, n):
+    """
+    Write an INP file for an n by n grid of junctions fed by one reservoir.
+
+    The network has n*n + 1 nodes and 2*n*(n-1) + 1 pipes.
+    """
+    with open(filename, "w") as f:
+        f.write("[TITLE]\nSynthetic grid\n\n[JUNCTIONS]\n")
+        for i in range(n * n):
+            f.write(" J{}\t{:.2f}\t{:.3f}\t;\n".format(i, 10 + i % 7, (i % 13) * 0.1))
+        f.write("\n[RESERVOIRS]\n R1\t100\n\n[PIPES]\n P0\tR1\tJ0\t100\t12\t100\t0\tOpen\n")
+        k = 1
+        for r in range(n):
+            for c in range(n):
+                i = r * n + c
+                if c < n - 1:
+                    f.write(" P{}\tJ{}\tJ{}\t{}\t8\t120\t0\tOpen\t;\n".format(k, i, i + 1, 100 + k % 50))
+                    k += 1
+                if r < n - 1:
+                    f.write(" P{}\tJ{}\tJ{}\t{}\t6\t110\n".format(k, i, i + n, 100 + k % 50))
+                    k += 1
+        f.write("\n[COORDINATES]\n")
+        for i in range(n * n):
+            f.write(" J{}\t{}\t{}\n".format(i, i % n, i // n))
+        f.write("\n[OPTIONS]\n Units\tGPM\n Headloss\tH-W\n\n[END]\n")
+
+
+class TestInpReaderBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+    def benchmark(self, n_elements):
+        n = int(round((n_elements / 3) ** 0.5))
+        inp_file = "temp_grid_{}.inp".format(n_elements)
+        write_grid_inpfile(inp_file, n)
+
+        tic = time.perf_counter()
+        wn = self.wntr.network.read_inpfile(inp_file)
+        standard = time.perf_counter() - tic
+        tic = time.perf_counter()
+        wn2 = self.wntr.network.read_inpfile(inp_file, fast=True)
+        fast = time.perf_counter() - tic
+
+        print(
+            "\n{} nodes, {} links: standard reader {:.1f} s, fast reader {:.1f} s".format(
+                wn.num_nodes, wn.num_links, standard, fast
+            )
+        )
+        self.assertEqual(wn2.num_nodes, wn.num_nodes)
+        self.assertEqual(wn2.num_links, wn.num_links)
+        for name in [wn.pipe_name_list[0], wn.pipe_name_list[-1]]:
+            self.assertTrue(wn.get_link(name)._compare(wn2.get_link(name)))
+
+    @pytest.mark.time_consuming
+    def test_100k_elements(self):
+        self.benchmark(100000)
+
+    @pytest.mark.time_consuming
+    def test_1M_elements(self):
+        self.benchmark(1000000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -46,6 +46,67 @@ class TestEpanetMSXSim(unittest.TestCase):
         )
         self.assertLess(error, 0.0001)  # 0.01% error
 
+    def test_msx_bin_file_subset(self):
+        wn = wntr.network.WaterNetworkModel(inp_file_name=inp_filename)
+        wn.add_msx_model(msx_filename=msx_filename)
+        sim = wntr.sim.EpanetSimulator(wn)
+        res = sim.run_sim(file_prefix="temp_msx_subset")
+
+        link_name = wn.link_name_list[0]
+        subset = wntr.epanet.msx.io.MsxBinFile(
+            "temp_msx_subset.msx-bin", wn, species=["AStot"], nodes=["C", "A"], links=[link_name]
+        )
+        self.assertEqual(list(subset.node.keys()), ["AStot"])
+        self.assertEqual(list(subset.link.keys()), ["AStot"])
+        pd.testing.assert_frame_equal(subset.node["AStot"], res.node["AStot"][["C", "A"]])
+        pd.testing.assert_frame_equal(subset.link["AStot"], res.link["AStot"][[link_name]])
+
+    def test_msx_stepwise_capture(self):
+        wn = wntr.network.WaterNetworkModel(inp_file_name=inp_filename)
+        wn.add_msx_model(msx_filename=msx_filename)
+        sim = wntr.sim.EpanetSimulator(wn)
+        res = sim.run_sim(file_prefix="temp_msx_full")
+
+        link_name = wn.link_name_list[0]
+        capture = {"species": ["AStot"], "nodes": ["C", "A"], "links": [link_name]}
+        sub = sim.run_sim(file_prefix="temp_msx_step", msx_capture=capture)
+        self.assertIn("AStot", sub.node.keys())
+        self.assertNotIn("AS3", sub.node.keys())
+        pd.testing.assert_frame_equal(sub.node["AStot"], res.node["AStot"][["C", "A"]], rtol=1e-5)
+        pd.testing.assert_frame_equal(sub.link["AStot"], res.link["AStot"][[link_name]], rtol=1e-5)
+
+        # stop once the threshold is exceeded at node C
+        def stop(time, node, link):
+            return node["AStot"]["C"] > 5.0
+
+        sub = sim.run_sim(file_prefix="temp_msx_step", msx_capture=capture, msx_stop=stop)
+        last = sub.node["AStot"].index[-1]
+        self.assertEqual(last, 36000)
+        self.assertGreater(sub.node["AStot"].loc[last, "C"], 5.0)
+        self.assertTrue((sub.node["AStot"]["C"].iloc[:-1] <= 5.0).all())
+        pd.testing.assert_frame_equal(sub.node["AStot"], res.node["AStot"].loc[:last, ["C", "A"]], rtol=1e-5)
+
+    def test_msx_stop_accumulators(self):
+        wn = wntr.network.WaterNetworkModel(inp_file_name=inp_filename)
+        wn.add_msx_model(msx_filename=msx_filename)
+        sim = wntr.sim.EpanetSimulator(wn)
+
+        def stop(time, node, link):
+            return node["AStot"]["C"] > 5.0
+
+        pressure = wntr.metrics.StatisticsAccumulator("node", "pressure")
+        species = wntr.metrics.StatisticsAccumulator("node", "AStot")
+        res = sim.run_sim(file_prefix="temp_msx_step", msx_stop=stop, 
+                          accumulators=[pressure, species])
+
+        # Hydraulic results are accumulated over the full duration, MSX 
+        # results only until the simulation stopped
+        self.assertGreater(res.node["pressure"].index[-1], res.node["AStot"].index[-1])
+        pd.testing.assert_series_equal(pressure.result()["max"], res.node["pressure"].max(), 
+                                       check_names=False, check_dtype=False)
+        pd.testing.assert_series_equal(species.result()["max"], res.node["AStot"].max(), 
+                                       check_names=False, check_dtype=False)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
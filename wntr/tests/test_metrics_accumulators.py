@@ -0,0 +1,148 @@
+import unittest
+from unittest import mock
+from os.path import join
+
+import numpy as np
+import pandas as pd
+import wntr
+from pandas.testing import assert_series_equal
+
+from _test_paths import EXAMPLES_NETWORKS_DIR as ex_datadir
+
+
+class TestAccumulators(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.time.duration = 24 * 3600
+        self.expected_demand = wntr.metrics.expected_demand(self.wn)
+
+    def accumulators(self):
+        return [
+            wntr.metrics.StatisticsAccumulator(
+                "node", "pressure", percentiles=[5, 50, 95], bins=np.linspace(-10, 150, 801)
+            ),
+            wntr.metrics.ThresholdDurationAccumulator(
+                "node", "pressure", 40, elements=self.wn.junction_name_list
+            ),
+            wntr.metrics.WaterServiceAvailabilityAccumulator(self.expected_demand),
+            wntr.metrics.PumpEnergyAccumulator(self.wn),
+        ]
+
+    def check_accumulators(self, accumulators, results):
+        junctions = self.wn.junction_name_list
+        pressure = results.node["pressure"]
+
+        stats = accumulators[0].result()
+        pressure = pressure.loc[:, stats.index]
+        self.assertListEqual(list(stats.columns), ["min", "max", "mean", "5%", "50%", "95%"])
+        assert_series_equal(stats["min"], pressure.min(), check_names=False, check_dtype=False)
+        assert_series_equal(stats["max"], pressure.max(), check_names=False, check_dtype=False)
+        self.assertLess((stats["mean"] - pressure.mean()).abs().max(), 1e-4)
+        for percentile in [5, 50, 95]:
+            error = stats["{}%".format(percentile)] - pressure.quantile(percentile / 100)
+            self.assertLess(error.abs().max(), 0.4)  # within two bins
+
+        duration = accumulators[1].result()
+        expected = (pressure.loc[:, junctions] < 40).sum() * 3600
+        assert_series_equal(duration, expected.loc[duration.index], check_dtype=False, check_names=False)
+
+        wsa = accumulators[2].result()
+        expected = wntr.metrics.water_service_availability(
+            self.expected_demand.sum(), results.node["demand"].loc[:, junctions].sum()
+        )
+        assert_series_equal(wsa, expected, check_dtype=False, check_names=False, rtol=1e-5)
+
+        energy = accumulators[3].result()
+        expected = wntr.metrics.pump_energy(
+            results.link["flowrate"].loc[:, self.wn.pump_name_list], results.node["head"], self.wn
+        )
+        assert_series_equal(energy["energy"], expected.sum(), check_names=False, check_dtype=False)
+
+    def test_epanet_simulator(self):
+        accumulators = self.accumulators()
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        results = sim.run_sim(accumulators=accumulators)
+        self.check_accumulators(accumulators, results)
+        self.assertEqual(len(sim._report_hooks), 0)
+
+    def test_wntr_simulator(self):
+        accumulators = self.accumulators()
+        sim = wntr.sim.WNTRSimulator(self.wn)
+        results = sim.run_sim(accumulators=accumulators)
+        self.check_accumulators(accumulators, results)
+        self.assertEqual(len(sim._report_hooks), 0)
+
+    def test_keep_results(self):
+        for sim in [wntr.sim.EpanetSimulator(self.wn), wntr.sim.WNTRSimulator(self.wn)]:
+            results = sim.run_sim()
+            self.wn.reset_initial_values()
+            accumulators = self.accumulators()
+            summary = sim.run_sim(accumulators=accumulators, keep_results=False)
+            self.wn.reset_initial_values()
+            self.assertEqual(summary.node, {})
+            self.assertEqual(summary.link, {})
+            self.check_accumulators(accumulators, results)
+
+        # Report periods read from the binary file in several blocks
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        results = sim.run_sim()
+        accumulators = self.accumulators()
+        with mock.patch("wntr.epanet.io._REPORT_BLOCK_VALUES", 5000):
+            sim.run_sim(accumulators=accumulators, keep_results=False)
+        self.check_accumulators(accumulators, results)
+
+    def test_pump_efficiency_curve(self):
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.time.duration = 24 * 3600
+        wn.add_curve("efficiency", "EFFICIENCY", [(0.0, 0), (0.2, 80), (0.5, 60)])
+        for name in wn.pump_name_list:
+            wn.get_link(name).efficiency_curve_name = "efficiency"
+        accumulator = wntr.metrics.PumpEnergyAccumulator(wn)
+        results = wntr.sim.EpanetSimulator(wn).run_sim(accumulators=[accumulator])
+
+        power = wntr.metrics.pump_power(
+            results.link["flowrate"].loc[:, wn.pump_name_list], results.node["head"], wn
+        )
+        energy = accumulator.result()
+        assert_series_equal(energy["energy"], power.sum() * 3600, check_names=False, check_dtype=False)
+        assert_series_equal(energy["max_power"], power.max(), check_names=False, check_dtype=False)
+
+    def test_irregular_report_steps(self):
+        accumulator = wntr.metrics.ThresholdDurationAccumulator("node", "pressure", 1)
+        for time, value in [(0, 0), (600, 2), (3600, 0), (4200, 0)]:
+            accumulator(time, {"pressure": pd.Series([value], index=["J1"])}, {})
+        self.assertEqual(accumulator.result()["J1"], 600 + 600 + 600)
+
+    def test_percentiles_require_bins(self):
+        self.assertRaises(
+            ValueError, wntr.metrics.StatisticsAccumulator, "node", "pressure", percentiles=[50]
+        )
+        self.assertRaises(ValueError, wntr.metrics.StatisticsAccumulator, "junction", "pressure")
+
+    def test_statistics_memory(self):
+        # Report steps are generated directly, without a simulation
+        n_nodes, n_steps = 1000, 168
+        rng = np.random.default_rng(0)
+        index = pd.Index(["J{}".format(i) for i in range(n_nodes)])
+        base = rng.uniform(10, 60, n_nodes)
+        accumulators = [
+            wntr.metrics.StatisticsAccumulator(
+                "node", "pressure", percentiles=[5, 95], bins=np.linspace(0, 80, 161)
+            ),
+            wntr.metrics.ThresholdDurationAccumulator("node", "pressure", 20),
+        ]
+        for step in range(n_steps):
+            pressure = pd.Series(base + 10 * np.sin(step / 24 * 2 * np.pi), index=index)
+            for accumulator in accumulators:
+                accumulator(step * 3600, {"pressure": pressure}, {})
+        statistics = [accumulator.result() for accumulator in accumulators]
+
+        # The statistics are much smaller than the pressure at all steps
+        memory = sum(np.sum(df.memory_usage(deep=True)) for df in statistics)
+        self.assertLess(memory, n_nodes * n_steps * 8 / 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
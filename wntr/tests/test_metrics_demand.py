@@ -87,6 +87,37 @@ class TestMetricsDemand(unittest.TestCase):
         )
         assert_series_equal(wsa, expected, check_dtype=False)
 
+    def test_wsa_ensemble(self):
+
+        expected_demand = pd.DataFrame(
+            data=[[12, 2], [3, 4], [5, 10]], columns=["A", "B"], index=[0, 1, 2]
+        )
+        demand = pd.DataFrame(
+            data=[[5, 2], [3, 2], [3, 4]], columns=["A", "B"], index=[0, 1, 2]
+        )
+        scenarios = {"low": demand / 2, "base": demand, "high": demand * 2}
+        expected = pd.concat(
+            {name: wntr.metrics.hydraulic.water_service_availability(expected_demand, d)
+             for name, d in scenarios.items()},
+            names=["scenario", None],
+        )
+
+        # Expected demand used for all scenarios
+        wsa = wntr.metrics.hydraulic.water_service_availability(expected_demand, scenarios)
+        assert_frame_equal(wsa, expected, check_dtype=False)
+
+        # Results indexed by scenario and time, one scenario at a time
+        wsa = wntr.metrics.hydraulic.water_service_availability(
+            expected_demand, pd.concat(scenarios, names=["scenario", None]), chunk_size=1
+        )
+        assert_frame_equal(wsa, expected, check_dtype=False)
+
+        # Expected demand for each scenario
+        wsa = wntr.metrics.hydraulic.water_service_availability(
+            [expected_demand] * 3, list(scenarios.values())
+        )
+        assert_frame_equal(wsa.droplevel(0), expected.droplevel(0), check_dtype=False)
+
 class TestTankCapacity(unittest.TestCase):
     
     @classmethod
@@ -108,6 +139,26 @@ class TestTankCapacity(unittest.TestCase):
 
         self.assertLess(tank_capacity.max().max(), 1)
         self.assertGreater(tank_capacity.min().min(), 0.4) # for this example, tanks capcity is > 0.4
+
+    def test_tank_capacity_ensemble(self):
+
+        pressure = self.results.node["pressure"].loc[:,self.wn.tank_name_list]
+        scenarios = [pressure, pressure*0.9, pressure*0.8]
+        tank_capacity = wntr.metrics.tank_capacity(scenarios, self.wn, chunk_size=2)
+
+        for i, p in enumerate(scenarios):
+            expected = wntr.metrics.tank_capacity(p, self.wn)
+            assert_frame_equal(tank_capacity.loc[i], expected, check_dtype=False)
+
+        # DataFrame indexed by scenario and time, with all nodes or tanks only
+        for pressure in [self.results.node["pressure"], pressure]:
+            scenarios = pd.concat({'a': pressure, 'b': pressure*0.9})
+            tank_capacity = wntr.metrics.tank_capacity(scenarios, self.wn)
+            for name in ['a', 'b']:
+                expected = wntr.metrics.tank_capacity(
+                    scenarios.loc[name, self.wn.tank_name_list], self.wn)
+                assert_frame_equal(tank_capacity.loc[name], expected, 
+                                   check_dtype=False, check_names=False)
     
     
 if __name__ == "__main__":
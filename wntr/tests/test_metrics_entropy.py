@@ -2,10 +2,13 @@ import unittest
 from os.path import join
 
 import numpy as np
+import pandas as pd
 import wntr
+from wntr.metrics.hydraulic import _entropy_dag, _entropy_simple_paths
 
 from _test_paths import (
     NETWORKS_FOR_TESTING_DIR as datadir,
+    EXAMPLES_NETWORKS_DIR as netdir,
 )
 
 
@@ -87,6 +90,54 @@ class TestEntropyMetric(unittest.TestCase):
         error = abs((S_ave - expected_S_ave) / expected_S_ave)
         self.assertLess(error, 0.05)  # 5% error
 
+    def test_simple_paths(self):
+        # Dynamic programming gives the same result as simple path enumeration
+        inp_file = join(netdir, "Net3.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        sim = wntr.sim.EpanetSimulator(wn)
+        results = sim.run_sim()
+        flowrate = results.link["flowrate"].loc[0]
+        G = wn.to_graph(link_weight=flowrate, modify_direction=True)
+        sources = wn.reservoir_name_list
+
+        S1, Q1 = _entropy_simple_paths(G, sources, G.nodes())
+        S2, Q2 = _entropy_dag(G, sources, G.nodes())
+
+        pd.testing.assert_series_equal(pd.Series(S2), pd.Series(S1), rtol=1e-12)
+        pd.testing.assert_series_equal(pd.Series(Q2), pd.Series(Q1), rtol=1e-12)
+        self.assertGreater(pd.Series(S1).notnull().sum(), 80)
+
+    def test_zero_flow_cycle(self):
+        # Links without flow that form a cycle are removed
+        inp_file = join(datadir, "Awumah_layout1.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        attr = pd.Series(100.0, index=wn.link_name_list)
+        G = wn.to_graph(link_weight=attr, modify_direction=True)
+        [S, S_ave] = wntr.metrics.entropy(G)
+
+        start_node, end_node, key = list(G.edges(keys=True))[-1]
+        G.add_edge(end_node, start_node, key="reverse", weight=0)
+        self.assertIsNone(_entropy_dag(G, wn.reservoir_name_list, G.nodes()))
+        [S2, S_ave2] = wntr.metrics.entropy(G)
+
+        pd.testing.assert_series_equal(S2, S)
+        self.assertAlmostEqual(S_ave2, S_ave)
+
+    def test_grid(self):
+        from test_epanet_io_benchmark import write_grid_inpfile
+
+        # Pipes in the grid are directed away from the reservoir, so the 
+        # number of paths grows exponentially with the size of the grid
+        write_grid_inpfile("temp_grid_entropy.inp", 30)
+        wn = wntr.network.read_inpfile("temp_grid_entropy.inp", fast=True)
+        attr = pd.Series(1.0, index=wn.link_name_list)
+        G = wn.to_graph(link_weight=attr)
+        [S, S_ave] = wntr.metrics.entropy(G)
+
+        self.assertEqual(len(S), wn.num_nodes)
+        self.assertTrue(np.isfinite(S.values).all())
+        self.assertTrue(np.isfinite(S_ave))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 from os.path import join
 
+import numpy as np
 import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
 
 from _test_paths import (
     EXAMPLES_NETWORKS_DIR as ex_datadir,
@@ -78,5 +80,122 @@ class TestPumpNet3(unittest.TestCase):
         self.assertLess(error.max().max(), 0.01)
 
 
+class TestPumpCostModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = self.wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.energy.global_price = 3.61e-8
+        self.wn.options.time.duration = 24 * 3600
+        sim = self.wntr.sim.EpanetSimulator(self.wn)
+        results = sim.run_sim()
+        self.flowrate = results.link["flowrate"].loc[:, self.wn.pump_name_list]
+        self.head = results.node["head"]
+
+    def test_power_and_cost(self):
+        model = self.wntr.metrics.PumpCostModel(self.wn)
+        energy = self.wntr.metrics.pump_energy(self.flowrate, self.head, self.wn)
+
+        assert_frame_equal(model.energy(self.flowrate, self.head), energy, check_names=False)
+        cost = model.cost(self.flowrate, self.head)
+        assert_frame_equal(cost, energy * 3.61e-8, check_names=False)
+        assert_series_equal(model.total_cost(self.flowrate, self.head), cost.sum())
+
+    def test_price_patterns(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.energy.global_price = 3e-8
+        wn.add_pattern("price", [0.5, 1.5])
+        wn.options.energy.global_pattern = "price"
+        wn.get_link("10").energy_price = 2e-8
+        wn.add_pattern("price10", [1, 2, 3])
+        wn.get_link("10").energy_pattern = "price10"
+
+        model = self.wntr.metrics.PumpCostModel(wn)
+        price = model.price([0, 3600, 7200, 10800])
+        expected = pd.DataFrame(
+            {"10": [2e-8, 4e-8, 6e-8, 2e-8], "335": [1.5e-8, 4.5e-8, 1.5e-8, 4.5e-8]},
+            index=[0, 3600, 7200, 10800],
+        )
+        assert_frame_equal(price, expected)
+
+        energy = self.wntr.metrics.pump_energy(self.flowrate, self.head, wn)
+        cost = self.wntr.metrics.pump_cost(energy, wn)
+        assert_frame_equal(cost, energy * model.price(energy.index), check_names=False)
+
+    def test_demand_charge(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.energy.demand_charge = 1.0
+        energy = self.wntr.metrics.pump_energy(self.flowrate, self.head, wn)
+        with self.assertRaises(ValueError):
+            self.wntr.metrics.pump_cost(energy, wn)
+        with self.assertRaises(ValueError):
+            self.wntr.metrics.PumpCostModel(wn).cost(self.flowrate, self.head)
+
+    def test_tariff(self):
+        tariff = np.array([1e-8] * 7 + [4e-8] * 17)  # night and day prices
+        model = self.wntr.metrics.PumpCostModel(self.wn, tariff=tariff, tariff_timestep=3600)
+        energy = self.wntr.metrics.pump_energy(self.flowrate, self.head, self.wn)
+        hour = (self.flowrate.index // 3600) % 24
+        assert_frame_equal(
+            model.cost(self.flowrate, self.head), energy.mul(tariff[hour], axis=0), check_names=False
+        )
+
+        model = self.wntr.metrics.PumpCostModel(self.wn, tariff={"10": tariff, "335": tariff * 2})
+        cost = model.cost(self.flowrate, self.head)
+        assert_series_equal(cost["335"], energy["335"] * tariff[hour] * 2, check_names=False)
+
+    def test_efficiency_curve(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.add_curve("efficiency", "EFFICIENCY", [(0.0, 50), (0.2, 80), (0.5, 60)])
+        pump = wn.get_link("335")
+        pump.efficiency_curve_name = "efficiency"
+
+        power = self.wntr.metrics.pump_power(self.flowrate, self.head, wn)
+        flow = self.flowrate["335"]
+        efficiency = np.interp(flow, [0.0, 0.2, 0.5], [0.5, 0.8, 0.6])
+        headloss = self.head[pump.end_node_name] - self.head[pump.start_node_name]
+        expected = 1000.0 * 9.81 * headloss * flow / efficiency
+        assert_series_equal(power["335"], expected, check_names=False)
+
+    def test_closed_pump(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.energy.global_price = 3.61e-8
+        wn.add_curve("efficiency", "EFFICIENCY", [(0.0, 0), (0.2, 80), (0.5, 60)])
+        for name in wn.pump_name_list:
+            wn.get_link(name).efficiency_curve_name = "efficiency"
+        self.assertTrue((self.flowrate == 0).any().all())
+
+        model = self.wntr.metrics.PumpCostModel(wn)
+        power = model.power(self.flowrate, self.head)
+        self.assertFalse(power.isna().any().any())
+        self.assertTrue((power.to_numpy()[self.flowrate.to_numpy() == 0] == 0).all())
+
+        total_cost = model.total_cost(self.flowrate, self.head)
+        assert_series_equal(total_cost, model.cost(self.flowrate, self.head).sum())
+        ensemble = model.total_cost([self.flowrate, self.flowrate], [self.head, self.head])
+        for i in range(2):
+            assert_series_equal(ensemble.loc[i], total_cost, check_names=False)
+
+    def test_ensemble(self):
+        model = self.wntr.metrics.PumpCostModel(self.wn)
+        flowrate = {i: self.flowrate * (1 - 0.1 * i) for i in range(4)}
+        head = {i: self.head for i in range(4)}
+
+        cost = model.cost(flowrate, head, chunk_size=3)
+        total_cost = model.total_cost(flowrate, head)
+        self.assertListEqual(list(total_cost.index), [0, 1, 2, 3])
+        for i in range(4):
+            expected = model.cost(flowrate[i], head[i])
+            assert_frame_equal(cost.loc[i], expected, check_names=False)
+            assert_series_equal(total_cost.loc[i], expected.sum(), check_names=False)
+
+        cubes = [pd.concat(data, names=["scenario", None]) for data in (flowrate, head)]
+        assert_frame_equal(model.total_cost(*cubes), total_cost)
+
+
 if __name__ == "__main__":
     unittest.main()
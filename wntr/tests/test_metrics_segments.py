@@ -179,6 +179,19 @@ class TestSegmentation(unittest.TestCase):
                     (old_segment_size.loc[k]==segment_size.loc[k]).all()
                     )
 
+    def test_grid_segment_sizes(self):
+        from test_epanet_io_benchmark import write_grid_inpfile
+
+        write_grid_inpfile("temp_grid_segments.inp", 30)
+        wn = wntr.network.read_inpfile("temp_grid_segments.inp", fast=True)
+        G = wn.to_graph()
+        valve_layer = wntr.network.generate_valve_layer(wn, "strategic", 1, seed=123)
+        node_segments, link_segments, segment_size = wntr.metrics.valve_segments(G, valve_layer)
+
+        # Each node and link is in exactly one segment
+        self.assertEqual(segment_size["node"].sum(), wn.num_nodes)
+        self.assertEqual(segment_size["link"].sum(), wn.num_links)
+
 def matrix_valve_segments(G, valve_layer):
     """
     Valve segmentation
@@ -1,5 +1,7 @@
 import unittest
 from os.path import join
+
+import pandas as pd
 from pandas.testing import assert_frame_equal, assert_series_equal
 
 import wntr
@@ -151,6 +153,61 @@ class TestMRIMetric(unittest.TestCase):
         
         self.assertEqual(mri_per_junction_nzd.min().min(), 0) # the min is 0 because Pstar is the min required pressure
         self.assertLess(mri_per_junction_nzd.max().max(), 1) # for this example, mri per junction is < 1
-        
+
+
+class TestEnsembleMetrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.time.duration = 24*3600
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        self.results = sim.run_sim()
+
+    def scenarios(self, n):
+        # Scale heads and demands to mimic Monte Carlo realizations
+        head = [self.results.node["head"]*(1 + 0.01*i) for i in range(n)]
+        pressure = [self.results.node["pressure"]]*n
+        demand = [self.results.node["demand"]*(1 - 0.01*i) for i in range(n)]
+        flowrate = [self.results.link["flowrate"]]*n
+        return head, pressure, demand, flowrate
+
+    def test_todini_ensemble(self):
+        head, pressure, demand, flowrate = self.scenarios(5)
+        expected = pd.concat([
+            wntr.metrics.todini_index(h, p, d, f, self.wn, 20)
+            for h, p, d, f in zip(head, pressure, demand, flowrate)],
+            keys=range(5), names=["scenario", None])
+
+        todini = wntr.metrics.todini_index(head, pressure, demand, flowrate, 
+                                           self.wn, 20, chunk_size=2)
+        assert_series_equal(todini, expected, check_dtype=False, rtol=1e-5)
+
+        cubes = [pd.concat(data, keys=range(5), names=["scenario", None]) 
+                 for data in (head, pressure, demand, flowrate)]
+        todini = wntr.metrics.todini_index(*cubes, self.wn, 20)
+        assert_series_equal(todini, expected, check_dtype=False, rtol=1e-5)
+
+    def test_MRI_ensemble(self):
+        head, pressure, demand, flowrate = self.scenarios(3)
+        junctions = self.wn.junction_name_list
+        elevation = self.wn.query_node_attribute('elevation').loc[junctions]
+        pressure = {name: p.loc[:, junctions]*(1 + 0.1*i) for i, (name, p) in 
+                    enumerate(zip(["a", "b", "c"], pressure))}
+        demand = {name: d.loc[:, junctions] for name, d in zip(["a", "b", "c"], demand)}
+
+        mri = wntr.metrics.modified_resilience_index(pressure, elevation, 20)
+        for name in pressure.keys():
+            expected = wntr.metrics.modified_resilience_index(pressure[name], elevation, 20)
+            assert_frame_equal(mri.loc[name], expected, check_dtype=False, check_names=False)
+
+        mri = wntr.metrics.modified_resilience_index(pressure, elevation, 20, demand, False)
+        for name in pressure.keys():
+            expected = wntr.metrics.modified_resilience_index(pressure[name], elevation, 20, 
+                                                              demand[name], False)
+            assert_series_equal(mri.loc[name], expected, check_dtype=False, check_names=False)
+
+
 if __name__ == "__main__":
     unittest.main()
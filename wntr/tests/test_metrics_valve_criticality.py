@@ -108,6 +108,63 @@ class TestSegmentation(unittest.TestCase):
             valve_crit, expected_valve_crit, check_dtype=False, check_names=False
         )
 
+    def test_valve_failure_impact(self):
+        G = self.wn.to_graph()
+        node_demands = wntr.metrics.average_expected_demand(self.wn)
+        link_lengths = self.wn.query_link_attribute("length")
+
+        single = wntr.metrics.valve_failure_impact(
+            self.valves, self.node_segments, self.link_segments,
+            node_demands, link_lengths
+        )
+        pairs = wntr.metrics.valve_failure_impact(
+            self.valves, self.node_segments, self.link_segments,
+            node_demands, link_lengths, pairs=True
+        )
+        self.assertEqual(len(single), len(self.valves))
+        self.assertEqual(pairs.index.names, ["valve1", "valve2"])
+
+        # Compare to the segments without the valves that fail
+        for impact, failures in [(single, [[i] for i in single.index[::10]]),
+                                 (pairs, [list(i) for i in pairs.index[::20]])]:
+            for failed in failures:
+                valves = self.valves.drop(self.valves.index[failed]).reset_index(drop=True)
+                node_segments, link_segments, seg_size = wntr.metrics.valve_segments(G, valves)
+                segment = node_segments[self.valves.iloc[failed[0]]["node"]]
+                nodes = node_segments.index[node_segments == segment]
+                links = link_segments.index[link_segments == segment]
+
+                row = impact.loc[failed[0]] if len(failed) == 1 else impact.loc[tuple(failed)]
+                self.assertEqual(row["num_nodes"], len(nodes))
+                self.assertEqual(row["num_links"], len(links))
+                self.assertAlmostEqual(row["demand"], node_demands.reindex(nodes).fillna(0).sum())
+                self.assertAlmostEqual(row["length"], link_lengths.reindex(links).fillna(0).sum())
+
+        # The increase as a fraction of the largest segment is the valve
+        # segment attribute
+        valve_attr = wntr.metrics.valve_segment_attributes(
+            self.valves, self.node_segments, self.link_segments,
+            node_demands, link_lengths
+        )
+        length_increase = single["length_increase"] / (single["length"] - single["length_increase"])
+        assert_series_equal(length_increase.fillna(0), valve_attr["length_increase"], check_names=False)
+
+    def test_grid(self):
+        from test_epanet_io_benchmark import write_grid_inpfile
+
+        write_grid_inpfile("temp_grid_valves.inp", 30)
+        wn = wntr.network.read_inpfile("temp_grid_valves.inp", fast=True)
+        valve_layer = wntr.network.generate_valve_layer(wn, "strategic", 1, seed=123)
+        node_segments, link_segments, seg_size = wntr.metrics.valve_segments(
+            wn.to_graph(), valve_layer
+        )
+        demand = wntr.metrics.average_expected_demand(wn)
+        length = wn.query_link_attribute("length")
+        valve_attr = wntr.metrics.valve_segment_attributes(
+            valve_layer, node_segments, link_segments, demand, length
+        )
+        self.assertEqual(len(valve_attr), len(valve_layer))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,17 @@
+import copy
+import io
+import json
+import pickle
 import unittest
 import warnings
 from os.path import join
 
 import numpy as np
 import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
 import wntr
 from wntr.network.controls import Control, Rule
+from wntr.network.io import _is_bulk_junction
 
 try:
     import geopandas as gpd
@@ -202,6 +208,83 @@ class TestNetworkMethods(unittest.TestCase):
         wn.add_pipe("p1", "j1", "j2", 1000, 1, 100, 0, "OPEN", True)
         self.assertTrue(wn.get_link('p1').check_valve)
 
+    def test_add_elements_in_bulk(self):
+        wn = self.wntr.network.WaterNetworkModel()
+        wn.add_pattern("pattern1", [1])
+        wn.add_curve("curve1", "HEAD", [(0.1, 50.0)])
+        wn.add_junction("j1", 0.01, "pattern1", 15, (0, 0))
+        wn.add_junction("j2", 0.02, None, 16, (1, 0), "residential")
+        wn.add_junction("j3", 0.0, None, 17, (2, 0))
+        wn.add_tank("t1", 15, 7.5, 0, 10, 10, 0)
+        wn.add_reservoir("r1", 30, "pattern1")
+        wn.add_pipe("p1", "j1", "j2", 1000, 0.3, 100, 0, "OPEN")
+        wn.add_pipe("p2", "j2", "j3", 500, 0.2, 120, 0.5, "CLOSED", True)
+        wn.add_pump("pump1", "r1", "j1", "HEAD", "curve1")
+        wn.add_valve("v1", "j3", "j1", 0.2, "PRV", 0, 20)
+
+        wn2 = self.wntr.network.WaterNetworkModel()
+        wn2.add_pattern("pattern1", [1])
+        wn2.add_curve("curve1", "HEAD", [(0.1, 50.0)])
+        junctions = pd.DataFrame(
+            {
+                "base_demand": [0.01, 0.02, 0.0],
+                "demand_pattern": ["pattern1", None, None],
+                "elevation": [15, 16, 17],
+                "coordinates": [(0, 0), (1, 0), (2, 0)],
+                "demand_category": [None, "residential", None],
+            },
+            index=["j1", "j2", "j3"],
+        )
+        wn2.add_junctions(junctions)
+        wn2.add_tanks({"name": ["t1"], "elevation": 15, "init_level": 7.5, "min_level": 0,
+                       "max_level": 10, "diameter": 10, "min_vol": 0})
+        wn2.add_reservoirs({"name": ["r1"], "base_head": [30], "head_pattern": ["pattern1"]})
+        wn2.add_pipes({
+            "name": ["p1", "p2"],
+            "start_node_name": ["j1", "j2"],
+            "end_node_name": ["j2", "j3"],
+            "length": np.array([1000, 500]),
+            "diameter": np.array([0.3, 0.2]),
+            "roughness": [100, 120],
+            "minor_loss": [0, 0.5],
+            "initial_status": ["OPEN", "CLOSED"],
+            "check_valve": [False, True],
+        })
+        wn2.add_pumps({"name": ["pump1"], "start_node_name": "r1", "end_node_name": "j1",
+                       "pump_type": "HEAD", "pump_parameter": "curve1"})
+        wn2.add_valves({"name": ["v1"], "start_node_name": "j3", "end_node_name": "j1",
+                        "diameter": 0.2, "valve_type": "PRV", "initial_setting": 20})
+
+        self.assertTrue(wn._compare(wn2))
+        self.assertEqual(wn.node_name_list, wn2.node_name_list)
+        self.assertEqual(wn.link_name_list, wn2.link_name_list)
+        self.assertEqual(wn.to_dict(), wn2.to_dict())
+        self.assertEqual(type(wn2.get_node("j1").elevation), float)
+        self.assertEqual(type(wn2.get_link("p1").length), float)
+        for name, usage in wn._node_reg.usage():
+            self.assertEqual(list(usage), list(wn2._node_reg.get_usage(name)))
+        self.assertEqual(
+            list(wn._pattern_reg.get_usage("pattern1")), list(wn2._pattern_reg.get_usage("pattern1"))
+        )
+
+    def test_add_elements_in_bulk_invalid(self):
+        wn = self.wntr.network.WaterNetworkModel()
+        wn.add_junctions({"name": ["j1", "j2"], "elevation": [1.0, 2.0]})
+        # Nothing is added if any element is invalid
+        with self.assertRaises(ValueError):
+            wn.add_junctions({"name": ["j3", "j1"]})
+        with self.assertRaises(ValueError):
+            wn.add_junctions({"name": ["j3", "j3"]})
+        with self.assertRaises(KeyError):
+            wn.add_pipes({"name": ["p1", "p2"], "start_node_name": ["j1", "j2"], "end_node_name": ["j2", "j4"]})
+        with self.assertRaises(ValueError):
+            wn.add_pipes({"name": ["p1", "p2"], "start_node_name": "j1", "end_node_name": "j2", "diameter": [0.1, 0]})
+        with self.assertRaises(ValueError):
+            wn.add_tanks({"name": ["t1", "t2"], "init_level": [1, 20], "max_level": 10})
+        self.assertEqual(wn.node_name_list, ["j1", "j2"])
+        self.assertEqual(wn.link_name_list, [])
+        self.assertEqual(wn._node_reg.get_usage("j1"), None)
+
     def test_remove_pipe(self):
         wn = self.wntr.network.WaterNetworkModel()
         wn.add_junction("j1")
@@ -713,6 +796,42 @@ class TestCase(unittest.TestCase):
 
         self.assertSetEqual(set(pipes.keys()), expected_pipes)
 
+    def test_query_attribute_types(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+
+        # Links without the attribute are skipped
+        diameter = wn.query_link_attribute("diameter")
+        self.assertListEqual(list(diameter.index), list(wn.pipe_name_list) + list(wn.valve_name_list))
+        status = wn.query_link_attribute("initial_status", np.equal, wntr.network.LinkStatus.Closed)
+        self.assertListEqual(list(status.index), ["330", "10"])
+        pumps = wn.query_link_attribute("link_type", np.equal, "Pump")
+        self.assertListEqual(list(pumps.index), list(wn.pump_name_list))
+        # Operations that do not support arrays are applied to each value
+        long_pipes = wn.query_link_attribute("length", lambda a, b: a > b, 1000, link_type=wntr.network.Pipe)
+        self.assertTrue(all(length > 1000 for length in long_pipes))
+        self.assertEqual(len(wn.query_node_attribute("max_level", np.greater, 1000)), 0)
+        with self.assertRaises(RuntimeError):
+            wn.query_node_attribute("elevation", node_type=wntr.network.Pipe)
+
+    def test_get_attributes(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+
+        data = wn.get_attributes(["diameter", "length", "link_type"])
+        self.assertListEqual(list(data.columns), ["diameter", "length", "link_type"])
+        self.assertListEqual(list(data.index), list(wn.link_name_list))
+        assert_series_equal(data["length"].dropna(), wn.query_link_attribute("length"), check_names=False)
+        self.assertTrue(data.loc[wn.pump_name_list, "diameter"].isna().all())
+
+        data = wn.get_attributes("elevation", wntr.network.Junction)
+        self.assertListEqual(list(data.index), list(wn.junction_name_list))
+        data = wn.get_attributes(["elevation", "max_level"], wntr.network.Node)
+        self.assertEqual(len(data), wn.num_nodes)
+        self.assertEqual(data["max_level"].notna().sum(), wn.num_tanks)
+        with self.assertRaises(RuntimeError):
+            wn.get_attributes(["elevation"], "junction")
+
     def test_nzd_nodes(self):
         inp_file = join(ex_datadir, "Net1.inp")
         wn = wntr.network.WaterNetworkModel(inp_file)
@@ -981,6 +1100,113 @@ class TestNetworkIO_Dict(unittest.TestCase):
         wn.add_pattern('pat0', [0,1,0,1,0,1,0])
         self.wntr.network.write_json(wn, f'temp.json')
         
+    def test_snapshot_roundtrip(self):
+        for inp_file in self.inp_files:
+            wn = self.wntr.network.WaterNetworkModel(inp_file)
+            wn.convert_controls_to_rules()
+            for compressed in [False, True]:
+                self.wntr.network.save_snapshot(wn, 'temp_snapshot.npz', compressed=compressed)
+                for mmap_mode in [None, 'r']:
+                    B = self.wntr.network.load_snapshot('temp_snapshot.npz', mmap_mode=mmap_mode)
+                    assert(wn._compare(B))
+                    self.assertEqual(wn.node_name_list, B.node_name_list)
+                    self.assertEqual(wn.link_name_list, B.link_name_list)
+                    self.assertEqual(json.dumps(wn.to_dict()), json.dumps(B.to_dict()))
+
+    def test_snapshot_attributes(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        junction = wn.get_node(wn.junction_name_list[0])
+        junction.add_leak(wn, area=1.0, start_time=0, end_time=3600)
+        junction.tag = 'leaky'
+        junction.minimum_pressure = 1.5
+        junction2 = wn.get_node(wn.junction_name_list[1])
+        junction2.add_demand(0.5, '1', 'extra')
+        junction2.custom = 'value'
+        pipe = wn.get_link(wn.pipe_name_list[0])
+        pipe.bulk_coeff = -0.5
+        pipe.vertices = [(1.0, 2.0)]
+        wn.get_link(wn.pipe_name_list[1]).initial_status = 'CLOSED'
+        wn.get_link(wn.pipe_name_list[2]).check_valve = True
+
+        buf = io.BytesIO()
+        self.wntr.network.save_snapshot(wn, buf)
+        buf.seek(0)
+        B = self.wntr.network.load_snapshot(buf)
+
+        self.assertEqual(json.dumps(wn.to_dict()), json.dumps(B.to_dict()))
+        junction_b = B.get_node(junction.name)
+        self.assertTrue(junction_b._leak)
+        self.assertEqual(junction_b._leak_area, 1)
+        self.assertEqual(junction_b.tag, 'leaky')
+        self.assertEqual(junction_b.minimum_pressure, 1.5)
+        junction2_b = B.get_node(junction2.name)
+        self.assertEqual(len(junction2_b.demand_timeseries_list), 2)
+        self.assertEqual(junction2_b.custom, 'value')
+        self.assertEqual(B.get_link(pipe.name).vertices, [[1.0, 2.0]])
+        self.assertEqual(B.get_link(wn.pipe_name_list[1]).initial_status, wntr.network.LinkStatus.Closed)
+        self.assertTrue(B.get_link(wn.pipe_name_list[2]).check_valve)
+
+    def test_snapshot_invalid(self):
+        np.savez('temp_snapshot.npz', values=np.arange(3))
+        self.assertRaises(ValueError, self.wntr.network.load_snapshot, 'temp_snapshot.npz')
+
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        self.wntr.network.save_snapshot(wn, 'temp_snapshot.npz')
+        with np.load('temp_snapshot.npz') as npz:
+            arrays = dict(npz)
+        header = json.loads(bytes(arrays['header']).decode('utf-8'))
+        header['snapshot_version'] += 1
+        arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+        np.savez('temp_snapshot.npz', **arrays)
+        self.assertRaises(ValueError, self.wntr.network.load_snapshot, 'temp_snapshot.npz')
+
+    def test_pickle_roundtrip(self):
+        for inp_file in self.inp_files:
+            wn = self.wntr.network.WaterNetworkModel(inp_file)
+            for B in [pickle.loads(pickle.dumps(wn)), copy.deepcopy(wn)]:
+                assert(wn._compare(B))
+                self.assertEqual(wn.node_name_list, B.node_name_list)
+                self.assertEqual(wn.link_name_list, B.link_name_list)
+                self.assertEqual(wn.control_name_list, B.control_name_list)
+                self.assertEqual(json.dumps(wn.to_dict()), json.dumps(B.to_dict()))
+
+    def test_deepcopy_references(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        junction = wn.get_node(wn.junction_name_list[0])
+        junction.add_leak(wn, area=1.0, start_time=0, end_time=3600)
+        junction.tag = 'leaky'
+        B = copy.deepcopy(wn)
+
+        # Elements, controls and registries refer to the copied model
+        for name, control in B.controls():
+            for obj in control.requires():
+                if isinstance(obj, wntr.network.Node):
+                    self.assertIs(obj, B.get_node(obj.name))
+                elif isinstance(obj, wntr.network.Link):
+                    self.assertIs(obj, B.get_link(obj.name))
+        for name, link in B.links():
+            self.assertIs(link.start_node, B.get_node(link.start_node_name))
+            self.assertIs(link.end_node, B.get_node(link.end_node_name))
+        self.assertIs(B.nodes._link_reg, B.links)
+        self.assertIs(B.get_node(junction.name)._pattern_reg, B.patterns)
+        self.assertEqual(B.get_node(junction.name).tag, 'leaky')
+
+        # Changes to the copy do not change the original
+        B.get_node(junction.name).demand_timeseries_list[0].base_value = 10.0
+        B.get_link(wn.pipe_name_list[0]).diameter = 10.0
+        B.remove_control(B.control_name_list[0])
+        B.add_junction('new_junction')
+        self.assertNotEqual(junction.demand_timeseries_list[0].base_value, 10.0)
+        self.assertNotEqual(wn.get_link(wn.pipe_name_list[0]).diameter, 10.0)
+        self.assertEqual(len(wn.control_name_list), len(B.control_name_list) + 1)
+        self.assertNotIn('new_junction', wn.node_name_list)
+        self.assertEqual(B.get_links_for_node('new_junction'), [])
+
+        # A shallow copy shares the registries
+        C = copy.copy(wn)
+        self.assertIs(C.nodes, wn.nodes)
+        self.assertIs(C.links, wn.links)
+
     def test_dict_with_leak(self):
         # This covers a bug where writing controls to a dictionary broke if a leak was added
         wn = wntr.network.WaterNetworkModel(self.inp_file)
@@ -1027,6 +1253,353 @@ class TestNetworkIO_Dict(unittest.TestCase):
         assert pump.efficiency_curve.name == 'efficiency_curve'
 
 
+class TestNodeLinkIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+        self.inp_file = join(ex_datadir, "Net3.inp")
+
+    def test_index(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        index = wn.node_link_index()
+        self.assertIs(index, wn.node_link_index())
+        self.assertListEqual(index.node_names, list(wn.node_name_list))
+        self.assertListEqual(index.link_names, list(wn.link_name_list))
+        for node_name in wn.node_name_list:
+            self.assertListEqual(sorted(index.inlets(node_name)), sorted(wn.get_links_for_node(node_name, "INLET")))
+            self.assertListEqual(sorted(index.outlets(node_name)), sorted(wn.get_links_for_node(node_name, "OUTLET")))
+        for link_name, link in wn.links():
+            i = index.link_index[link_name]
+            self.assertEqual(index.node_names[index.start_node[i]], link.start_node_name)
+            self.assertEqual(index.node_names[index.end_node[i]], link.end_node_name)
+        self.assertEqual(index.inlet_indptr[-1], wn.num_links)
+        with self.assertRaises(ValueError):
+            index.inlet_links[0] = 1
+
+    def test_topology_changes(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        index = wn.node_link_index()
+        wn.get_link("20").initial_status = "CLOSED"
+        self.assertIs(index, wn.node_link_index())
+
+        wn.add_junction("new_junction")
+        self.assertIn("new_junction", wn.node_link_index().node_index)
+        wn.add_pipe("new_pipe", "new_junction", "10")
+        self.assertListEqual(wn.node_link_index().outlets("new_junction"), ["new_pipe"])
+        self.assertIn("new_pipe", wn.node_link_index().inlets("10"))
+        wn.remove_link("new_pipe")
+        self.assertListEqual(wn.node_link_index().outlets("new_junction"), [])
+        self.assertListEqual(wn.get_links_for_node("new_junction"), [])
+
+        wn.add_pipes({"name": ["bulk_pipe"], "start_node_name": ["new_junction"], "end_node_name": ["10"]})
+        self.assertListEqual(wn.node_link_index().outlets("new_junction"), ["bulk_pipe"])
+
+        # Reversing a link keeps it connected to both nodes
+        start_node, end_node = wn.get_link("20").start_node_name, wn.get_link("20").end_node_name
+        self.wntr.morph.link.reverse_link(wn, "20", return_copy=False)
+        self.assertIn("20", wn.get_links_for_node(start_node))
+        self.assertIn("20", wn.get_links_for_node(end_node))
+        self.assertListEqual(wn.get_links_for_node(start_node, "INLET"), ["20"])
+        self.assertListEqual(wn.node_link_index().inlets(start_node), ["20"])
+        self.assertIn("20", wn.node_link_index().outlets(end_node))
+
+        # The cached index is not copied with the model
+        self.assertEqual(wn.clone()._topology_cache, dict())
+        self.assertEqual(pickle.loads(pickle.dumps(wn))._topology_cache, dict())
+        with wn.transaction():
+            wn.add_pipe("scenario_pipe", "new_junction", "10")
+            self.assertIn("scenario_pipe", wn.node_link_index().outlets("new_junction"))
+        self.assertNotIn("scenario_pipe", wn.node_link_index().outlets("new_junction"))
+
+    def test_graph_view(self):
+        import networkx as nx
+
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        G = wn.graph_view()
+        self.assertIs(G, wn.graph_view())
+        self.assertTrue(nx.is_frozen(G))
+        self.assertTrue(nx.utils.graphs_equal(G, wn.to_graph()))
+        with self.assertRaises(nx.NetworkXError):
+            G.remove_node("10")
+
+        wn.get_node("10").coordinates = (1.0, 2.0)
+        self.assertEqual(wn.graph_view().nodes["10"]["pos"], (1.0, 2.0))
+        wn.add_junction("new_junction")
+        wn.add_pipe("new_pipe", "new_junction", "10")
+        G2 = wn.graph_view()
+        self.assertIsNot(G2, G)
+        self.assertTrue(G2.has_edge("new_junction", "10", "new_pipe"))
+        self.assertFalse(G.has_node("new_junction"))
+
+    def test_sparse_matrices(self):
+        import networkx as nx
+
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        G = wn.to_graph()
+        links = [(link.start_node_name, link.end_node_name, name) for name, link in wn.links()]
+
+        A = wn.incidence_matrix()
+        self.assertEqual(A.shape, (wn.num_nodes, wn.num_links))
+        expected = nx.incidence_matrix(G, nodelist=wn.node_name_list, edgelist=links, oriented=True)
+        self.assertEqual(abs(A - expected).sum(), 0)
+        index = wn.node_link_index()
+        j = index.link_index["10"]
+        self.assertEqual(A[index.node_index[wn.get_link("10").start_node_name], j], -1)
+        self.assertEqual(A[index.node_index[wn.get_link("10").end_node_name], j], 1)
+
+        D = wn.adjacency_csr()
+        self.assertEqual(abs(D - nx.adjacency_matrix(G, nodelist=wn.node_name_list)).sum(), 0)
+        U = wn.adjacency_csr(directed=False)
+        self.assertEqual(abs(U - nx.adjacency_matrix(nx.MultiGraph(G), nodelist=wn.node_name_list)).sum(), 0)
+
+        # Copies of the cached matrices are returned
+        D.data[:] = 5
+        self.assertEqual(wn.adjacency_csr().max(), 1)
+        wn.remove_link("20")
+        self.assertEqual(wn.incidence_matrix().shape, (wn.num_nodes, wn.num_links))
+
+
+class TestElementArrays(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+        self.inp_file = join(ex_datadir, "Net3.inp")
+
+    def test_get(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        pipes = wn.element_arrays("Pipe")
+        self.assertEqual(len(pipes), wn.num_pipes)
+        self.assertEqual([name for name, pipe in pipes()], list(wn.pipe_name_list))
+        self.assertIs(wn.element_arrays(self.wntr.network.Pipe)._element_class, self.wntr.network.Pipe)
+        # The element iterators are unchanged
+        self.assertEqual([name for name, pipe in wn.pipes()], list(wn.pipe_name_list))
+        with self.assertRaises(ValueError):
+            wn.element_arrays("Pipes")
+
+        diameter = wn.element_arrays("Pipe").diameter[:]
+        self.assertIsInstance(diameter, np.ndarray)
+        self.assertEqual(diameter.dtype, np.float64)
+        expected = [wn.get_link(name).diameter for name in wn.pipe_name_list]
+        self.assertListEqual(diameter.tolist(), expected)
+        self.assertEqual(wn.element_arrays("Pipe").diameter[1], expected[1])
+        self.assertListEqual(np.asarray(wn.element_arrays("Pipe").diameter).tolist(), expected)
+        assert_series_equal(
+            wn.element_arrays("Pipe").diameter.to_series(),
+            wn.query_link_attribute("diameter", link_type=self.wntr.network.Pipe),
+            check_names=False,
+        )
+
+        self.assertEqual(wn.element_arrays("Pipe").check_valve[:].dtype, bool)
+        status = wn.element_arrays("Pipe").initial_status[:]
+        self.assertEqual(status.dtype, object)
+        self.assertIsInstance(status[0], self.wntr.network.LinkStatus)
+        self.assertEqual(wn.element_arrays("Junction").coordinates[0], wn.get_node(wn.junction_name_list[0]).coordinates)
+        self.assertEqual(len(wn.element_arrays("GPValve").setting[:]), 0)
+        self.assertIn("elevation", dir(wn.element_arrays("Tank")))
+        with self.assertRaises(AttributeError):
+            wn.element_arrays("Pipe").not_an_attribute
+        with self.assertRaises(AttributeError):
+            wn.element_arrays("Pipe").add_leak
+
+    def test_set(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        wn.element_arrays("Pipe").roughness[:] = 100
+        self.assertTrue(all(pipe.roughness == 100 for name, pipe in wn.pipes()))
+
+        small = wn.element_arrays("Pipe").diameter[:] < 0.3
+        wn.element_arrays("Pipe").diameter[small] = wn.element_arrays("Pipe").diameter[small] * 2
+        for name, value in zip(wn.pipe_name_list, small):
+            if value:
+                self.assertLess(wn.get_link(name).diameter, 0.6)
+        wn.element_arrays("Pipe").diameter[:2] = [1.0, 2.0]
+        self.assertEqual(wn.get_link(wn.pipe_name_list[1]).diameter, 2.0)
+        # The returned array is a copy of the values
+        diameter = wn.element_arrays("Pipe").diameter[:]
+        diameter[0] = 3.0
+        self.assertEqual(wn.get_link(wn.pipe_name_list[0]).diameter, 1.0)
+        with self.assertRaises(ValueError):
+            wn.element_arrays("Pipe").diameter[:2] = [1.0, 2.0, 3.0]
+
+        wn.element_arrays("Pipe").initial_status[0] = "CLOSED"
+        self.assertEqual(wn.get_link(wn.pipe_name_list[0]).initial_status, self.wntr.network.LinkStatus.Closed)
+
+        clone = wn.clone()
+        clone.element_arrays("Junction").elevation[:] = 0.0
+        self.assertTrue(all(junction.elevation == 0.0 for name, junction in clone.junctions()))
+        self.assertFalse(all(junction.elevation == 0.0 for name, junction in wn.junctions()))
+
+
+class TestNetworkClone(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+        self.inp_file = join(ex_datadir, "Net3.inp")
+
+    def test_clone(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        expected = json.dumps(wn.to_dict())
+        clone = wn.clone()
+        assert(wn._compare(clone))
+        self.assertEqual(json.dumps(clone.to_dict()), expected)
+        self.assertEqual(len(clone.nodes._data._own), 0)
+        self.assertEqual(len(clone.links._data._own), 0)
+
+        pipe = clone.get_link("123")
+        self.assertIsInstance(pipe, self.wntr.network.Pipe)
+        self.assertIs(pipe, clone.get_link("123"))
+        self.assertIs(pipe.start_node, clone.get_node(pipe.start_node_name))
+        pipe.initial_status = "CLOSED"
+        junction = clone.get_node("123")
+        junction.demand_timeseries_list[0].base_value = 1.0
+        junction.add_demand(0.5, "1", "extra")
+        junction.add_leak(clone, area=0.01, start_time=0, end_time=3600)
+        clone.options.hydraulic.demand_multiplier = 1.5
+        clone.get_pattern("1").multipliers[0] = 10.0
+
+        # Elements of the clone are objects of the element classes
+        self.assertIs(type(pipe), self.wntr.network.Pipe)
+        self.assertIs(type(junction), self.wntr.network.Junction)
+        self.assertIs(type(junction.demand_timeseries_list), self.wntr.network.elements.Demands)
+        self.assertIs(clone.get_node("123"), junction)
+        self.assertEqual(len(clone.nodes._data._own), 0)
+        for name in ["10", "15"]:
+            self.assertEqual(_is_bulk_junction(clone.get_node(name)), _is_bulk_junction(wn.get_node(name)))
+        self.assertEqual(clone.get_link("123").initial_status, self.wntr.network.LinkStatus.Closed)
+        self.assertEqual(clone.get_node("123").demand_timeseries_list[0].base_value, 1.0)
+        self.assertEqual(len(clone.get_node("123").demand_timeseries_list), 2)
+        self.assertEqual(clone.get_pattern("1").multipliers[0], 10.0)
+        self.assertEqual(len(clone.control_name_list), len(wn.control_name_list) + 2)
+        self.assertEqual(json.dumps(wn.to_dict()), expected)
+
+    def test_clone_add_remove(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        expected = json.dumps(wn.to_dict())
+        clone = wn.clone()
+        clone.add_junction("new_junction", base_demand=0.01, demand_pattern="1")
+        clone.add_pipe("new_pipe", "new_junction", "123")
+        self.assertEqual(clone.num_nodes, wn.num_nodes + 1)
+        self.assertEqual(clone.node_name_list[-1], "new_junction")
+        self.assertIn("new_pipe", clone.get_links_for_node("123"))
+        self.assertNotIn("new_pipe", wn.get_links_for_node("123"))
+        self.assertRaises(RuntimeError, clone.remove_node, "new_junction")
+        clone.remove_link("new_pipe")
+        clone.remove_node("new_junction")
+        clone.remove_link("123")
+        self.assertEqual(clone.num_links, wn.num_links - 1)
+        self.assertNotIn("123", clone.pipe_name_list)
+        self.assertRaises(KeyError, clone.get_link, "123")
+        self.assertEqual(json.dumps(wn.to_dict()), expected)
+
+        # A clone of a clone
+        clone2 = clone.clone()
+        clone2.get_link("125").diameter = 1.0
+        self.assertNotIn("123", clone2.link_name_list)
+        self.assertNotEqual(clone.get_link("125").diameter, 1.0)
+        self.assertNotEqual(wn.get_link("125").diameter, 1.0)
+
+    def test_clone_copy(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        clone = wn.clone()
+        clone.get_link("123").initial_status = "CLOSED"
+        for B in [copy.deepcopy(clone), pickle.loads(pickle.dumps(clone)), clone.clone(cow=False)]:
+            assert(clone._compare(B))
+            self.assertIs(type(B.get_node("123")), self.wntr.network.Junction)
+            self.assertEqual(B.get_link("123").initial_status, self.wntr.network.LinkStatus.Closed)
+            self.assertEqual(json.dumps(clone.to_dict()), json.dumps(B.to_dict()))
+
+    def test_transaction(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 4 * 3600
+        expected = json.dumps(wn.to_dict())
+        pipe = wn.get_link("123")
+        junction = wn.get_node("123")
+        link_names = wn.link_name_list
+        with wn.transaction():
+            nodes = wn.nodes
+            pipe121 = wn.get_link("121")
+            wn.get_link("123").initial_status = "CLOSED"
+            wn.get_node("123").add_leak(wn, area=0.01, start_time=0, end_time=3600)
+            wn.get_node("123").add_demand(0.5, "1", "extra")
+            wn.add_junction("new_junction", base_demand=0.01, demand_pattern="1")
+            wn.add_pipe("new_pipe", "new_junction", "123")
+            wn.remove_link("125")
+            wn.add_pattern("new_pattern", [1, 2, 3])
+            wn.options.hydraulic.demand_multiplier = 1.5
+            with wn.transaction():
+                wn.get_link("121").diameter = 1.0
+            self.assertNotEqual(wn.get_link("121").diameter, 1.0)
+            self.assertEqual(wn.get_link("123").initial_status, self.wntr.network.LinkStatus.Closed)
+            self.wntr.sim.WNTRSimulator(wn).run_sim()
+            self.assertIsNotNone(wn.get_node("123").head)
+        self.assertEqual(json.dumps(wn.to_dict()), expected)
+        self.assertIs(wn.get_link("123"), pipe)
+        self.assertIs(wn.get_node("123"), junction)
+        self.assertEqual(wn.sim_time, 0)
+        self.assertIsNone(junction.head)
+        self.assertIs(pipe.start_node, wn.get_node(pipe.start_node_name))
+        # Objects obtained within the block are the objects of the model
+        self.assertIs(nodes, wn.nodes)
+        self.assertIs(pipe121, wn.get_link("121"))
+        self.assertEqual(len(junction.demand_timeseries_list), 1)
+        self.assertEqual(wn.link_name_list, link_names)
+
+        # Changes are also rolled back after an exception
+        with self.assertRaises(ValueError):
+            with wn.transaction():
+                wn.get_link("123").diameter = 1.0
+                raise ValueError()
+        self.assertNotEqual(pipe.diameter, 1.0)
+        self.assertEqual(json.dumps(wn.to_dict()), expected)
+        self.assertNotIn("__setattr__", vars(self.wntr.network.base._CopyOnWrite))
+
+    def test_clone_shared_elements(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 4 * 3600
+        clone = wn.clone()
+        clone.get_link("123").initial_status = "CLOSED"
+        self.wntr.sim.EpanetSimulator(clone).run_sim()
+
+        # Elements that were read but not changed by the clone only refer to 
+        # the elements of the model
+        shared = {"_cow_base", "_cow_context"}
+        for name, node in clone.nodes():
+            self.assertIs(node._cow_base, wn.get_node(name))
+            self.assertEqual(set(vars(node)), shared)
+        for name, link in clone.links():
+            self.assertIs(link._cow_base, wn.get_link(name))
+            self.assertIs(link.start_node, clone.get_node(link.start_node_name))
+            if name != "123":
+                self.assertEqual(set(vars(link)), shared)
+        self.assertEqual(set(vars(clone.get_link("123"))) - shared, {"_initial_status", "_user_status"})
+        for name, junction in clone.junctions():
+            self.assertEqual(set(vars(junction.demand_timeseries_list)), shared)
+        self.assertEqual(wn.get_link("123").initial_status, self.wntr.network.LinkStatus.Open)
+
+    def test_clone_simulation(self):
+        wn = self.wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 4 * 3600
+        clone = wn.clone()
+        wn2 = copy.deepcopy(wn)
+        for model in [clone, wn2]:
+            model.get_link("123").initial_status = "CLOSED"
+            model.get_node("123").demand_timeseries_list[0].base_value = 0.01
+
+        results = self.wntr.sim.EpanetSimulator(clone).run_sim()
+        expected = self.wntr.sim.EpanetSimulator(wn2).run_sim()
+        assert_frame_equal(results.node["pressure"], expected.node["pressure"])
+        results = self.wntr.sim.WNTRSimulator(clone).run_sim()
+        expected = self.wntr.sim.WNTRSimulator(wn2).run_sim()
+        assert_frame_equal(results.node["pressure"], expected.node["pressure"])
+        self.assertEqual(wn.sim_time, 0)
+        self.assertIsNone(wn.get_node("123").head)
+
+
 @unittest.skipIf(not has_geopandas,
                  "Cannot test GIS capabilities: geopandas is missing")
 class TestNetworkIO_GIS(unittest.TestCase):
@@ -4,7 +4,9 @@ from unittest import SkipTest
 
 import networkx as nx
 import numpy as np
+import pandas as pd
 import wntr
+from wntr.metrics.topographic import _links_in_simple_paths
 
 from _test_paths import (
     NETWORKS_FOR_TESTING_DIR as datadir,
@@ -88,6 +90,27 @@ class TestNetworkGraphs(unittest.TestCase):
         error = abs(expected - val)
         self.assertLess(error, 0.01)
 
+    def test_central_point_dominance_sampled(self):
+        inp_file = join(netdir, "Net3.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        G = wn.to_graph()
+        uG = nx.Graph(G.to_undirected())
+        bet_cen = np.array(list(nx.betweenness_centrality(uG).values()))
+        expected = sum(max(bet_cen) - bet_cen) / (len(bet_cen) - 1)
+
+        val = wntr.metrics.central_point_dominance(G)
+        self.assertAlmostEqual(val, expected, 10)
+        val = wntr.metrics.central_point_dominance(G, processes=2)
+        self.assertAlmostEqual(val, expected, 10)
+        val = wntr.metrics.central_point_dominance(G, k=G.number_of_nodes())
+        self.assertAlmostEqual(val, expected, 10)
+
+        val1 = wntr.metrics.central_point_dominance(G, k=50, seed=1)
+        val2 = wntr.metrics.central_point_dominance(G, k=50, seed=1, processes=2)
+        self.assertAlmostEqual(val1, val2, 10)
+        estimates = [wntr.metrics.central_point_dominance(G, k=50, seed=seed) for seed in range(10)]
+        self.assertLess(abs(np.mean(estimates) - expected), 0.02)
+
     def test_spectral_gap(self):
         inp_file = join(datadir, "Anytown.inp")
         wn = wntr.network.WaterNetworkModel(inp_file)
@@ -113,6 +136,25 @@ class TestNetworkGraphs(unittest.TestCase):
         raise SkipTest
         self.assertLess(error, 0.01)
 
+    def test_spectral_metrics_sparse(self):
+        from test_epanet_io_benchmark import write_grid_inpfile
+
+        write_grid_inpfile("temp_grid_spectral.inp", 30)
+        wn = wntr.network.read_inpfile("temp_grid_spectral.inp", fast=True)
+        G = wn.to_graph()
+        uG = G.to_undirected()
+        adjacency = np.linalg.eigvalsh(nx.to_numpy_array(uG))
+        laplacian = np.linalg.eigvalsh(nx.laplacian_matrix(uG).toarray().astype(float))
+
+        val = wntr.metrics.spectral_gap(G)
+        self.assertAlmostEqual(val, adjacency[-1] - adjacency[-2], 8)
+        val = wntr.metrics.algebraic_connectivity(G)
+        self.assertAlmostEqual(val, laplacian[1], 8)
+
+        G.remove_node("J1")
+        G.add_node("J1")  # isolated node
+        self.assertEqual(wntr.metrics.algebraic_connectivity(G), 0)
+
     def test_crit_ratio_defrag(self):
         inp_file = join(datadir, "Anytown.inp")
         wn = wntr.network.WaterNetworkModel(inp_file)
@@ -164,6 +206,44 @@ class TestNetworkGraphs(unittest.TestCase):
         self.assertEqual(dict(edge, **G.adj), edge)
         # assert_dict_contains_subset(edge, G.adj)
 
+    def test_links_in_simple_paths(self):
+        inp_file = join(netdir, "Net1.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        G = wn.to_graph()  # acyclic
+        G.add_edge("10", "11", key="10b")  # parallel link
+        sources = ["9", "2"]
+        sinks = list(G.nodes())
+
+        enumerated = _links_in_simple_paths(G, sources, sinks, method="enumerate")
+        counted = _links_in_simple_paths(G, sources, sinks)
+        pd.testing.assert_series_equal(counted, enumerated)
+        self.assertEqual(enumerated["10b"], enumerated["10"])
+
+        parallel = _links_in_simple_paths(G, sources, sinks, method="enumerate", processes=2)
+        pd.testing.assert_series_equal(parallel, enumerated)
+
+        sampled = _links_in_simple_paths(G, sources, sinks, method="sample", seed=1)
+        self.assertListEqual(list(sampled.columns), ["count", "lower", "upper"])
+        error = (sampled["count"] - enumerated).abs() / enumerated
+        self.assertLess(error.max(), 0.1)
+
+    def test_links_in_simple_paths_cycles(self):
+        inp_file = join(netdir, "Net1.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        G = wn.to_graph()
+        for start_node, end_node, key in list(G.edges(keys=True)):
+            G.add_edge(end_node, start_node, key=key + "_reverse")
+        sources = ["9"]
+        sinks = list(G.nodes())
+
+        self.assertRaises(ValueError, _links_in_simple_paths, G, sources, sinks, method="dag")
+        enumerated = _links_in_simple_paths(G, sources, sinks)
+        sampled = _links_in_simple_paths(G, sources, sinks, method="sample", n_samples=5000, seed=1)
+        error = (sampled["count"] - enumerated).abs() / enumerated.clip(lower=1)
+        self.assertLess(error.max(), 0.1)
+        inside = (sampled["lower"] <= enumerated) & (enumerated <= sampled["upper"])
+        self.assertGreater(inside.mean(), 0.8)
+
 
 if __name__ == "__main__":
     unittest.main()
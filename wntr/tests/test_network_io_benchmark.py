@@ -0,0 +1,163 @@
+"""
+Benchmarks of loading a water network model from a snapshot, an INP file, a
+JSON file and a pickle, of pickling and copying a model, and of copy-on-write
+clones, on a synthetic network.
+
+Run with ``pytest -s -m time_consuming test_network_io_benchmark.py`` to
+print the timings. The benchmarks do not assert on the timings.
+"""
+import copy
+import gc
+import pickle
+import time
+import tracemalloc
+import unittest
+
+import pytest
+
+from test_epanet_io_benchmark import write_grid_inpfile
+
+
+class TestSnapshotBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+    def benchmark(self, n_elements):
+        n = int(round((n_elements / 3) ** 0.5))
+        inp_file = "temp_grid_{}.inp".format(n_elements)
+        write_grid_inpfile(inp_file, n)
+        wn = self.wntr.network.read_inpfile(inp_file, fast=True)
+        self.wntr.network.write_json(wn, "temp_grid.json")
+        self.wntr.network.save_snapshot(wn, "temp_grid.npz")
+        model = pickle.dumps(wn, protocol=pickle.HIGHEST_PROTOCOL)
+
+        timings = dict()
+        loaders = [
+            ("INP file", lambda: self.wntr.network.read_inpfile(inp_file, fast=True)),
+            ("JSON file", lambda: self.wntr.network.read_json("temp_grid.json")),
+            ("pickle", lambda: pickle.loads(model)),
+            ("snapshot", lambda: self.wntr.network.load_snapshot("temp_grid.npz")),
+            ("memory-mapped snapshot", lambda: self.wntr.network.load_snapshot("temp_grid.npz", mmap_mode="r")),
+        ]
+        for label, load in loaders:
+            # Free the previous model first so that its collection is not timed
+            gc.collect()
+            tic = time.perf_counter()
+            wn2 = load()
+            timings[label] = time.perf_counter() - tic
+            self.assertEqual(wn2.num_nodes, wn.num_nodes)
+            self.assertEqual(wn2.num_links, wn.num_links)
+            del wn2
+
+        print("\n{} nodes, {} links:".format(wn.num_nodes, wn.num_links))
+        for label, seconds in timings.items():
+            print("  {}: {:.1f} s".format(label, seconds))
+
+    @pytest.mark.time_consuming
+    def test_200k_elements(self):
+        self.benchmark(200000)
+
+
+class TestPickleBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+    def benchmark(self, n_elements):
+        n = int(round((n_elements / 3) ** 0.5))
+        inp_file = "temp_grid_{}.inp".format(n_elements)
+        write_grid_inpfile(inp_file, n)
+        wn = self.wntr.network.read_inpfile(inp_file, fast=True)
+
+        # The generic path pickles and copies the attribute dictionary of the
+        # model object by object
+        generic = dict()
+        compact = dict()
+        for timings, obj in [(generic, wn.__dict__), (compact, wn)]:
+            gc.collect()
+            tic = time.perf_counter()
+            model = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            timings["dumps"] = time.perf_counter() - tic
+            timings["size"] = len(model) / 1e6
+            gc.collect()
+            tic = time.perf_counter()
+            wn2 = pickle.loads(model)
+            timings["loads"] = time.perf_counter() - tic
+            del wn2, model
+            gc.collect()
+            tic = time.perf_counter()
+            wn2 = copy.deepcopy(obj)
+            timings["deepcopy"] = time.perf_counter() - tic
+            del wn2
+
+        print("\n{} nodes, {} links:".format(wn.num_nodes, wn.num_links))
+        for label, timings in [("generic", generic), ("compact", compact)]:
+            print(
+                "  {}: dumps {:.1f} s, loads {:.1f} s, deepcopy {:.1f} s, {:.0f} MB".format(
+                    label, timings["dumps"], timings["loads"], timings["deepcopy"], timings["size"]
+                )
+            )
+        self.assertLess(compact["size"], generic["size"])
+
+    @pytest.mark.time_consuming
+    def test_200k_elements(self):
+        self.benchmark(200000)
+
+
+class TestCloneBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+
+    def benchmark(self, n_elements, n_clones):
+        n = int(round((n_elements / 3) ** 0.5))
+        inp_file = "temp_grid_{}.inp".format(n_elements)
+        write_grid_inpfile(inp_file, n)
+        wn = self.wntr.network.read_inpfile(inp_file, fast=True)
+
+        gc.collect()
+        tracemalloc.start()
+        tic = time.perf_counter()
+        clones = []
+        for i in range(n_clones):
+            clone = wn.clone()
+            clone.get_link("P{}".format(i + 1)).initial_status = "CLOSED"
+            clone.get_node("J{}".format(i)).demand_timeseries_list[0].base_value *= 2
+            clones.append(clone)
+        seconds = (time.perf_counter() - tic) / n_clones
+        memory = tracemalloc.get_traced_memory()[0] / n_clones
+        tracemalloc.stop()
+
+        tic = time.perf_counter()
+        for i in range(n_clones):
+            with wn.transaction():
+                wn.get_link("P{}".format(i + 1)).initial_status = "CLOSED"
+                wn.get_node("J{}".format(i)).demand_timeseries_list[0].base_value *= 2
+        transaction = (time.perf_counter() - tic) / n_clones
+
+        gc.collect()
+        tic = time.perf_counter()
+        copy.deepcopy(wn)
+        deepcopy = time.perf_counter() - tic
+
+        print(
+            "\n{} nodes, {} links: clone {:.1f} ms and {:.0f} kB, transaction {:.1f} ms, deepcopy {:.1f} s".format(
+                wn.num_nodes, wn.num_links, seconds * 1000, memory / 1000, transaction * 1000, deepcopy
+            )
+        )
+        self.assertLess(memory, 100e3)
+
+    @pytest.mark.time_consuming
+    def test_200k_elements(self):
+        self.benchmark(200000, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+from os.path import join
+
+import wntr
+
+from _test_paths import EXAMPLES_NETWORKS_DIR as ex_datadir
+
+
+class TestAsyncSimulation(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.inp_file = join(ex_datadir, "Net3.inp")
+
+    def test_epanet_async(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        results = wntr.sim.EpanetSimulator(wn).run_sim()
+
+        async def run():
+            # Several simulations of separate models run concurrently
+            wns = [wntr.network.WaterNetworkModel(self.inp_file) for i in range(3)]
+            sims = [wntr.sim.EpanetSimulator(wn) for wn in wns]
+            return await asyncio.gather(*[sim.run_sim_async() for sim in sims])
+
+        results_async = asyncio.run(run())
+        for res in results_async:
+            diff = (res.node["pressure"] - results.node["pressure"]).abs().max().max()
+            self.assertLess(diff, 1e-6)
+
+    def test_wntr_async(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 4 * 3600
+        results = wntr.sim.WNTRSimulator(wn).run_sim()
+
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 4 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+        results_async = asyncio.run(sim.run_sim_async())
+        diff = (results_async.node["pressure"] - results.node["pressure"]).abs().max().max()
+        self.assertLess(diff, 1e-6)
+
+    def test_stream(self):
+        async def stream(sim):
+            steps = []
+            async for time, node, link in sim.stream_sim_async():
+                steps.append((time, node, link))
+            return steps
+
+        for Simulator in [wntr.sim.EpanetSimulator, wntr.sim.WNTRSimulator]:
+            wn = wntr.network.WaterNetworkModel(self.inp_file)
+            wn.options.time.duration = 4 * 3600
+            steps = asyncio.run(stream(Simulator(wn)))
+            self.assertEqual([t for t, n, l in steps], [0, 3600, 7200, 10800, 14400])
+            time, node, link = steps[-1]
+            self.assertEqual(set(node["pressure"].index), set(wn.node_name_list))
+            self.assertEqual(set(link["flowrate"].index), set(wn.link_name_list))
+
+    def test_timeout(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 7 * 24 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await sim.run_sim_async(timeout=0.2)
+
+        asyncio.run(run())
+        # The executor thread stops at the next time step
+        import time
+        for i in range(100):
+            if sim._cancel_event is None:
+                break
+            time.sleep(0.1)
+        self.assertIsNone(sim._cancel_event)
+        self.assertLess(wn.sim_time, 7 * 24 * 3600)
+
+    def test_stream_early_exit(self):
+        wn = wntr.network.WaterNetworkModel(self.inp_file)
+        wn.options.time.duration = 7 * 24 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+
+        async def stream():
+            async for time, node, link in sim.stream_sim_async():
+                if time >= 3600:
+                    break
+            return time
+
+        self.assertEqual(asyncio.run(stream()), 3600)
+        self.assertEqual(sim._report_hooks, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from os.path import join
+
+import wntr
+
+from _test_paths import EXAMPLES_NETWORKS_DIR as ex_datadir
+
+
+def _close_pipe_10(wn):
+    wn.get_link("10").initial_status = "CLOSED"
+
+
+def _crash(wn):
+    import os
+    os._exit(1)
+
+
+class TestEpanetPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.time.duration = 6 * 3600
+
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        self.base_results = sim.run_sim()
+
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        wn.options.time.duration = 6 * 3600
+        _close_pipe_10(wn)
+        sim = wntr.sim.EpanetSimulator(wn)
+        self.closed_results = sim.run_sim()
+
+    def test_map(self):
+        deltas = [
+            None,
+            {"links": {"10": {"initial_status": "CLOSED"}}},
+            _close_pipe_10,
+            {"options": {"time": {"duration": 3600}}},
+        ]
+        with wntr.sim.EpanetPool(self.wn, processes=2) as pool:
+            pool_dir = pool._pool_dir
+            results = pool.map(deltas)
+
+        pressure = self.base_results.node["pressure"]
+        self.assertLess((results[0].node["pressure"] - pressure).abs().max().max(), 1e-6)
+        pressure = self.closed_results.node["pressure"]
+        self.assertLess((results[1].node["pressure"] - pressure).abs().max().max(), 1e-6)
+        self.assertLess((results[2].node["pressure"] - pressure).abs().max().max(), 1e-6)
+        self.assertEqual(results[3].node["pressure"].index[-1], 3600)
+
+        import os
+        self.assertFalse(os.path.exists(pool_dir))
+
+    def test_accumulators(self):
+        accumulators = [wntr.metrics.StatisticsAccumulator("node", "pressure")]
+        deltas = [None, {"links": {"10": {"initial_status": "CLOSED"}}}]
+        with wntr.sim.EpanetPool(self.wn, processes=2, accumulators=accumulators) as pool:
+            results = pool.map(deltas)
+
+        for accumulators, sim_results in zip(results, [self.base_results, self.closed_results]):
+            self.assertEqual(len(accumulators), 1)
+            stats = accumulators[0].result()
+            pressure = sim_results.node["pressure"]
+            self.assertLess((stats["min"] - pressure.min()).abs().max(), 1e-6)
+            self.assertLess((stats["mean"] - pressure.mean()).abs().max(), 1e-4)
+
+    def test_exceptions(self):
+        deltas = [{"links": {"not_a_link": {"initial_status": "CLOSED"}}}, None]
+        with wntr.sim.EpanetPool(self.wn, processes=1) as pool:
+            results = pool.map(deltas, return_exceptions=True)
+            self.assertIsInstance(results[0], Exception)
+            self.assertIsInstance(results[1], wntr.sim.SimulationResults)
+            with self.assertRaises(Exception):
+                pool.map(deltas)
+
+    def test_crash_isolation(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        with wntr.sim.EpanetPool(self.wn, processes=1) as pool:
+            results = pool.map([_crash, None], return_exceptions=True)
+            self.assertIsInstance(results[0], BrokenProcessPool)
+            self.assertIsInstance(results[1], wntr.sim.SimulationResults)
+            # The pool is usable after a crash
+            results = pool.map([None])
+            self.assertIsInstance(results[0], wntr.sim.SimulationResults)
+
+        # Unfinished jobs are submitted again concurrently after a crash
+        deltas = [None, _crash, None, None, None, None, _crash, None]
+        with wntr.sim.EpanetPool(self.wn, processes=2) as pool:
+            restarts = []
+            pending = []
+            concurrent = []
+            restart = pool._restart
+            submit = pool.submit
+
+            def count_restart():
+                restarts.append(1)
+                restart()
+
+            def count_submit(delta=None):
+                future = submit(delta)
+                if len(restarts) > 0:
+                    pending.append(future)
+                    concurrent.append(sum(1 for f in pending if not f.done()))
+                return future
+
+            pool._restart = count_restart
+            pool.submit = count_submit
+            results = pool.map(deltas, return_exceptions=True)
+        for delta, result in zip(deltas, results):
+            if delta is None:
+                self.assertIsInstance(result, wntr.sim.SimulationResults)
+            else:
+                self.assertIsInstance(result, BrokenProcessPool)
+        self.assertGreater(max(concurrent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()